@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+# agendador_polls.py - Cadência adaptativa de polling da API, por mesa
+# Aprende a distribuição do intervalo entre giros (resultados.timestamp + giros observados ao vivo) e escolhe o próximo poll
+# pela chance de o giro sair até lá: esparso logo após um giro, sub-segundo em volta do próximo resultado esperado.
+import random
+from bisect import bisect_right
+from collections import deque
+from relogio import monotonico
+
+INTERVALO_FIXO = 5 # sem histórico suficiente (ou mesa parada): a cadência fixa antiga
+INTERVALO_MINIMO = 0.7 # poll mais rápido, na janela mais provável do próximo giro
+INTERVALO_MAXIMO = 12 # poll mais espaçado, logo após um giro
+INTERVALO_CAUDA = 2 # giro já mais atrasado que todo o histórico (troca de dealer, mesa lenta)
+PROBABILIDADE_POR_POLL = 0.15 # chance, dado que o giro ainda não saiu, de ele sair antes do próximo poll
+JITTER = 0.1 # +-10% em cada espera, para mesas e processos não sincronizarem
+MAX_POLLS_POR_MINUTO = 60 # teto de requisições por mesa
+MIN_AMOSTRAS = 20; MAX_AMOSTRAS = 500
+INTERVALO_GIRO_MIN = 5; INTERVALO_GIRO_MAX = 180 # fora disso não é cadência de giro (leitura ruim ou pausa da mesa)
+
+class AgendadorPolls:
+    def __init__(self, relogio=monotonico, aleatorio=None):
+        self.relogio = relogio; self.aleatorio = aleatorio or random.Random()
+        self.intervalos = deque(maxlen=MAX_AMOSTRAS); self._ordenados = []
+        self.ultimo_giro = None; self.ultimo_poll = None
+        self._ancora_precisa = False # o último giro foi detectado pouco depois de sair (serve de início de amostra)
+        self._polls = deque() # momentos dos polls do último minuto, para o teto de requisições
+
+    def carregar_historico(self, momentos):
+        # momentos: datetimes de resultados.timestamp, do mais recente para o mais antigo.
+        momentos = list(reversed([m for m in momentos if m is not None]))
+        for anterior, atual in zip(momentos, momentos[1:]): self._registrar_intervalo((atual - anterior).total_seconds())
+
+    def _registrar_intervalo(self, segundos):
+        if INTERVALO_GIRO_MIN <= segundos <= INTERVALO_GIRO_MAX: self.intervalos.append(segundos); self._ordenados = None
+
+    def registrar_poll(self, novos, agora=None):
+        # Chamado após cada poll com a quantidade de giros novos. Um giro só vira amostra se os dois polls que o
+        # delimitam foram próximos: a cadência medida não herda o atraso de detecção de um poll espaçado.
+        agora = self.relogio() if agora is None else agora
+        preciso = self.ultimo_poll is not None and agora - self.ultimo_poll <= INTERVALO_FIXO * 1.5
+        self.ultimo_poll = agora; self._polls.append(agora)
+        if not novos: return
+        if novos == 1 and preciso and self._ancora_precisa: self._registrar_intervalo(agora - self.ultimo_giro)
+        self.ultimo_giro = agora; self._ancora_precisa = novos == 1 and preciso
+
+    def _quantil(self, ordenados, p):
+        return ordenados[min(int(p * len(ordenados)), len(ordenados) - 1)]
+
+    def _espera_base(self, agora):
+        if len(self.intervalos) < MIN_AMOSTRAS or self.ultimo_giro is None: return INTERVALO_FIXO
+        if self._ordenados is None: self._ordenados = sorted(self.intervalos)
+        ordenados = self._ordenados; decorrido = agora - self.ultimo_giro
+        if decorrido > INTERVALO_GIRO_MAX: return INTERVALO_FIXO
+        acumulada = bisect_right(ordenados, decorrido) / len(ordenados) # F(decorrido)
+        if acumulada >= 1: return INTERVALO_CAUDA
+        # Próximo poll no instante em que P(giro até lá | ainda não saiu) = PROBABILIDADE_POR_POLL.
+        alvo = acumulada + PROBABILIDADE_POR_POLL * (1 - acumulada)
+        return self._quantil(ordenados, alvo) - decorrido
+
+    def proxima_espera(self, agora=None):
+        # Segundos até o próximo poll: espera pela distribuição aprendida, com jitter, limites e teto por minuto.
+        agora = self.relogio() if agora is None else agora
+        espera = self._espera_base(agora) * self.aleatorio.uniform(1 - JITTER, 1 + JITTER)
+        espera = min(max(espera, INTERVALO_MINIMO), INTERVALO_MAXIMO)
+        while self._polls and self._polls[0] <= agora - 60: self._polls.popleft()
+        if len(self._polls) >= MAX_POLLS_POR_MINUTO: espera = max(espera, self._polls[0] + 60 - agora)
+        return espera
@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+# backtest.py - Reproduz o histórico de resultados pelas mesmas regras do monitor (seleção de estratégia,
+# gale/vitória/loss e placar diário). A inferência dos modelos é feita em lote sobre todo o histórico
+# antes da simulação; o modo --varredura testa grades de gatilhos em paralelo.
+import os
+import csv
+import json
+import time
+import logging
+import argparse
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from itertools import product
+import numpy as np
+import pytz
+from roleta import DUZIA
+from persistencia import MESA_PADRAO, FILTRO_MESA
+from features_numeros import construir_features, AVISO_SEM_NOMES, ANALYSIS_WINDOW
+from estrategia_online import ModeloOnline
+from estrategias import (
+    NUMEROS_PARA_ANALISE, SEQUENCE_LENGTH_IA_DUZIAS, SEQUENCE_LENGTH_IA_NUMEROS, PARAMETROS_PADRAO, ESTRATEGIAS,
+    selecionar_estrategia, novo_estado_estrategia, avaliar_giro, novo_placar, registrar_resultado, calcular_sequencias,
+)
+
+FUSO_HORARIO_BRASIL = pytz.timezone('America/Sao_Paulo')
+TAMANHO_LOTE_INFERENCIA = 50000
+
+# --- HISTÓRICO ---
+def carregar_historico_db(database_url, mesa=MESA_PADRAO):
+    import psycopg2
+    from urllib.parse import urlparse
+    result = urlparse(database_url)
+    conn = psycopg2.connect(database=result.path[1:], user=result.username, password=result.password, host=result.hostname, port=result.port)
+    try:
+        with conn.cursor(name='extracao_backtest') as cur:
+            cur.itersize = TAMANHO_LOTE_INFERENCIA
+            cur.execute(f"SELECT numero, timestamp FROM resultados WHERE {FILTRO_MESA} ORDER BY id ASC;", (mesa,))
+            linhas = cur.fetchall()
+    finally:
+        conn.close()
+    return np.array([l[0] for l in linhas], dtype=np.int64), [l[1] for l in linhas]
+
+def carregar_historico_csv(caminho):
+    # Colunas esperadas: numero, timestamp (ISO 8601, com fuso), em ordem cronológica.
+    numeros, momentos = [], []
+    with open(caminho, newline='') as f:
+        for linha in csv.DictReader(f):
+            numeros.append(int(linha['numero'])); momentos.append(datetime.fromisoformat(linha['timestamp']))
+    return np.array(numeros, dtype=np.int64), momentos
+
+def dias_brasil(momentos):
+    # Data local (America/Sao_Paulo) de cada giro, como ordinal: é ela que decide a virada do placar.
+    return np.array([(m if m.tzinfo else pytz.utc.localize(m)).astimezone(FUSO_HORARIO_BRASIL).date().toordinal() for m in momentos], dtype=np.int64)
+
+def carregar_modelo(caminho):
+    if not caminho or not os.path.exists(caminho): return None
+    import joblib
+    return joblib.load(caminho)
+
+# --- SINAIS EM LOTE ---
+# Linha t dos sinais = decisão tomada logo após o giro t ser registrado (como em check_for_new_triggers).
+def sinais_atraso(numeros, janela=NUMEROS_PARA_ANALISE):
+    # Mesmo resultado de analisar_atraso_duzias sobre os últimos `janela` giros (mais recente primeiro),
+    # calculado para todas as posições de uma vez; a checagem de tamanho mínimo fica para o gatilho.
+    n = len(numeros); posicoes = np.arange(n); duzias = DUZIA[numeros]
+    disponiveis = np.minimum(posicoes + 1, janela)
+    atrasos = np.empty((n, 3), dtype=np.int64)
+    for d in (1, 2, 3):
+        ultima = np.maximum.accumulate(np.where(duzias == d, posicoes, -1))
+        atrasos[:, d - 1] = np.where((ultima >= 0) & (posicoes - ultima < disponiveis), posicoes - ultima, disponiveis)
+    indice = np.argmax(atrasos, axis=1)
+    return indice + 1, atrasos[posicoes, indice]
+
+def sinais_ia_duzias(numeros, modelo, tamanho_lote=TAMANHO_LOTE_INFERENCIA):
+    n = len(numeros); duzia = np.zeros(n, dtype=np.int64); confianca = np.zeros(n)
+    if modelo is None or n < SEQUENCE_LENGTH_IA_DUZIAS: return duzia, confianca
+    import pandas as pd
+    janelas = np.lib.stride_tricks.sliding_window_view(DUZIA[numeros], SEQUENCE_LENGTH_IA_DUZIAS)[:, ::-1]
+    colunas = [f'duzia_lag_{i+1}' for i in range(SEQUENCE_LENGTH_IA_DUZIAS)]; inicio = SEQUENCE_LENGTH_IA_DUZIAS - 1
+    for a in range(0, len(janelas), tamanho_lote):
+        probabilidades = modelo.predict_proba(pd.DataFrame(janelas[a:a + tamanho_lote], columns=colunas))
+        melhor = np.argmax(probabilidades, axis=1) # predict() do RandomForest é exatamente classes_[argmax]
+        duzia[inicio + a:inicio + a + len(melhor)] = modelo.classes_[melhor]
+        confianca[inicio + a:inicio + a + len(melhor)] = probabilidades[np.arange(len(melhor)), melhor]
+    return duzia, confianca
+
+def sinais_ia_top5(numeros, dados_modelo, tamanho_lote=TAMANHO_LOTE_INFERENCIA):
+    n = len(numeros); top5 = np.full((n, 5), -1, dtype=np.int64); confianca = np.zeros(n)
+    if dados_modelo is None or n < ANALYSIS_WINDOW: return top5, confianca
+    modelo = dados_modelo['model']
+    # Acrescenta um giro fictício: a linha t+1 de treino (lags terminando em t) é a linha que o motor monta após o giro t.
+    matriz, nomes = construir_features(np.append(numeros, 0), SEQUENCE_LENGTH_IA_NUMEROS, ANALYSIS_WINDOW)
+    matriz = matriz[1:, [nomes.index(nome) for nome in dados_modelo['features']]]
+    inicio = ANALYSIS_WINDOW - 1; classes = modelo.classes_
+    for a in range(inicio, n, tamanho_lote):
+        probabilidades = modelo.predict_proba(matriz[a:a + tamanho_lote])
+        # Ordem estável decrescente: empates ficam na ordem das classes, como o sorted() de top5_de_probabilidades.
+        ordem = np.argsort(-probabilidades, axis=1, kind='stable')[:, :5]
+        escolhidas = np.take_along_axis(probabilidades, ordem, axis=1)
+        soma = np.zeros(len(ordem))
+        for k in range(ordem.shape[1]): soma = soma + escolhidas[:, k]
+        top5[a:a + len(ordem), :ordem.shape[1]] = classes[ordem]; confianca[a:a + len(ordem)] = soma
+    return top5, confianca
+
+def sinais_online(numeros):
+    # O modelo online é sequencial por natureza: atualiza com o giro t e prevê, como o monitor depois de mesa.adicionar().
+    # Começa frio; o monitor ao vivo parte do snapshot.
+    modelo = ModeloOnline(); duzia = np.zeros(len(numeros), dtype=np.int64); confianca = np.zeros(len(numeros))
+    for t, numero in enumerate(numeros.tolist()):
+        modelo.atualizar(numero); previsao, conf = modelo.prever()
+        if previsao is not None: duzia[t] = previsao; confianca[t] = conf
+    return duzia, confianca
+
+def calcular_sinais(numeros, modelo_duzias, dados_numeros):
+    duzia_atrasada, atraso = sinais_atraso(numeros)
+    duzia_ia, conf_duzia = sinais_ia_duzias(numeros, modelo_duzias)
+    top5, conf_top5 = sinais_ia_top5(numeros, dados_numeros)
+    duzia_online, conf_online = sinais_online(numeros)
+    return {
+        'numeros': numeros, 'duzia_atrasada': duzia_atrasada, 'atraso': atraso, 'duzia_ia': duzia_ia, 'conf_duzia': conf_duzia,
+        'top5': top5, 'conf_top5': conf_top5, 'tem_modelo_duzias': modelo_duzias is not None, 'tem_modelo_numeros': dados_numeros is not None,
+        'duzia_online': duzia_online, 'conf_online': conf_online,
+    }
+
+# --- SIMULAÇÃO ---
+def simular(sinais, dias, parametros=PARAMETROS_PADRAO):
+    # Mesmo fluxo de processar_numero: virada de dia, depois resolve a jogada ativa ou procura um novo gatilho.
+    numeros = sinais['numeros'].tolist(); dias = dias.tolist()
+    duzia_atrasada, atraso = sinais['duzia_atrasada'].tolist(), sinais['atraso'].tolist()
+    duzia_ia, conf_duzia = sinais['duzia_ia'].tolist(), sinais['conf_duzia'].tolist()
+    top5, conf_top5 = sinais['top5'].tolist(), sinais['conf_top5'].tolist()
+    duzia_online, conf_online = sinais['duzia_online'].tolist(), sinais['conf_online'].tolist()
+    tem_duzias, tem_numeros = sinais['tem_modelo_duzias'], sinais['tem_modelo_numeros']
+    estado = novo_estado_estrategia(); relatorio = []; placar = None; historico = []
+    for t, numero in enumerate(numeros):
+        if placar is None or placar['last_check_date'] != dias[t]:
+            if placar is not None: relatorio.append(fechar_dia(placar, historico))
+            placar = novo_placar(dias[t]); historico = []
+        if estado['active']:
+            resultado = avaliar_giro(estado, numero, parametros['max_martingales'])
+            if resultado == 'gale': continue
+            registrar_resultado(placar, estado['strategy_name'], resultado, estado['martingale_level'])
+            historico.append('win' if resultado == 'win' else 'loss'); estado = novo_estado_estrategia(); continue
+        jogada = selecionar_estrategia(
+            lambda: ([v for v in top5[t] if v >= 0], conf_top5[t]) if tem_numeros and t >= ANALYSIS_WINDOW - 1 else (None, 0),
+            (lambda: (duzia_ia[t], conf_duzia[t]) if t >= SEQUENCE_LENGTH_IA_DUZIAS - 1 else (None, 0)) if tem_duzias else None,
+            lambda: (duzia_atrasada[t], atraso[t]),
+            parametros,
+            lambda: (duzia_online[t] or None, conf_online[t]),
+        )
+        if jogada: estado.update({"active": True, **jogada})
+    if placar is not None: relatorio.append(fechar_dia(placar, historico))
+    return relatorio
+
+def fechar_dia(placar, historico):
+    estrategias = {nome: dict(valores) for nome, valores in placar.items() if nome != 'last_check_date'}
+    vitorias = sum(v for valores in estrategias.values() for chave, v in valores.items() if chave.startswith('wins_'))
+    derrotas = sum(valores['losses'] for valores in estrategias.values())
+    return {
+        'data': datetime.fromordinal(placar['last_check_date']).date().isoformat(), 'estrategias': estrategias,
+        'vitorias': vitorias, 'derrotas': derrotas, **calcular_sequencias(historico),
+    }
+
+def totalizar(relatorio):
+    total = {'estrategias': {}, 'vitorias': 0, 'derrotas': 0, 'max_wins': 0, 'max_losses': 0}
+    for dia in relatorio:
+        for nome, valores in dia['estrategias'].items():
+            acumulado = total['estrategias'].setdefault(nome, {})
+            for chave, v in valores.items(): acumulado[chave] = acumulado.get(chave, 0) + v
+        total['vitorias'] += dia['vitorias']; total['derrotas'] += dia['derrotas']
+        total['max_wins'] = max(total['max_wins'], dia['max_wins']); total['max_losses'] = max(total['max_losses'], dia['max_losses'])
+    jogadas = total['vitorias'] + total['derrotas']
+    total['assertividade'] = total['vitorias'] / jogadas if jogadas else 0.0
+    return total
+
+# --- VARREDURA DE PARÂMETROS (processos) ---
+_SINAIS = {}
+
+def _inicializar_worker(sinais, dias):
+    # Os sinais pré-calculados chegam uma única vez por processo; cada tarefa só troca os gatilhos.
+    _SINAIS['sinais'] = sinais; _SINAIS['dias'] = dias
+    logging.disable(logging.INFO)
+
+def _simular_parametros(parametros):
+    return parametros, totalizar(simular(_SINAIS['sinais'], _SINAIS['dias'], parametros))
+
+def varrer_parametros(sinais, dias, grade, workers=None):
+    nomes = list(grade); combinacoes = [dict(zip(nomes, valores)) for valores in product(*(grade[nome] for nome in nomes))]
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), initializer=_inicializar_worker, initargs=(sinais, dias)) as pool:
+        resultados = list(pool.map(_simular_parametros, combinacoes, chunksize=max(1, len(combinacoes) // (4 * (workers or os.cpu_count())))))
+    return sorted(resultados, key=lambda r: (r[1]['assertividade'], r[1]['vitorias']), reverse=True)
+
+# --- SAÍDA ---
+def formatar_placar(placar):
+    gales = sorted((chave for chave in placar if chave.startswith('wins_g')), key=lambda chave: int(chave[6:]))
+    return " | ".join([f"SG: {placar.get('wins_sg', 0)}"] + [f"G{chave[6:]}: {placar[chave]}" for chave in gales] + [f"❌ {placar.get('losses', 0)}"])
+
+def imprimir_relatorio(relatorio):
+    for dia in relatorio:
+        jogadas = dia['vitorias'] + dia['derrotas']; assertividade = dia['vitorias'] / jogadas if jogadas else 0.0
+        print(f"{dia['data']}: {jogadas} jogadas | assertividade {assertividade:.1%} | seq. máx. ✅ {dia['max_wins']} ❌ {dia['max_losses']}")
+        for nome in ESTRATEGIAS:
+            if nome in dia['estrategias']: print(f"    {nome}: {formatar_placar(dia['estrategias'][nome])}")
+    total = totalizar(relatorio)
+    print(f"TOTAL: {total['vitorias']} vitórias / {total['derrotas']} derrotas | assertividade {total['assertividade']:.1%} | seq. máx. ✅ {total['max_wins']} ❌ {total['max_losses']}")
+    for nome, placar in total['estrategias'].items(): print(f"    {nome}: {formatar_placar(placar)}")
+
+def lista(tipo):
+    return lambda texto: [tipo(v) for v in texto.split(',')]
+
+if __name__ == '__main__':
+    warnings.filterwarnings('ignore', message=AVISO_SEM_NOMES, category=UserWarning) # matriz de features em NumPy, ver features_numeros
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--csv', help="Arquivo CSV (numero,timestamp) em vez do banco (DATABASE_URL)")
+    parser.add_argument('--mesa', default=MESA_PADRAO, help="table_id dos giros lidos do banco")
+    parser.add_argument('--modelo-duzias', default='modelo_duzias.pkl', help="Vazio para simular sem o modelo")
+    parser.add_argument('--modelo-numeros', default='modelo_numeros.pkl', help="Vazio para simular sem o modelo")
+    parser.add_argument('--gatilho-atraso', type=int, default=PARAMETROS_PADRAO['gatilho_atraso'])
+    parser.add_argument('--confianca-duzias', type=float, default=PARAMETROS_PADRAO['confianca_ia_duzias'])
+    parser.add_argument('--confianca-top5', type=float, default=PARAMETROS_PADRAO['confianca_ia_top5'])
+    parser.add_argument('--max-martingales', type=int, default=PARAMETROS_PADRAO['max_martingales'])
+    parser.add_argument('--confianca-online', type=float, default=PARAMETROS_PADRAO['confianca_online'])
+    parser.add_argument('--varredura', action='store_true', help="Testa todas as combinações das grades abaixo")
+    parser.add_argument('--grade-atraso', type=lista(int), default=[4, 5, 6, 7, 8, 9, 10])
+    parser.add_argument('--grade-duzias', type=lista(float), default=[0.40, 0.45, 0.50, 0.55, 0.60])
+    parser.add_argument('--grade-top5', type=lista(float), default=[0.20, 0.25, 0.30, 0.35, 0.40, 0.45])
+    parser.add_argument('--grade-martingales', type=lista(int), default=[0, 1, 2, 3])
+    parser.add_argument('--grade-online', type=lista(float), default=[0.40, 0.45, 0.50])
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--saida', help="Grava o resultado completo em JSON")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    inicio = time.perf_counter()
+    numeros, momentos = carregar_historico_csv(args.csv) if args.csv else carregar_historico_db(os.environ.get('DATABASE_URL'), args.mesa)
+    dias = dias_brasil(momentos)
+    modelo_duzias = carregar_modelo(args.modelo_duzias); dados_numeros = carregar_modelo(args.modelo_numeros)
+    print(f"{len(numeros)} giros carregados | modelo de dúzias: {'sim' if modelo_duzias is not None else 'não'} | modelo Top 5: {'sim' if dados_numeros is not None else 'não'}")
+    sinais = calcular_sinais(numeros, modelo_duzias, dados_numeros)
+    print(f"Sinais calculados em lote em {time.perf_counter() - inicio:.1f}s.")
+
+    if args.varredura:
+        grade = {'gatilho_atraso': args.grade_atraso, 'confianca_ia_duzias': args.grade_duzias, 'confianca_ia_top5': args.grade_top5, 'max_martingales': args.grade_martingales, 'confianca_online': args.grade_online}
+        inicio = time.perf_counter(); resultados = varrer_parametros(sinais, dias, grade, args.workers)
+        print(f"{len(resultados)} combinações simuladas em {time.perf_counter() - inicio:.1f}s. Melhores:")
+        for parametros, total in resultados[:10]:
+            print(f"  {parametros}: assertividade {total['assertividade']:.1%} ({total['vitorias']}✅/{total['derrotas']}❌) | seq. máx. ❌ {total['max_losses']}")
+        saida = [{'parametros': parametros, 'total': total} for parametros, total in resultados]
+    else:
+        parametros = {'gatilho_atraso': args.gatilho_atraso, 'confianca_ia_duzias': args.confianca_duzias, 'confianca_ia_top5': args.confianca_top5, 'max_martingales': args.max_martingales, 'confianca_online': args.confianca_online}
+        relatorio = simular(sinais, dias, parametros); imprimir_relatorio(relatorio)
+        saida = {'parametros': parametros, 'dias': relatorio, 'total': totalizar(relatorio)}
+    if args.saida:
+        with open(args.saida, 'w') as f: json.dump(saida, f, indent=2, ensure_ascii=False)
+        print(f"Resultado salvo em '{args.saida}'.")
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+# benchmarks/bench_features_treino.py - Tempo de construção das features de treino x tamanho do histórico
+# Uso: python -m benchmarks.bench_features_treino [--tamanhos 10000 100000 1000000] [--referencia-ate 10000]
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from scipy.stats import entropy
+from roleta import DUZIA
+from train_model_numeros import preparar_dataset, SEQUENCE_LENGTH, ANALYSIS_WINDOW
+
+def preparar_dataset_pandas(df):
+    # Caminho anterior (shift + rolling.apply com value_counts por linha), usado como referência.
+    df = df.copy()
+    df['duzia'] = DUZIA[df['numero'].to_numpy()]
+    for i in range(1, SEQUENCE_LENGTH + 1):
+        df[f'numero_lag_{i}'] = df['numero'].shift(i)
+        df[f'duzia_lag_{i}'] = df['duzia'].shift(i)
+    rolling_window = df['numero'].shift(1).rolling(window=ANALYSIS_WINDOW)
+    df['feature_entropy'] = rolling_window.apply(lambda x: entropy(pd.Series(x).value_counts(normalize=True)), raw=False)
+    df['feature_unique_count'] = rolling_window.apply(lambda x: len(pd.unique(x)), raw=False)
+    df['target'] = df['numero']
+    df.dropna(inplace=True)
+    features = [col for col in df.columns if 'lag' in col or 'feature' in col]
+    return df[features + ['target']], features
+
+def cronometrar(funcao, *args):
+    inicio = time.perf_counter(); resultado = funcao(*args)
+    return resultado, time.perf_counter() - inicio
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--referencia-ate', type=int, default=10_000, help="Roda o caminho pandas antigo até este tamanho")
+    parser.add_argument('--semente', type=int, default=42)
+    args = parser.parse_args()
+    rng = np.random.default_rng(args.semente)
+    print(f"{'giros':>10} | {'vetorizado (s)':>14} | {'pandas (s)':>10} | {'ganho':>7} | idêntico")
+    for tamanho in args.tamanhos:
+        df = pd.DataFrame({'numero': rng.integers(0, 37, tamanho)})
+        (dados, features), tempo = cronometrar(preparar_dataset, df['numero'].to_numpy())
+        linha = f"{tamanho:>10} | {tempo:>14.3f} | "
+        if tamanho <= args.referencia_ate:
+            (referencia, features_ref), tempo_ref = cronometrar(preparar_dataset_pandas, df)
+            identico = features == features_ref and dados.equals(referencia)
+            linha += f"{tempo_ref:>10.3f} | {tempo_ref / tempo:>6.0f}x | {'sim' if identico else 'NÃO'}"
+        else: linha += f"{'-':>10} | {'-':>7} | -"
+        print(linha)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+# benchmarks/bench_monitor.py - Latência por chamada e alocações das funções quentes do monitor (o caminho de um giro)
+# Histórico sintético e modelos de fixture pequenos: sem banco, rede ou Telegram.
+# Uso: python -m benchmarks.bench_monitor [--repeticoes 2000] [--jogadas 200] [--sem-salvar]
+import os
+import logging
+import argparse
+from datetime import timedelta
+from itertools import cycle
+
+# O monitor exige as variáveis de ambiente na importação; nada é conectado até o supervisor rodar.
+for _variavel, _valor in (('TOKEN_BOT', 'benchmark'), ('CHAT_ID', '1'), ('URL_APOSTA', 'https://exemplo.invalid/aposta'), ('DATABASE_URL', 'postgres://benchmark@localhost/benchmark')):
+    os.environ.setdefault(_variavel, _valor)
+
+import roulette_monitor as monitor
+from roleta import get_properties
+from mesas import Mesa
+from motor_inferencia import MotorInferencia
+from features_numeros import MotorFeaturesNumeros
+from estrategias import ESTRATEGIAS, DUZIAS, NUMEROS_PARA_ANALISE, SEQUENCE_LENGTH_IA_NUMEROS, analisar_atraso_duzias
+from benchmarks.comum import REPETICOES, historico_sintetico, modelos_fixture, medir, salvar
+
+logging.getLogger().setLevel(logging.WARNING) # os logs de gatilho do monitor dominariam o tempo medido
+
+JANELAS = 4096 # janelas distintas por benchmark: mais que o cache LRU do motor, então sem acertos nas versões "sem cache"
+
+def janelas(numeros, tamanho, quantidade=JANELAS):
+    # Janelas do mais recente para o mais antigo, como as do buffer de giros.
+    return [numeros[i:i + tamanho][::-1].copy() for i in range(quantidade)]
+
+def linhas_features(numeros, features, quantidade=JANELAS):
+    motor = MotorFeaturesNumeros(features, sequence_length=SEQUENCE_LENGTH_IA_NUMEROS, janela=NUMEROS_PARA_ANALISE); linhas = []
+    for numero in numeros[:quantidade + NUMEROS_PARA_ANALISE]:
+        motor.atualizar(int(numero))
+        if motor.pronto(): linhas.append(motor.linha().copy())
+    return linhas[:quantidade]
+
+def mesa_com_placar(numeros, jogadas):
+    # Placar e histórico de jogadas de um dia movimentado, espalhados entre 00h e 24h.
+    mesa = Mesa('benchmark'); resultados = cycle(['win'] * 3 + ['loss'])
+    inicio = monitor.relogio.agora(monitor.FUSO_HORARIO_BRASIL).replace(hour=0, minute=0, second=0, microsecond=0)
+    for i in range(jogadas):
+        mesa.livro.registrar(ESTRATEGIAS[i % len(ESTRATEGIAS)], next(resultados), int(numeros[i]) % 3, inicio + timedelta(seconds=i * 86399 // max(jogadas, 1)))
+    mesa.carregar(numeros[:NUMEROS_PARA_ANALISE][::-1])
+    return mesa
+
+def estados_sinal():
+    return [{'strategy_name': nome, 'winning_numbers': DUZIAS[2] + [0] if 'Top 5' not in nome else [0, 7, 13, 22, 31, 36],
+             'trigger_number': 2, 'trigger_info': 7 if nome == ESTRATEGIAS[0] else 0.57} for nome in ESTRATEGIAS]
+
+def executar(repeticoes=REPETICOES, jogadas=200, semente=42):
+    numeros = historico_sintetico(JANELAS + 200, semente)
+    modelo_duzias, dados_numeros = modelos_fixture(semente); modelo_numeros = dados_numeros['model']
+    janelas_analise = janelas(numeros, NUMEROS_PARA_ANALISE); linhas = linhas_features(numeros, dados_numeros['features'])
+    sem_cache = MotorInferencia(None, tamanho_cache=1); com_cache = MotorInferencia(None)
+    mesa = mesa_com_placar(numeros, jogadas); mesa_giros = Mesa('benchmark_giros'); mesa_giros.carregar(janelas_analise[0])
+    proxima_janela = cycle(janelas_analise).__next__; proxima_linha = cycle(linhas).__next__; proximo_numero = cycle(numeros.tolist()).__next__
+    estados = cycle(estados_sinal()).__next__
+    def sinal():
+        mesa.active_strategy_state = estados(); return monitor.build_base_signal_message(mesa)
+    agora = monitor.relogio.agora(monitor.FUSO_HORARIO_BRASIL); proximo_resultado = cycle(['win', 'win', 'loss']).__next__
+    def registrar_e_placar():
+        mesa.livro.registrar(ESTRATEGIAS[0], proximo_resultado(), 1, agora); return monitor.format_score_message(mesa)
+    def avaliar():
+        janela = proxima_janela(); return sem_cache.avaliar(janela, proxima_linha(), modelo_duzias, modelo_numeros, previsao_online=(2, 0.4))
+    # analisar_ia_duzias/analisar_ia_top5 do monitor hoje são MotorInferencia.prever_duzias/prever_top5.
+    casos = {
+        'get_properties': lambda: get_properties(proximo_numero()),
+        'analisar_atraso_duzias': lambda: analisar_atraso_duzias(proxima_janela()),
+        'prever_duzias_sem_cache': lambda: sem_cache.prever_duzias(proxima_janela(), modelo_duzias),
+        'prever_duzias_cache': lambda: com_cache.prever_duzias(janelas_analise[0], modelo_duzias),
+        'prever_top5_sem_cache': lambda: sem_cache.prever_top5(proxima_linha(), modelo_numeros),
+        'prever_top5_cache': lambda: com_cache.prever_top5(linhas[0], modelo_numeros),
+        'avaliar_giro_sem_cache': avaliar,
+        'mesa_adicionar': lambda: mesa_giros.adicionar(proximo_numero()),
+        'format_score_message': lambda: monitor.format_score_message(mesa),
+        'registrar_jogada_e_placar': registrar_e_placar, # placar remontado: o caminho de uma vitória/loss
+        'build_base_signal_message': sinal,
+        'sequencias_periodo': lambda: mesa.livro.sequencias_periodo('tarde'), # antes calculate_streaks_for_period
+    }
+    # As chamadas de inferência custam milissegundos: menos repetições para a suíte continuar curta.
+    lentos = {'prever_duzias_sem_cache', 'prever_top5_sem_cache', 'avaliar_giro_sem_cache'}
+    resultados = {}
+    for nome, funcao in casos.items():
+        n = max(repeticoes // 10, 50) if nome in lentos else repeticoes
+        resultados[nome] = medir(funcao, n, aquecimento=min(100, n), chamadas_alocacao=min(200, n))
+        r = resultados[nome]
+        print(f"{nome:<30} p50 {r['p50_us']:>10.1f}us  p99 {r['p99_us']:>10.1f}us  pico {r['pico_alocado_bytes']:>9}B  retido {r['retido_bytes_por_chamada']:>8.1f}B")
+    return resultados
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks das funções quentes do monitor.")
+    parser.add_argument('--repeticoes', type=int, default=REPETICOES); parser.add_argument('--jogadas', type=int, default=200, help="Jogadas no histórico do dia")
+    parser.add_argument('--semente', type=int, default=42); parser.add_argument('--sem-salvar', action='store_true', help="Não grava em benchmarks/resultados.jsonl")
+    args = parser.parse_args()
+    resultados = executar(args.repeticoes, args.jogadas, args.semente)
+    if not args.sem_salvar: salvar('monitor', {'repeticoes': args.repeticoes, 'jogadas': args.jogadas, 'semente': args.semente}, resultados)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+# benchmarks/bench_treino.py - Escala do treino x tamanho do histórico: features dos dois modelos e o fit
+# Tempo e pico de memória (tracemalloc) por tamanho, e o expoente de escala entre tamanhos consecutivos (1 = linear).
+# Uso: python -m benchmarks.bench_treino [--tamanhos 10000 100000 1000000] [--fit-ate 100000] [--arvores 10] [--sem-salvar]
+import math
+import argparse
+import train_model_duzias
+import train_model_numeros
+from roleta import DUZIA
+from benchmarks.comum import ARVORES_FIXTURE, historico_sintetico, cronometrar_pico, salvar
+
+def medir_tamanho(numeros, fit, arvores, semente):
+    resultado = {}
+    (dados, features), segundos, pico = cronometrar_pico(train_model_numeros.preparar_dataset, numeros)
+    resultado['features_numeros'] = {'segundos': round(segundos, 4), 'pico_bytes': pico}
+    if fit:
+        modelo = train_model_numeros.criar_modelo(n_estimators=arvores, n_jobs=1, random_state=semente)
+        _, segundos, pico = cronometrar_pico(modelo.fit, dados[features], dados['target'])
+        resultado['fit_numeros'] = {'segundos': round(segundos, 4), 'pico_bytes': pico}
+    del dados
+    (dados, features), segundos, pico = cronometrar_pico(train_model_duzias.preparar_dataset, DUZIA[numeros])
+    resultado['features_duzias'] = {'segundos': round(segundos, 4), 'pico_bytes': pico}
+    if fit:
+        modelo = train_model_duzias.criar_modelo(n_estimators=arvores, random_state=semente)
+        _, segundos, pico = cronometrar_pico(modelo.fit, dados[features], dados['target'])
+        resultado['fit_duzias'] = {'segundos': round(segundos, 4), 'pico_bytes': pico}
+    return resultado
+
+def expoentes(por_tamanho):
+    # Inclinação log-log do tempo entre tamanhos consecutivos: ~1 linear, ~2 quadrático.
+    tamanhos = sorted(por_tamanho, key=int); escalas = {}
+    for menor, maior in zip(tamanhos, tamanhos[1:]):
+        for etapa, medida in por_tamanho[maior].items():
+            anterior = por_tamanho[menor].get(etapa)
+            if anterior and anterior['segundos'] > 0 and medida['segundos'] > 0:
+                escalas.setdefault(etapa, {})[f"{menor}-{maior}"] = round(math.log(medida['segundos'] / anterior['segundos']) / math.log(int(maior) / int(menor)), 2)
+    return escalas
+
+def executar(tamanhos, fit_ate, arvores=ARVORES_FIXTURE, semente=42):
+    por_tamanho = {}
+    print(f"{'giros':>10} | {'etapa':<16} | {'segundos':>9} | {'pico (MB)':>9}")
+    for tamanho in tamanhos:
+        por_tamanho[str(tamanho)] = medir_tamanho(historico_sintetico(tamanho, semente), tamanho <= fit_ate, arvores, semente)
+        for etapa, medida in por_tamanho[str(tamanho)].items():
+            print(f"{tamanho:>10} | {etapa:<16} | {medida['segundos']:>9.3f} | {medida['pico_bytes'] / 2**20:>9.1f}")
+    escalas = expoentes(por_tamanho)
+    for etapa, valores in escalas.items(): print(f"expoente de escala {etapa}: {valores}")
+    return {'por_tamanho': por_tamanho, 'expoentes': escalas}
+
+def main():
+    parser = argparse.ArgumentParser(description="Escala do treino dos modelos x tamanho do histórico.")
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--fit-ate', type=int, default=100_000, help="Treina as florestas até este tamanho (o fit domina o tempo)")
+    parser.add_argument('--arvores', type=int, default=ARVORES_FIXTURE, help="Árvores por floresta no fit")
+    parser.add_argument('--semente', type=int, default=42); parser.add_argument('--sem-salvar', action='store_true', help="Não grava em benchmarks/resultados.jsonl")
+    args = parser.parse_args()
+    resultados = executar(sorted(args.tamanhos), args.fit_ate, args.arvores, args.semente)
+    if not args.sem_salvar: salvar('treino', {'tamanhos': sorted(args.tamanhos), 'fit_ate': args.fit_ate, 'arvores': args.arvores, 'semente': args.semente}, resultados)
+
+if __name__ == '__main__':
+    main()
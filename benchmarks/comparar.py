@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+# benchmarks/comparar.py - Compara duas execuções de uma suíte gravadas em benchmarks/resultados.jsonl
+# Por padrão as duas últimas; sai com código 1 se alguma medida piorou além do limite (útil em CI).
+# Uso: python -m benchmarks.comparar monitor [--base -2] [--atual -1] [--limite 1.2]
+import sys
+import argparse
+from benchmarks.comum import ARQUIVO_RESULTADOS, ler_resultados
+
+def medidas(resultados, prefixo=''):
+    # Achata o registro: {'caso.p50_us': valor} (monitor) ou {'tamanho.etapa.segundos': valor} (treino).
+    planas = {}
+    for chave, valor in resultados.items():
+        if isinstance(valor, dict): planas.update(medidas(valor, f"{prefixo}{chave}."))
+        elif chave in ('p50_us', 'p99_us', 'segundos', 'pico_alocado_bytes', 'pico_bytes'): planas[f"{prefixo}{chave}"] = valor
+    return planas
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara execuções de benchmarks.")
+    parser.add_argument('suite', choices=['monitor', 'treino']); parser.add_argument('--arquivo', default=ARQUIVO_RESULTADOS)
+    parser.add_argument('--base', type=int, default=-2, help="Índice da execução de referência (negativos contam do fim)")
+    parser.add_argument('--atual', type=int, default=-1); parser.add_argument('--limite', type=float, default=1.2, help="Razão atual/base considerada regressão")
+    args = parser.parse_args()
+    execucoes = [r for r in ler_resultados(args.arquivo) if r['suite'] == args.suite]
+    if len(execucoes) < 2: sys.exit(f"Menos de duas execuções da suíte '{args.suite}' em {args.arquivo}.")
+    base, atual = execucoes[args.base], execucoes[args.atual]
+    print(f"base: {base['data']} ({base['commit']})  atual: {atual['data']} ({atual['commit']})")
+    if base['parametros'] != atual['parametros']: print(f"Atenção: parâmetros diferentes {base['parametros']} x {atual['parametros']}.")
+    medidas_base, medidas_atual = medidas(base['resultados']), medidas(atual['resultados']); regressoes = 0
+    for nome in sorted(medidas_base.keys() & medidas_atual.keys()):
+        anterior, novo = medidas_base[nome], medidas_atual[nome]
+        razao = novo / anterior if anterior else float('inf') if novo else 1.0
+        marca = ' <- regressão' if razao > args.limite else ''; regressoes += bool(marca)
+        print(f"{nome:<50} {anterior:>14.3f} {novo:>14.3f} {razao:>7.2f}x{marca}")
+    sys.exit(1 if regressoes else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+# benchmarks/comum.py - Medição, dados sintéticos, modelos de fixture e histórico de resultados dos benchmarks
+# Cada execução de uma suíte vira uma linha JSON em benchmarks/resultados.jsonl (com commit e versões), para comparar
+# execuções ao longo do tempo com benchmarks/comparar.py.
+import os
+import gc
+import json
+import time
+import platform
+import subprocess
+import tracemalloc
+from datetime import datetime, timezone
+import numpy as np
+
+ARQUIVO_RESULTADOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resultados.jsonl')
+REPETICOES = 2000; AQUECIMENTO = 100
+CHAMADAS_ALOCACAO = 200 # chamadas medidas sob tracemalloc (à parte: o rastreamento distorce o tempo)
+GIROS_FIXTURE = 5000; ARVORES_FIXTURE = 10
+
+def historico_sintetico(n, semente=42):
+    return np.random.default_rng(semente).integers(0, 37, n)
+
+def modelos_fixture(semente=42, giros=GIROS_FIXTURE, arvores=ARVORES_FIXTURE):
+    # Florestas pequenas com a mesma estrutura (features, classes, parâmetros) das de produção, treinadas em segundos.
+    import train_model_duzias, train_model_numeros
+    from roleta import DUZIA
+    numeros = historico_sintetico(giros, semente)
+    dados, features = train_model_duzias.preparar_dataset(DUZIA[numeros])
+    modelo_duzias = train_model_duzias.criar_modelo(n_estimators=arvores, random_state=semente).fit(dados[features], dados['target'])
+    dados, features = train_model_numeros.preparar_dataset(numeros)
+    modelo_numeros = train_model_numeros.criar_modelo(n_estimators=arvores, max_depth=8, n_jobs=1, random_state=semente).fit(dados[features], dados['target'])
+    return modelo_duzias, {'model': modelo_numeros, 'features': features}
+
+def medir(funcao, repeticoes=REPETICOES, aquecimento=AQUECIMENTO, chamadas_alocacao=CHAMADAS_ALOCACAO):
+    # Distribuição da latência por chamada (GC desligado durante a cronometragem, como no timeit) e memória por chamada:
+    # pico alocado durante a chamada e o que ficou retido depois dela.
+    for _ in range(aquecimento): funcao()
+    tempos = np.empty(repeticoes, dtype=np.int64); cronometro = time.perf_counter_ns
+    gc_ativo = gc.isenabled(); gc.disable()
+    try:
+        for i in range(repeticoes):
+            inicio = cronometro(); funcao(); tempos[i] = cronometro() - inicio
+    finally:
+        if gc_ativo: gc.enable()
+    picos = np.empty(chamadas_alocacao, dtype=np.int64)
+    tracemalloc.start(); inicial = tracemalloc.get_traced_memory()[0]
+    try:
+        for i in range(chamadas_alocacao):
+            tracemalloc.reset_peak(); antes = tracemalloc.get_traced_memory()[0]
+            funcao(); picos[i] = tracemalloc.get_traced_memory()[1] - antes
+        retido = tracemalloc.get_traced_memory()[0] - inicial
+    finally: tracemalloc.stop()
+    us = tempos / 1000
+    return {'chamadas': repeticoes, 'media_us': round(float(us.mean()), 3), 'p50_us': round(float(np.percentile(us, 50)), 3),
+            'p90_us': round(float(np.percentile(us, 90)), 3), 'p99_us': round(float(np.percentile(us, 99)), 3), 'max_us': round(float(us.max()), 3),
+            'pico_alocado_bytes': int(np.median(picos)), 'retido_bytes_por_chamada': round(retido / chamadas_alocacao, 1)}
+
+def cronometrar_pico(funcao, *args):
+    # Uma chamada cronometrada e outra sob tracemalloc (pico de memória alocada); retorna (resultado, segundos, pico).
+    inicio = time.perf_counter(); resultado = funcao(*args); segundos = time.perf_counter() - inicio
+    del resultado; tracemalloc.start()
+    try: resultado = funcao(*args); pico = tracemalloc.get_traced_memory()[1]
+    finally: tracemalloc.stop()
+    return resultado, segundos, pico
+
+def metadados():
+    try: commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, cwd=os.path.dirname(ARQUIVO_RESULTADOS), timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError): commit = None
+    import sklearn, pandas
+    return {'data': datetime.now(timezone.utc).isoformat(timespec='seconds'), 'commit': commit, 'python': platform.python_version(),
+            'numpy': np.__version__, 'pandas': pandas.__version__, 'sklearn': sklearn.__version__, 'plataforma': platform.platform(), 'cpus': os.cpu_count()}
+
+def salvar(suite, parametros, resultados, arquivo=ARQUIVO_RESULTADOS):
+    registro = {'suite': suite, **metadados(), 'parametros': parametros, 'resultados': resultados}
+    with open(arquivo, 'a', encoding='utf-8') as f: f.write(json.dumps(registro, ensure_ascii=False) + '\n')
+    return registro
+
+def ler_resultados(arquivo=ARQUIVO_RESULTADOS):
+    if not os.path.exists(arquivo): return []
+    with open(arquivo, encoding='utf-8') as f: return [json.loads(linha) for linha in f if linha.strip()]
@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+# buffer_giros.py - Buffer circular de tamanho fixo com os giros mais recentes
+import numpy as np
+
+class BufferGiros:
+    # Cada número é gravado duas vezes (posição i e i + capacidade). Assim a janela "mais recente primeiro"
+    # é sempre um trecho contíguo do array e pode ser entregue como visão, sem cópia.
+    def __init__(self, capacidade, dtype=np.int8):
+        self.capacidade = capacidade
+        self._dados = np.zeros(2 * capacidade, dtype=dtype)
+        self._inicio = 0; self.tamanho = 0
+
+    def __len__(self): return self.tamanho
+
+    def adicionar(self, numero):
+        self._inicio = (self._inicio - 1) % self.capacidade
+        self._dados[self._inicio] = numero; self._dados[self._inicio + self.capacidade] = numero
+        if self.tamanho < self.capacidade: self.tamanho += 1
+
+    def carregar(self, numeros_recentes):
+        # numeros_recentes vem do mais recente para o mais antigo (mesma ordem do SELECT ... ORDER BY id DESC)
+        for numero in reversed(list(numeros_recentes)[:self.capacidade]): self.adicionar(numero)
+
+    def recentes(self, limite=None):
+        n = self.tamanho if limite is None else min(limite, self.tamanho)
+        visao = self._dados[self._inicio:self._inicio + n]; visao.flags.writeable = False
+        return visao
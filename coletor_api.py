@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+# coletor_api.py - Coleta assíncrona do histórico de giros (keep-alive + requisições condicionais)
+import hashlib
+import logging
+import httpx
+
+URL_HISTORICO_PADRAO = "https://api.jogosvirtual.com/jsons/historico_roletabrasileira.json"
+SOBREPOSICAO_MINIMA = 5 # Giros em comum exigidos para confiar no alinhamento entre duas leituras
+
+def normalizar_historico(lista_bruta):
+    numeros = []
+    for valor_bruto in lista_bruta or []:
+        try: numero = int(valor_bruto)
+        except (ValueError, TypeError): continue
+        if 0 <= numero <= 36: numeros.append(numero)
+    return numeros
+
+def calcular_novos_giros(anteriores, atuais, sobreposicao_minima=SOBREPOSICAO_MINIMA):
+    # O histórico é uma janela deslizante (mais antigo -> mais recente). Procuramos o menor deslocamento
+    # em que o final da leitura anterior coincide com o início da atual; o que sobra são giros novos.
+    n_anteriores = len(anteriores)
+    for deslocamento in range(n_anteriores):
+        sobreposicao = n_anteriores - deslocamento
+        if sobreposicao < min(sobreposicao_minima, n_anteriores): break
+        if sobreposicao > len(atuais): continue
+        if anteriores[deslocamento:] == atuais[:sobreposicao]: return atuais[sobreposicao:], True
+    return list(atuais), False
+
+def criar_cliente(timeout=10, max_conexoes=4):
+    return httpx.AsyncClient(
+        timeout=timeout,
+        limits=httpx.Limits(max_connections=max_conexoes, max_keepalive_connections=max_conexoes, keepalive_expiry=120),
+        headers={"Cache-Control": "no-cache", "Accept-Encoding": "gzip, deflate"})
+
+class ColetorHistorico:
+    # abrir(cliente): usa um AsyncClient compartilhado entre várias mesas (quem o criou é quem o fecha); sem ele, o coletor cria o seu.
+    def __init__(self, url=URL_HISTORICO_PADRAO, baralho='0', timeout=10, cliente=None):
+        self.url = url; self.baralho = baralho; self.timeout = timeout
+        self.etag = None; self.last_modified = None; self.hash_corpo = None
+        self.historico = None
+        self.ultima_leitura = None # 'nao_modificado', 'corpo_repetido', 'vazio', 'inicial', 'alinhado' ou 'desalinhado'
+        self._cliente = cliente; self._cliente_proprio = False
+        self.gravador = None # GravadorFeed opcional: recebe cada payload novo (gravacao_feed.py)
+
+    async def abrir(self, cliente=None):
+        if cliente is not None and self._cliente is None: self._cliente = cliente
+        elif self._cliente is None: self._cliente = criar_cliente(self.timeout); self._cliente_proprio = True
+        return self
+
+    async def fechar(self):
+        if self._cliente is not None and self._cliente_proprio: await self._cliente.aclose()
+        self._cliente = None; self._cliente_proprio = False
+
+    def _cabecalhos_condicionais(self):
+        cabecalhos = {}
+        if self.etag: cabecalhos["If-None-Match"] = self.etag
+        if self.last_modified: cabecalhos["If-Modified-Since"] = self.last_modified
+        return cabecalhos
+
+    async def buscar_novos(self):
+        # Retorna a lista (em ordem cronológica) de giros ainda não vistos; [] se nada mudou.
+        await self.abrir()
+        response = await self._cliente.get(self.url, headers=self._cabecalhos_condicionais())
+        if response.status_code == 304: self.ultima_leitura = 'nao_modificado'; return []
+        response.raise_for_status()
+        self.etag = response.headers.get("ETag", self.etag); self.last_modified = response.headers.get("Last-Modified", self.last_modified)
+        corpo = response.content; hash_corpo = hashlib.blake2b(corpo, digest_size=16).digest()
+        if hash_corpo == self.hash_corpo: self.ultima_leitura = 'corpo_repetido'; return []
+        self.hash_corpo = hash_corpo
+        if self.gravador is not None:
+            try: self.gravador.registrar(self.url, corpo)
+            except Exception as e: logging.error(f"Erro ao gravar o payload da API: {e}")
+        atuais = normalizar_historico(response.json().get('baralhos', {}).get(self.baralho, []))
+        if not atuais: self.ultima_leitura = 'vazio'; return []
+        if self.historico is None:
+            # Primeira leitura: só o giro mais recente é tratado como novo (o restante já é passado).
+            self.historico = atuais; self.ultima_leitura = 'inicial'
+            return atuais[-1:]
+        novos, alinhado = calcular_novos_giros(self.historico, atuais)
+        if not alinhado: logging.warning(f"Histórico da API sem sobreposição com a leitura anterior; possível perda de giros. Ingerindo {len(novos)} giros.")
+        self.historico = atuais; self.ultima_leitura = 'alinhado' if alinhado else 'desalinhado'
+        return novos
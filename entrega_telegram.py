@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+# entrega_telegram.py - Entrega das mensagens do Telegram: envio concorrente para todos os chats, limite de taxa
+# (global e por chat), retentativa em flood control (RetryAfter) e coalescência de edições da mesma mensagem.
+import asyncio
+import logging
+from telegram.error import RetryAfter, BadRequest
+from metricas import metricas
+from relogio import monotonico
+
+MAX_CONCORRENCIA = 16
+LIMITE_GLOBAL_POR_SEGUNDO = 30 # limite de envios do bot como um todo
+LIMITE_POR_CHAT_POR_MINUTO = 20 # limite de grupos/canais (o de conversas privadas, 1/s, é mais folgado)
+RAJADA_POR_CHAT = 5
+MAX_TENTATIVAS_FLOOD = 5
+
+def segundos_retry_after(erro):
+    # retry_after é int no python-telegram-bot 20.x e timedelta nas versões mais novas.
+    espera = erro.retry_after
+    return espera.total_seconds() if hasattr(espera, 'total_seconds') else float(espera)
+
+class BaldeTokens:
+    def __init__(self, taxa, capacidade, relogio=monotonico):
+        self.taxa = taxa; self.capacidade = capacidade; self.relogio = relogio
+        self.tokens = float(capacidade); self.atualizado = relogio(); self.bloqueado_ate = 0.0
+        self._trava = asyncio.Lock()
+
+    def bloquear(self, segundos):
+        # Flood control: nenhum token é liberado até o fim da espera indicada pelo Telegram, e a reposição só começa
+        # nesse momento (a espera não conta como tempo de recarga, senão a rajada inteira sairia junto ao fim do bloqueio).
+        self.bloqueado_ate = max(self.bloqueado_ate, self.relogio() + segundos); self.tokens = 0.0; self.atualizado = self.bloqueado_ate
+
+    async def adquirir(self):
+        async with self._trava: # FIFO entre os que esperam pelo mesmo balde
+            while True:
+                agora = self.relogio()
+                if agora < self.bloqueado_ate: await asyncio.sleep(self.bloqueado_ate - agora); continue
+                self.tokens = min(self.capacidade, self.tokens + (agora - self.atualizado) * self.taxa); self.atualizado = agora
+                if self.tokens >= 1: self.tokens -= 1; return
+                await asyncio.sleep((1 - self.tokens) / self.taxa)
+
+class EntregaTelegram:
+    def __init__(self, bot, chat_ids, max_concorrencia=MAX_CONCORRENCIA, limite_global=LIMITE_GLOBAL_POR_SEGUNDO,
+                 limite_chat_minuto=LIMITE_POR_CHAT_POR_MINUTO, rajada_chat=RAJADA_POR_CHAT):
+        self.bot = bot; self.chat_ids = list(chat_ids)
+        self._semaforo = asyncio.Semaphore(max_concorrencia)
+        self._global = BaldeTokens(limite_global, limite_global)
+        self._limite_chat = (limite_chat_minuto / 60, rajada_chat); self._baldes_chat = {}
+        self._edicoes = {} # (chat_id, message_id) -> (texto, kwargs) mais recente ainda não enviado
+        self._ativas = set(); self._tarefas = set()
+
+    def _balde_chat(self, chat_id):
+        balde = self._baldes_chat.get(chat_id)
+        if balde is None: balde = self._baldes_chat[chat_id] = BaldeTokens(*self._limite_chat)
+        return balde
+
+    def _bloquear(self, balde, segundos):
+        # O flood control vale para o bot: o balde global também para, e nenhum chat recebe nada até o fim da espera.
+        balde.bloquear(segundos); self._global.bloquear(segundos)
+
+    async def _chamar(self, chat_id, metodo, **kwargs):
+        balde = self._balde_chat(chat_id)
+        for tentativa in range(1, MAX_TENTATIVAS_FLOOD + 1):
+            await balde.adquirir(); await self._global.adquirir()
+            try:
+                async with self._semaforo:
+                    with metricas.cronometrar('telegram_chamada_segundos', metodo=metodo.__name__): return await metodo(chat_id=chat_id, **kwargs)
+            except RetryAfter as e:
+                espera = segundos_retry_after(e); self._bloquear(balde, espera); metricas.incrementar('telegram_flood_control_total')
+                logging.warning(f"Flood control do Telegram no chat {chat_id}: aguardando {espera:.0f}s (tentativa {tentativa}/{MAX_TENTATIVAS_FLOOD}).")
+        raise RuntimeError(f"Limite de retentativas por flood control atingido no chat {chat_id}")
+
+    async def _enviar(self, chat_id, text, **kwargs):
+        try: return await self._chamar(chat_id, self.bot.send_message, text=text, **kwargs)
+        except Exception as e: logging.error(f"Erro ao enviar mensagem para {chat_id}: {e}"); return None
+
+    async def enviar_todos(self, text, **kwargs):
+        # Envia para todos os chats ao mesmo tempo; retorna {chat_id: Message} dos envios bem-sucedidos.
+        mensagens = await asyncio.gather(*(self._enviar(chat_id, text, **kwargs) for chat_id in self.chat_ids))
+        return {chat_id: mensagem for chat_id, mensagem in zip(self.chat_ids, mensagens) if mensagem is not None}
+
+    def editar(self, message_ids, text, **kwargs):
+        # Não bloqueia: agenda a edição de cada mensagem. Se uma edição anterior da mesma mensagem ainda estiver
+        # esperando (limite de taxa / flood control), ela é substituída e só o texto mais recente é enviado.
+        for chat_id, message_id in list(message_ids.items()):
+            chave = (chat_id, message_id)
+            if chave in self._edicoes: metricas.incrementar('telegram_edicoes_coalescidas_total')
+            self._edicoes[chave] = (text, kwargs)
+            if chave not in self._ativas:
+                self._ativas.add(chave); tarefa = asyncio.create_task(self._descarregar_edicoes(chave))
+                self._tarefas.add(tarefa); tarefa.add_done_callback(self._tarefas.discard)
+
+    async def _descarregar_edicoes(self, chave):
+        # Uma tarefa por mensagem: as edições saem em ordem e nunca duas ao mesmo tempo para a mesma mensagem.
+        chat_id, message_id = chave; balde = self._balde_chat(chat_id); tentativas = 0
+        try:
+            while chave in self._edicoes:
+                await balde.adquirir(); await self._global.adquirir()
+                text, kwargs = self._edicoes.pop(chave) # lido só agora: sempre a versão mais recente
+                try:
+                    async with self._semaforo:
+                        with metricas.cronometrar('telegram_chamada_segundos', metodo='edit_message_text'): await self.bot.edit_message_text(chat_id=chat_id, message_id=message_id, text=text, **kwargs)
+                    tentativas = 0
+                except RetryAfter as e:
+                    espera = segundos_retry_after(e); self._bloquear(balde, espera); tentativas += 1; metricas.incrementar('telegram_flood_control_total')
+                    if tentativas >= MAX_TENTATIVAS_FLOOD:
+                        logging.error(f"Edição da msg {message_id} do chat {chat_id} descartada após {tentativas} flood controls."); tentativas = 0; continue
+                    logging.warning(f"Flood control do Telegram ao editar msg {message_id} do chat {chat_id}: aguardando {espera:.0f}s.")
+                    self._edicoes.setdefault(chave, (text, kwargs)) # reenvia, a menos que já exista um texto mais novo
+                except BadRequest as e:
+                    if 'not modified' not in str(e).lower(): logging.warning(f"Não foi possível editar msg {message_id} do chat {chat_id}: {e}")
+                except Exception as e: logging.warning(f"Não foi possível editar msg {message_id} do chat {chat_id}: {e}")
+        finally: self._ativas.discard(chave)
+
+    async def fechar(self, timeout=30):
+        # Espera as edições pendentes saírem (útil no encerramento).
+        if self._tarefas: await asyncio.wait(set(self._tarefas), timeout=timeout)
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+# estrategia_online.py - Modelo online de dúzias: contagens de transição com decaimento exponencial, atualizadas em O(1) por giro
+# Complementa os modelos treinados uma vez por dia: acompanha a mesa giro a giro, sem retreino, e cabe num snapshot .npz
+# de poucos bytes, para que um reinício continue de onde parou em vez de reler a tabela resultados.
+import os
+import logging
+import numpy as np
+from roleta import DUZIA
+
+MEIA_VIDA_GIROS = 300 # o peso de um giro cai pela metade a cada 300 giros
+ORDEM_CONTEXTO = 2 # contexto da previsão: as duas últimas dúzias (0 = zero)
+PESO_MINIMO_CONTEXTO = 20.0 # peso efetivo mínimo já observado no contexto para a previsão valer
+ARQUIVO_ESTADO_ONLINE = 'estado_online.npz'
+GIROS_AQUECIMENTO_ONLINE = 2000 # sem snapshot: giros lidos do banco para aquecer o modelo
+SALVAR_A_CADA_GIROS = 50
+VERSAO_ESTADO = 1
+LIMITE_ESCALA = 1e100
+
+class ModeloOnline:
+    # Em vez de multiplicar todas as contagens pelo decaimento a cada giro, o peso do giro novo cresce (escala);
+    # dividir pela escala dá as contagens decaídas. A renormalização só acontece quando a escala fica enorme.
+    def __init__(self, meia_vida=MEIA_VIDA_GIROS):
+        self.meia_vida = meia_vida; self.fator = 2 ** (1 / meia_vida)
+        self.contagens = np.zeros((4,) * (ORDEM_CONTEXTO + 1)); self.escala = 1.0
+        self.contexto = (); self.giros = 0
+
+    def atualizar(self, numero):
+        duzia = int(DUZIA[numero])
+        if len(self.contexto) == ORDEM_CONTEXTO: self.contagens[self.contexto + (duzia,)] += self.escala
+        self.escala *= self.fator
+        if self.escala > LIMITE_ESCALA: self.contagens /= self.escala; self.escala = 1.0
+        self.contexto = (self.contexto + (duzia,))[-ORDEM_CONTEXTO:]; self.giros += 1
+
+    def treinar(self, numeros):
+        # numeros do mais antigo para o mais recente
+        for numero in numeros: self.atualizar(numero)
+
+    def definir_contexto(self, numeros_recentes):
+        # numeros_recentes do mais recente para o mais antigo (ordem do buffer de giros)
+        self.contexto = tuple(int(DUZIA[numero]) for numero in reversed(list(numeros_recentes)[:ORDEM_CONTEXTO]))
+
+    def prever(self):
+        # (dúzia mais frequente depois do contexto atual, frequência decaída) ou (None, 0) com pouco histórico no contexto.
+        if len(self.contexto) < ORDEM_CONTEXTO: return None, 0
+        pesos = self.contagens[self.contexto] / self.escala; total = pesos.sum()
+        if total < PESO_MINIMO_CONTEXTO: return None, 0
+        duzia = int(np.argmax(pesos[1:])) + 1
+        return duzia, float(pesos[duzia] / total)
+
+    def salvar(self, arquivo):
+        temporario = f"{arquivo}.tmp"
+        with open(temporario, 'wb') as f:
+            np.savez(f, versao=VERSAO_ESTADO, meia_vida=self.meia_vida, contagens=self.contagens / self.escala, contexto=np.array(self.contexto, dtype=np.int64), giros=self.giros)
+        os.replace(temporario, arquivo) # troca atômica: um reinício nunca lê um snapshot pela metade
+
+    @classmethod
+    def carregar(cls, arquivo):
+        if not os.path.exists(arquivo): return None
+        try:
+            with np.load(arquivo) as dados:
+                if int(dados['versao']) != VERSAO_ESTADO or dados['contagens'].shape != (4,) * (ORDEM_CONTEXTO + 1): raise ValueError("versão ou formato incompatível")
+                modelo = cls(float(dados['meia_vida']))
+                modelo.contagens = dados['contagens'].astype(np.float64); modelo.contexto = tuple(dados['contexto'].tolist()); modelo.giros = int(dados['giros'])
+            return modelo
+        except Exception as e: logging.error(f"Snapshot do modelo online '{arquivo}' ignorado: {e}"); return None
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+# estrategias.py - Regras das estratégias, máquina de estados de gale/vitória/loss e placar
+# Compartilhado pelo monitor ao vivo e pelo backtest, para que ambos decidam exatamente da mesma forma.
+import logging
+import numpy as np
+from roleta import DUZIA
+
+# --- CONFIGURAÇÕES DE ESTRATÉGIA ---
+MAX_MARTINGALES = 2
+GATILHO_ATRASO_DUZIA = 6
+NUMEROS_PARA_ANALISE = 50
+GATILHO_CONFIANCA_IA_DUZIAS = 0.50
+GATILHO_CONFIANCA_IA_TOP5 = 0.40
+GATILHO_CONFIANCA_ONLINE = 0.45 # frequência decaída da dúzia no contexto atual (estrategia_online.py)
+SEQUENCE_LENGTH_IA_DUZIAS = 10
+SEQUENCE_LENGTH_IA_NUMEROS = 15
+
+ESTRATEGIA_ATRASO = "Estratégia Atraso de Dúzias"
+ESTRATEGIA_IA_DUZIAS = "Estratégia IA Dúzias"
+ESTRATEGIA_IA_TOP5 = "Estratégia IA Top 5 Números"
+ESTRATEGIA_ONLINE = "Estratégia Online de Dúzias"
+ESTRATEGIAS = [ESTRATEGIA_ATRASO, ESTRATEGIA_IA_DUZIAS, ESTRATEGIA_IA_TOP5, ESTRATEGIA_ONLINE]
+
+DUZIAS = { 1: list(range(1, 13)), 2: list(range(13, 25)), 3: list(range(25, 37)) }
+
+PARAMETROS_PADRAO = {
+    'gatilho_atraso': GATILHO_ATRASO_DUZIA, 'confianca_ia_duzias': GATILHO_CONFIANCA_IA_DUZIAS,
+    'confianca_ia_top5': GATILHO_CONFIANCA_IA_TOP5, 'max_martingales': MAX_MARTINGALES, 'confianca_online': GATILHO_CONFIANCA_ONLINE,
+}
+
+# --- ANÁLISES ---
+def analisar_atraso_duzias(numeros_recentes, gatilho_atraso=GATILHO_ATRASO_DUZIA):
+    if len(numeros_recentes) < gatilho_atraso: return None, 0
+    atrasos = {1: -1, 2: -1, 3: -1}
+    for i, duzia in enumerate(DUZIA[numeros_recentes].tolist()):
+        if duzia in atrasos and atrasos[duzia] == -1: atrasos[duzia] = i
+        if all(v != -1 for v in atrasos.values()): break
+    for duzia in atrasos:
+        if atrasos[duzia] == -1: atrasos[duzia] = len(numeros_recentes)
+    duzia_atrasada = max(atrasos, key=atrasos.get)
+    return duzia_atrasada, atrasos[duzia_atrasada]
+
+def top5_de_probabilidades(probabilidades, classes, k=5):
+    # Seleção parcial (argpartition) em vez de ordenar todas as classes; só os candidatos com probabilidade >= a k-ésima
+    # maior são ordenados, de forma estável: empates ficam na ordem das classes, como no sorted() original.
+    probabilidades = np.asarray(probabilidades)
+    if len(probabilidades) > k: candidatos = np.flatnonzero(probabilidades >= probabilidades[np.argpartition(probabilidades, -k)[-k]])
+    else: candidatos = np.arange(len(probabilidades))
+    ordem = candidatos[np.argsort(-probabilidades[candidatos], kind='stable')][:k]
+    top_5_numeros = [classes[i] for i in ordem]
+    confianca_somada = sum(probabilidades[i] for i in ordem)
+    return top_5_numeros, confianca_somada
+
+# --- SELEÇÃO DE ESTRATÉGIA (prioridade: Top 5, IA Dúzias, Online, Atraso) ---
+def selecionar_estrategia(avaliar_top5, avaliar_ia_duzias, avaliar_atraso, parametros=PARAMETROS_PADRAO, avaliar_online=None):
+    # Cada avaliador é chamado só quando necessário. avaliar_ia_duzias=None indica modelo de Dúzias indisponível:
+    # com o modelo carregado, o atraso de dúzias não é considerado (mesma regra do monitor). avaliar_online=None desliga o modelo online.
+    top_5, conf_top5 = avaliar_top5()
+    if top_5 is not None and conf_top5 >= parametros['confianca_ia_top5']:
+        logging.info(f"Gatilho IA Top 5! Confiança: {conf_top5:.1%}. Números: {top_5}")
+        winning_numbers = top_5
+        if 0 not in winning_numbers: winning_numbers.append(0)
+        return {"strategy_name": ESTRATEGIA_IA_TOP5, "winning_numbers": winning_numbers, "trigger_number": ", ".join(map(str,sorted(top_5))), "trigger_info": conf_top5 }
+    if avaliar_ia_duzias is not None:
+        duzia_ia, conf_duzia = avaliar_ia_duzias()
+        if duzia_ia is not None and conf_duzia >= parametros['confianca_ia_duzias']:
+            logging.info(f"Gatilho IA Dúzias! Dúzia {duzia_ia} com {conf_duzia:.1%} de confiança.")
+            winning_numbers = DUZIAS[duzia_ia].copy()
+            if 0 not in winning_numbers: winning_numbers.append(0)
+            return {"strategy_name": ESTRATEGIA_IA_DUZIAS, "winning_numbers": winning_numbers, "trigger_number": duzia_ia, "trigger_info": conf_duzia }
+    if avaliar_online is not None:
+        duzia_online, conf_online = avaliar_online()
+        if duzia_online is not None and conf_online >= parametros.get('confianca_online', GATILHO_CONFIANCA_ONLINE):
+            logging.info(f"Gatilho Online de Dúzias! Dúzia {duzia_online} com {conf_online:.1%} de frequência recente.")
+            winning_numbers = DUZIAS[duzia_online].copy(); winning_numbers.append(0)
+            return {"strategy_name": ESTRATEGIA_ONLINE, "winning_numbers": winning_numbers, "trigger_number": duzia_online, "trigger_info": conf_online }
+    if avaliar_ia_duzias is not None: return None
+    duzia_atrasada, atraso = avaliar_atraso()
+    if atraso >= parametros['gatilho_atraso']:
+        logging.info(f"Gatilho Atraso de Dúzia! Dúzia {duzia_atrasada} a {atraso} rodadas.")
+        winning_numbers = DUZIAS[duzia_atrasada].copy(); winning_numbers.append(0)
+        return {"strategy_name": ESTRATEGIA_ATRASO, "winning_numbers": winning_numbers, "trigger_number": duzia_atrasada, "trigger_info": atraso }
+    return None
+
+# --- MÁQUINA DE ESTADOS DA JOGADA ---
+def novo_estado_estrategia():
+    return { "active": False, "strategy_name": "", "martingale_level": 0, "winning_numbers": [], "trigger_number": None, "play_message_ids": {}, "trigger_info": "" }
+
+def avaliar_giro(estado, numero, max_martingales=MAX_MARTINGALES):
+    # Retorna 'win', 'gale' ou 'loss' para a jogada ativa; avança o nível de martingale quando não paga.
+    if numero in estado["winning_numbers"]: return 'win'
+    estado["martingale_level"] += 1
+    return 'gale' if estado["martingale_level"] <= max_martingales else 'loss'
+
+# --- PLACAR ---
+def novo_placar(data):
+    score = {"last_check_date": data}
+    for name in ESTRATEGIAS: score[name] = {"wins_sg": 0, "wins_g1": 0, "wins_g2": 0, "losses": 0}
+    return score
+
+def registrar_resultado(score, strategy_name, resultado, win_level=0):
+    placar = score.setdefault(strategy_name, {"wins_sg": 0, "wins_g1": 0, "wins_g2": 0, "losses": 0})
+    if resultado == 'loss': placar["losses"] += 1
+    elif win_level == 0: placar["wins_sg"] += 1
+    else: placar[f"wins_g{win_level}"] = placar.get(f"wins_g{win_level}", 0) + 1
+
+def calcular_sequencias(resultados):
+    max_wins, current_wins, max_losses, current_losses = 0, 0, 0, 0
+    for result in resultados:
+        if result == 'win': current_wins += 1; current_losses = 0
+        else: current_losses += 1; current_wins = 0
+        if current_wins > max_wins: max_wins = current_wins
+        if current_losses > max_losses: max_losses = current_losses
+    return {"max_wins": max_wins, "max_losses": max_losses}
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+# feature_store.py - Armazém colunar em disco (memory-mapped) de giros e features, indexado por resultados.id
+# Cada execução extrai apenas os giros com id acima do último checkpoint e anexa suas features.
+import os
+import json
+import shutil
+import numpy as np
+from roleta import DUZIA
+from features_numeros import estatisticas_janela, ANALYSIS_WINDOW
+from persistencia import MESA_PADRAO, FILTRO_MESA
+from resultados_copy import extrair_giros
+from migracoes import migrar
+
+DIRETORIO_PADRAO = os.environ.get('FEATURE_STORE_DIR', 'feature_store')
+VERSAO = 2
+TAMANHO_LOTE_EXTRACAO = 50000
+COLUNAS = {
+    'id': np.int64,
+    'numero': np.int8,
+    'duzia': np.int8,
+    'feature_entropy': np.float64,
+    'feature_unique_count': np.float64,
+}
+
+class FeatureStore:
+    # Um store por mesa: as janelas de features não podem misturar giros de mesas diferentes.
+    def __init__(self, diretorio=None, janela=ANALYSIS_WINDOW, mesa=MESA_PADRAO):
+        self.mesa = mesa; self.janela = janela
+        self.diretorio = diretorio or (DIRETORIO_PADRAO if mesa == MESA_PADRAO else f"{DIRETORIO_PADRAO}_{mesa}")
+        self.meta = self._ler_meta()
+
+    # --- METADADOS / CHECKPOINT ---
+    def _caminho(self, nome): return os.path.join(self.diretorio, nome)
+
+    def _meta_vazia(self): return {'versao': VERSAO, 'janela': self.janela, 'mesa': self.mesa, 'linhas': 0, 'ultimo_id': 0}
+
+    def _ler_meta(self):
+        try:
+            with open(self._caminho('meta.json')) as f: meta = json.load(f)
+        except FileNotFoundError: return self._meta_vazia()
+        if meta.get('versao') != VERSAO or meta.get('janela') != self.janela or meta.get('mesa') != self.mesa:
+            print("Feature store com versão/janela/mesa diferente; será reconstruído."); self.limpar(); return self._meta_vazia()
+        self._truncar(meta['linhas'])
+        return meta
+
+    def _gravar_meta(self):
+        temporario = self._caminho('meta.json.tmp')
+        with open(temporario, 'w') as f: json.dump(self.meta, f)
+        os.replace(temporario, self._caminho('meta.json'))
+
+    def _truncar(self, linhas):
+        # Descarta bytes anexados por uma execução interrompida antes de atualizar o checkpoint.
+        for nome, dtype in COLUNAS.items():
+            caminho = self._caminho(f'{nome}.bin'); tamanho = linhas * np.dtype(dtype).itemsize
+            if os.path.exists(caminho) and os.path.getsize(caminho) > tamanho:
+                with open(caminho, 'r+b') as f: f.truncate(tamanho)
+
+    def limpar(self):
+        shutil.rmtree(self.diretorio, ignore_errors=True); self.meta = self._meta_vazia()
+
+    def __len__(self): return self.meta['linhas']
+
+    @property
+    def ultimo_id(self): return self.meta['ultimo_id']
+
+    # --- LEITURA ---
+    def coluna(self, nome):
+        linhas = self.meta['linhas']
+        if linhas == 0: return np.empty(0, dtype=COLUNAS[nome])
+        return np.memmap(self._caminho(f'{nome}.bin'), dtype=COLUNAS[nome], mode='r', shape=(linhas,))
+
+    def abrir(self):
+        return {nome: self.coluna(nome) for nome in COLUNAS}
+
+    # --- ESCRITA ---
+    def anexar(self, ids, numeros):
+        if len(ids) == 0: return 0
+        ids = np.asarray(ids, dtype=np.int64); numeros = np.asarray(numeros, dtype=np.int64)
+        contexto = self.coluna('numero')[-self.janela:].astype(np.int64)
+        entropias, unicos = estatisticas_janela(np.concatenate([contexto, numeros]), self.janela)
+        novas = {
+            'id': ids, 'numero': numeros, 'duzia': DUZIA[numeros],
+            'feature_entropy': entropias[len(contexto):], 'feature_unique_count': unicos[len(contexto):],
+        }
+        os.makedirs(self.diretorio, exist_ok=True)
+        for nome, dtype in COLUNAS.items():
+            with open(self._caminho(f'{nome}.bin'), 'ab') as f: f.write(np.ascontiguousarray(novas[nome], dtype=dtype).tobytes())
+        self.meta['linhas'] += len(ids); self.meta['ultimo_id'] = int(ids[-1])
+        self._gravar_meta()
+        return len(ids)
+
+    def sincronizar(self, conn, tamanho_lote=TAMANHO_LOTE_EXTRACAO):
+        # Extração incremental via COPY binário: só giros com id > checkpoint, anexados em lotes.
+        migrar(conn) # o treino pode rodar antes de o monitor migrar o esquema
+        with conn.cursor() as cur:
+            cur.execute(f"SELECT COALESCE(MAX(id), 0) FROM resultados WHERE {FILTRO_MESA};", (self.mesa,)); maior_id = cur.fetchone()[0]
+        if maior_id < self.ultimo_id:
+            print(f"Checkpoint do feature store (id {self.ultimo_id}) à frente do banco (id {maior_id}); reconstruindo."); self.limpar()
+        ids, numeros = extrair_giros(conn, self.mesa, self.ultimo_id); novos = 0
+        for inicio in range(0, len(ids), tamanho_lote): novos += self.anexar(ids[inicio:inicio + tamanho_lote], numeros[inicio:inicio + tamanho_lote])
+        conn.commit()
+        return novos
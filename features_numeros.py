@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+# features_numeros.py - Features do modelo Top 5 Números, mantidas incrementalmente a cada giro
+import time
+import numpy as np
+from roleta import DUZIA
+from buffer_giros import BufferGiros
+
+SEQUENCE_LENGTH = 15
+ANALYSIS_WINDOW = 50
+LIMITE_CACHE_ENTROPIA = 50000
+
+# O modelo é treinado com DataFrame; a inferência recebe a linha já ordenada em NumPy (ordem validada contra
+# feature_names_in_ na carga). Monitor e backtest silenciam este aviso do scikit-learn uma vez, na partida.
+AVISO_SEM_NOMES = 'X does not have valid feature names'
+
+def nomes_features(sequence_length=SEQUENCE_LENGTH):
+    nomes = []
+    for i in range(1, sequence_length + 1): nomes += [f'numero_lag_{i}', f'duzia_lag_{i}']
+    return nomes + ['feature_entropy', 'feature_unique_count']
+
+def entropia_contagens(contagens):
+    # Mesma sequência de operações de entropy(Series.value_counts(normalize=True)): contagens em ordem
+    # decrescente, divididas pelo total, renormalizadas e somadas via entr. Idêntico bit a bit ao caminho
+    # pandas/scipy, sem o custo de despacho do scipy.stats.entropy.
+    from scipy.special import entr # sob demanda: o scipy pesa na partida do monitor, que só precisa dele com o modelo v3
+    ordenadas = np.sort(contagens[contagens > 0])[::-1]
+    p = ordenadas / ordenadas.sum()
+    return np.sum(entr(p / np.sum(p, axis=0, keepdims=True)), axis=0)
+
+class MotorFeaturesNumeros:
+    def __init__(self, features=None, sequence_length=SEQUENCE_LENGTH, janela=ANALYSIS_WINDOW):
+        self.sequence_length = sequence_length; self.janela = janela
+        self.historico = BufferGiros(janela)
+        self.contagens = [0] * 37
+        self.frequencias = [0] * (janela + 1) # frequencias[k] = quantos números aparecem k vezes
+        self.unicos = 0
+        self._cache_entropia = {}
+        self.definir_features(features or nomes_features(sequence_length))
+
+    def validar_features(self, features):
+        suportadas = set(nomes_features(self.sequence_length))
+        desconhecidas = [nome for nome in features if nome not in suportadas]
+        if desconhecidas: raise ValueError(f"Features não suportadas pelo motor: {desconhecidas}")
+
+    def definir_features(self, features):
+        self.validar_features(features)
+        self.features = list(features)
+        self._linha = np.zeros((1, len(self.features)), dtype=np.float64)
+        posicoes = {nome: i for i, nome in enumerate(self.features)}
+        lags = [(posicoes[f'numero_lag_{i}'], i - 1) for i in range(1, self.sequence_length + 1) if f'numero_lag_{i}' in posicoes]
+        lags_duzia = [(posicoes[f'duzia_lag_{i}'], i - 1) for i in range(1, self.sequence_length + 1) if f'duzia_lag_{i}' in posicoes]
+        self._pos_numero, self._off_numero = (np.array(v, dtype=np.intp) for v in zip(*lags)) if lags else (np.empty(0, np.intp),) * 2
+        self._pos_duzia, self._off_duzia = (np.array(v, dtype=np.intp) for v in zip(*lags_duzia)) if lags_duzia else (np.empty(0, np.intp),) * 2
+        self._pos_entropia = posicoes.get('feature_entropy'); self._pos_unicos = posicoes.get('feature_unique_count')
+
+    def _alterar_contagem(self, numero, delta):
+        numero = int(numero); anterior = self.contagens[numero]; atual = anterior + delta
+        self.contagens[numero] = atual
+        if anterior: self.frequencias[anterior] -= 1
+        if atual: self.frequencias[atual] += 1
+        self.unicos += (atual > 0) - (anterior > 0)
+
+    def atualizar(self, numero):
+        if len(self.historico) == self.janela: self._alterar_contagem(self.historico.recentes()[-1], -1)
+        self.historico.adicionar(numero); self._alterar_contagem(numero, +1)
+
+    def carregar(self, numeros_recentes):
+        # numeros_recentes do mais recente para o mais antigo
+        for numero in reversed(list(numeros_recentes)[:self.janela]): self.atualizar(numero)
+
+    def pronto(self):
+        return len(self.historico) >= self.janela
+
+    def entropia(self):
+        chave = tuple(self.frequencias)
+        valor = self._cache_entropia.get(chave)
+        if valor is None:
+            if len(self._cache_entropia) >= LIMITE_CACHE_ENTROPIA: self._cache_entropia.clear()
+            valor = self._cache_entropia[chave] = entropia_contagens(np.array(self.contagens))
+        return valor
+
+    def linha(self):
+        # Linha pré-alocada na ordem de features do modelo; reutilizada a cada chamada.
+        if not self.pronto(): return None
+        recentes = self.historico.recentes(); linha = self._linha[0]
+        linha[self._pos_numero] = recentes[self._off_numero]
+        linha[self._pos_duzia] = DUZIA[recentes[self._off_duzia]]
+        if self._pos_entropia is not None: linha[self._pos_entropia] = self.entropia()
+        if self._pos_unicos is not None: linha[self._pos_unicos] = self.unicos
+        return self._linha
+
+# --- FEATURES DE TREINO (histórico completo, vetorizado) ---
+TAMANHO_BLOCO = 65536
+
+def _agrupar_formatos(ordenadas):
+    # Equivalente a np.unique(axis=0, return_inverse=True), mas ordenando chaves uint64 com lexsort:
+    # cada linha (contagens <= 127) vira 40 bytes = 5 palavras de 64 bits.
+    linhas = len(ordenadas)
+    compactas = np.zeros((linhas, 40), dtype=np.int8); compactas[:, :ordenadas.shape[1]] = ordenadas
+    chaves = compactas.view(np.uint64)
+    ordem = np.lexsort(chaves.T[::-1])
+    ordenadas_chaves = chaves[ordem]
+    novo = np.ones(linhas, dtype=bool); novo[1:] = np.any(ordenadas_chaves[1:] != ordenadas_chaves[:-1], axis=1)
+    inverso = np.empty(linhas, dtype=np.intp); inverso[ordem] = np.cumsum(novo) - 1
+    return compactas[ordem[novo], :ordenadas.shape[1]], inverso
+
+def estatisticas_janela(numeros, janela=ANALYSIS_WINDOW, tamanho_bloco=TAMANHO_BLOCO):
+    # Para cada posição t: entropia e números únicos de numeros[t-janela:t], equivalente a
+    # shift(1).rolling(janela). Contagens por janela vêm de somas acumuladas de one-hot, em blocos; a entropia
+    # é calculada uma vez por formato de histograma (contagens ordenadas) e espalhada para as linhas.
+    numeros = np.asarray(numeros, dtype=np.intp); n = len(numeros)
+    entropias = np.full(n, np.nan); unicos = np.full(n, np.nan)
+    cache = {}
+    for inicio in range(janela, n, tamanho_bloco):
+        fim = min(inicio + tamanho_bloco, n); base = inicio - janela
+        acumulado = np.zeros((fim - base + 1, 37), dtype=np.int32)
+        np.cumsum(np.eye(37, dtype=np.int32)[numeros[base:fim]], axis=0, out=acumulado[1:])
+        contagens = acumulado[janela:fim - base + 1][:fim - inicio] - acumulado[:fim - inicio]
+        unicos[inicio:fim] = np.count_nonzero(contagens, axis=1)
+        formatos, inverso = _agrupar_formatos(np.sort(contagens, axis=1))
+        valores = np.empty(len(formatos))
+        for i, formato in enumerate(formatos):
+            chave = formato.tobytes(); valor = cache.get(chave)
+            if valor is None: valor = cache[chave] = entropia_contagens(formato)
+            valores[i] = valor
+        entropias[inicio:fim] = valores[inverso]
+    return entropias, unicos
+
+def montar_features(numeros, entropias, unicos, sequence_length=SEQUENCE_LENGTH):
+    # Matriz (n x features) na mesma ordem e com os mesmos valores (NaN onde o histórico é insuficiente)
+    # das colunas geradas com shift/rolling no pandas.
+    numeros = np.asarray(numeros, dtype=np.intp); n = len(numeros)
+    nomes = nomes_features(sequence_length)
+    matriz = np.full((n, len(nomes)), np.nan)
+    duzias = DUZIA[numeros]
+    for i in range(1, min(sequence_length, n - 1) + 1):
+        matriz[i:, 2 * (i - 1)] = numeros[:-i]; matriz[i:, 2 * (i - 1) + 1] = duzias[:-i]
+    matriz[:, -2] = entropias; matriz[:, -1] = unicos
+    return matriz, nomes
+
+def construir_features(numeros, sequence_length=SEQUENCE_LENGTH, janela=ANALYSIS_WINDOW):
+    return montar_features(numeros, *estatisticas_janela(numeros, janela), sequence_length)
+
+# --- REFERÊNCIA PANDAS (caminho original de analisar_ia_top5) ---
+def features_pandas(numeros_recentes, features, sequence_length=SEQUENCE_LENGTH, janela=ANALYSIS_WINDOW):
+    import pandas as pd
+    from scipy.stats import entropy
+    from roleta import COR_PRETO, PARIDADE_PAR
+    df = pd.DataFrame(numeros_recentes, columns=['numero'])
+    df['duzia'] = DUZIA[df['numero'].to_numpy()]
+    df['cor_preto'] = COR_PRETO[df['numero'].to_numpy()]
+    df['paridade_par'] = PARIDADE_PAR[df['numero'].to_numpy()]
+    features_dict = {}
+    for i in range(1, sequence_length + 1):
+        features_dict[f'numero_lag_{i}'] = df['numero'].iloc[i-1]
+        features_dict[f'duzia_lag_{i}'] = df['duzia'].iloc[i-1]
+    window = df['numero'].head(janela)
+    features_dict['feature_entropy'] = entropy(window.value_counts(normalize=True))
+    features_dict['feature_unique_count'] = len(window.unique())
+    return pd.DataFrame([features_dict])[features]
+
+def verificar_paridade(n_giros=3000, semente=42):
+    # Alimenta o motor giro a giro e compara cada linha com o caminho pandas; qualquer diferença de bit falha.
+    rng = np.random.default_rng(semente)
+    giros = rng.integers(0, 37, n_giros)
+    giros[n_giros // 2:n_giros // 2 + 500] = rng.integers(0, 5, 500) # trecho de baixa entropia
+    features = nomes_features(); rng.shuffle(features)
+    motor = MotorFeaturesNumeros(features)
+    tempo_motor, tempo_pandas, linhas = 0.0, 0.0, 0
+    for t, numero in enumerate(giros):
+        inicio = time.perf_counter(); motor.atualizar(numero); linha = motor.linha(); tempo_motor += time.perf_counter() - inicio
+        if linha is None: continue
+        recentes = giros[max(0, t - ANALYSIS_WINDOW + 1):t + 1][::-1]
+        inicio = time.perf_counter(); referencia = features_pandas(recentes, features).to_numpy(dtype=np.float64); tempo_pandas += time.perf_counter() - inicio
+        if not np.array_equal(linha.view(np.uint64), referencia.view(np.uint64)):
+            raise AssertionError(f"Divergência no giro {t}: {linha} != {referencia}")
+        linhas += 1
+    return linhas, tempo_motor / n_giros, tempo_pandas / linhas
+
+if __name__ == '__main__':
+    linhas, por_giro_motor, por_giro_pandas = verificar_paridade()
+    print(f"Paridade motor incremental x pandas verificada em {linhas} linhas.")
+    print(f"Custo por giro: motor {por_giro_motor * 1e6:.1f} µs | pandas {por_giro_pandas * 1e6:.1f} µs")
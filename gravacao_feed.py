@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+# gravacao_feed.py - Gravação dos payloads brutos da API de histórico, com o horário de chegada, para replay (simulacao.py)
+# Formato: JSON por linha ({"t": epoch, "url": ..., "corpo": texto da resposta}) num .gz só de acréscimo. Cada abertura
+# começa um membro gzip novo (membros concatenados formam um gzip válido) e um processo derrubado perde só o final.
+import gzip
+import json
+import zlib
+import hashlib
+import logging
+from datetime import timezone
+import relogio
+
+INTERVALO_FLUSH = 10 # segundos entre flushes do compressor (o quanto da gravação um crash pode perder)
+
+class GravadorFeed:
+    def __init__(self, caminho, intervalo_flush=INTERVALO_FLUSH):
+        self.caminho = caminho; self.intervalo_flush = intervalo_flush
+        self._arquivo = gzip.open(caminho, 'ab'); self._ultimo_flush = relogio.monotonico()
+        self._hashes = {} # por URL: mesas que leem o mesmo endpoint gravam o payload uma vez só
+        self.registros = 0
+
+    def registrar(self, url, corpo, momento=None):
+        hash_corpo = hashlib.blake2b(corpo, digest_size=16).digest()
+        if self._arquivo is None or self._hashes.get(url) == hash_corpo: return
+        self._hashes[url] = hash_corpo
+        momento = momento or relogio.agora(timezone.utc)
+        linha = json.dumps({'t': round(momento.timestamp(), 3), 'url': url, 'corpo': corpo.decode('utf-8', 'replace')}, ensure_ascii=False, separators=(',', ':'))
+        self._arquivo.write(linha.encode('utf-8') + b'\n'); self.registros += 1
+        if relogio.monotonico() - self._ultimo_flush >= self.intervalo_flush:
+            self._arquivo.flush(zlib.Z_SYNC_FLUSH); self._ultimo_flush = relogio.monotonico()
+
+    def fechar(self):
+        if self._arquivo is not None: self._arquivo.close(); self._arquivo = None
+
+def ler_gravacao(caminho):
+    # Gera os registros em ordem de gravação; um final truncado (processo derrubado no meio de um flush) é ignorado.
+    with gzip.open(caminho, 'rb') as f:
+        try:
+            for linha in f:
+                try: yield json.loads(linha)
+                except ValueError: logging.warning(f"Linha inválida na gravação {caminho}; ignorada."); continue
+        except (EOFError, gzip.BadGzipFile, zlib.error) as e: logging.warning(f"Gravação {caminho} truncada ({e}); replay até o último registro completo.")
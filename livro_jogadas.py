@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+# livro_jogadas.py - Livro de jogadas do dia de uma mesa: placar, totais e sequências mantidos a cada resultado
+# Cada jogada resolvida atualiza em O(1) o placar por estratégia, os totais por período (manhã/tarde/noite) e as
+# sequências atual/máxima; o texto do placar fica em cache até o próximo resultado. As jogadas são gravadas na tabela
+# jogadas (persistencia.GravadorJogadas), de onde o placar do dia é retomado após um reinício.
+# Uso: python livro_jogadas.py [--mesa roletabrasileira] [--dias 7]  (relatório por estratégia direto do banco)
+import os
+import argparse
+from datetime import datetime, timedelta, timezone
+from estrategias import novo_placar, registrar_resultado
+
+HORA_TARDE = 12; HORA_NOITE = 18
+PERIODOS = ('manha', 'tarde', 'noite')
+
+def periodo_do_dia(momento):
+    return 'manha' if momento.hour < HORA_TARDE else 'tarde' if momento.hour < HORA_NOITE else 'noite'
+
+class Sequencias:
+    __slots__ = ('vitorias', 'derrotas', 'max_vitorias', 'max_derrotas')
+    def __init__(self): self.vitorias = self.derrotas = self.max_vitorias = self.max_derrotas = 0
+
+    def registrar(self, resultado):
+        # Mesma contagem de estrategias.calcular_sequencias, um resultado por vez.
+        if resultado == 'win': self.vitorias += 1; self.derrotas = 0; self.max_vitorias = max(self.max_vitorias, self.vitorias)
+        else: self.derrotas += 1; self.vitorias = 0; self.max_derrotas = max(self.max_derrotas, self.derrotas)
+
+    def resumo(self): return {"max_wins": self.max_vitorias, "max_losses": self.max_derrotas}
+
+def formatar_placar(placar, titulo):
+    # placar no formato de novo_placar (o mesmo do backtest); titulo já com o rótulo da mesa, se houver.
+    messages = [titulo]; overall_wins, overall_losses = 0, 0
+    for name, score in placar.items():
+        if name == "last_check_date" or not isinstance(score, dict): continue
+        strategy_wins = score.get('wins_sg', 0) + score.get('wins_g1', 0) + score.get('wins_g2', 0); strategy_losses = score.get('losses', 0)
+        overall_wins += strategy_wins; overall_losses += strategy_losses; total_plays = strategy_wins + strategy_losses
+        accuracy = (strategy_wins / total_plays * 100) if total_plays > 0 else 0
+        wins_str = f"SG: {score.get('wins_sg', 0)} | G1: {score.get('wins_g1', 0)} | G2: {score.get('wins_g2', 0)}"
+        messages.append(f"*{name}* (Assertividade: {accuracy:.1f}%)\n`   `✅ `{wins_str}`\n`   `❌ `{strategy_losses}`")
+    total_overall_plays = overall_wins + overall_losses
+    overall_accuracy = (overall_wins / total_overall_plays * 100) if total_overall_plays > 0 else 0
+    messages.insert(1, f"📈 *Assertividade Geral: {overall_accuracy:.1f}%*")
+    return "\n\n".join(messages)
+
+class LivroJogadas:
+    def __init__(self, data):
+        self.novo_dia(data)
+
+    def novo_dia(self, data):
+        self.data = data; self.placar = novo_placar(data)
+        self.vitorias = 0; self.derrotas = 0
+        self.placar_periodo = {periodo: novo_placar(data) for periodo in PERIODOS}
+        self.sequencias = {periodo: Sequencias() for periodo in ('dia',) + PERIODOS}
+        self.sequencias_estrategia = {} # (periodo ou 'dia', estratégia) -> Sequencias
+        self._textos = {}
+
+    def registrar(self, estrategia, resultado, nivel=0, momento=None):
+        # momento no fuso das mensagens (define o período); resultado 'win' ou 'loss', nivel = gale da vitória.
+        periodo = periodo_do_dia(momento) if momento is not None else None
+        for placar in (self.placar, self.placar_periodo.get(periodo)):
+            if placar is not None: registrar_resultado(placar, estrategia, resultado, nivel)
+        if resultado == 'win': self.vitorias += 1
+        else: self.derrotas += 1
+        for chave in ('dia', periodo):
+            if chave is None: continue
+            self.sequencias[chave].registrar(resultado)
+            sequencias = self.sequencias_estrategia.get((chave, estrategia))
+            if sequencias is None: sequencias = self.sequencias_estrategia[(chave, estrategia)] = Sequencias()
+            sequencias.registrar(resultado)
+        self._textos.clear()
+
+    @property
+    def jogadas(self): return self.vitorias + self.derrotas
+
+    def sequencias_periodo(self, periodo='dia', estrategia=None):
+        if estrategia is None: return self.sequencias[periodo].resumo()
+        sequencias = self.sequencias_estrategia.get((periodo, estrategia))
+        return sequencias.resumo() if sequencias is not None else Sequencias().resumo()
+
+    def texto_placar(self, titulo, periodo=None):
+        # Remontado só quando o livro muda; sinal, gale, vitória e loss de uma jogada reaproveitam o mesmo texto.
+        texto = self._textos.get((titulo, periodo))
+        if texto is None: texto = self._textos[(titulo, periodo)] = formatar_placar(self.placar if periodo is None else self.placar_periodo[periodo], titulo)
+        return texto
+
+if __name__ == '__main__':
+    import persistencia
+    import migracoes
+    from persistencia import MESA_PADRAO
+    parser = argparse.ArgumentParser(description="Placar por estratégia a partir da tabela jogadas.")
+    parser.add_argument('--mesa', default=MESA_PADRAO, help="Nome da mesa ('' = todas)"); parser.add_argument('--dias', type=float, default=7, help="Período, em dias até agora")
+    args = parser.parse_args()
+    persistencia.inicializar_pool(os.environ.get('DATABASE_URL'))
+    with persistencia.conexao() as conn: migracoes.migrar(conn)
+    desde = datetime.now(timezone.utc) - timedelta(days=args.dias)
+    placar = novo_placar(desde.date()); placar.update(persistencia.resumo_jogadas(args.mesa or None, desde))
+    print(formatar_placar(placar, f"Placar de {args.mesa or 'todas as mesas'} nos últimos {args.dias:g} dias"))
+    persistencia.fechar_pool()
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+# mesas.py - Configuração das mesas monitoradas e o estado independente de cada uma
+# Tudo o que era global no monitor (último giro, jogada ativa, placar e jogadas do dia) vive num objeto Mesa;
+# cliente HTTP, pool do banco, bot do Telegram e modelos são compartilhados entre as mesas.
+import os
+from coletor_api import ColetorHistorico, URL_HISTORICO_PADRAO
+from persistencia import MESA_PADRAO
+from buffer_giros import BufferGiros
+from agendador_polls import AgendadorPolls
+from estrategia_online import ModeloOnline
+from livro_jogadas import LivroJogadas
+from features_numeros import MotorFeaturesNumeros
+from estrategias import NUMEROS_PARA_ANALISE, SEQUENCE_LENGTH_IA_DUZIAS, SEQUENCE_LENGTH_IA_NUMEROS, novo_estado_estrategia
+
+def ler_mesas(texto, url_padrao=URL_HISTORICO_PADRAO):
+    # Formato de MESAS: "id=url#baralho,id2=url2#baralho2" (baralho padrão '0'). Vazio = apenas a mesa original.
+    if not texto or not texto.strip(): return [(MESA_PADRAO, url_padrao, '0')]
+    mesas = []
+    for item in texto.split(','):
+        if not item.strip(): continue
+        mesa_id, _, endereco = item.strip().partition('=')
+        url, _, baralho = endereco.partition('#')
+        mesas.append((mesa_id.strip(), url.strip() or url_padrao, baralho.strip() or '0'))
+    ids = [mesa_id for mesa_id, _, _ in mesas]
+    if not all(ids) or len(set(ids)) != len(ids): raise ValueError(f"Configuração de mesas inválida (ids vazios ou repetidos): {texto}")
+    if any(len(mesa_id) > 40 for mesa_id in ids): raise ValueError("O id da mesa deve ter no máximo 40 caracteres.")
+    return mesas
+
+class Mesa:
+    def __init__(self, mesa_id, url=URL_HISTORICO_PADRAO, baralho='0', hoje=None, rotulo=''):
+        self.id = mesa_id; self.rotulo = rotulo # rotulo: prefixo das mensagens quando há mais de uma mesa
+        self.coletor = ColetorHistorico(url, baralho)
+        self.buffer_giros = BufferGiros(max(NUMEROS_PARA_ANALISE, SEQUENCE_LENGTH_IA_DUZIAS, SEQUENCE_LENGTH_IA_NUMEROS))
+        self.motor_features_numeros = MotorFeaturesNumeros(sequence_length=SEQUENCE_LENGTH_IA_NUMEROS, janela=NUMEROS_PARA_ANALISE)
+        self.modelo_online = ModeloOnline() # atualizado a cada giro; substituído pelo snapshot na inicialização
+        self.registro = None # RegistroModelos usado pela mesa (compartilhado entre mesas com os mesmos arquivos)
+        self.ultimo_numero_processado_api = None; self.numero_anterior_estrategia = None
+        self.primeira_consulta = True
+        self.agendador = AgendadorPolls() # cadência de polling aprendida com os intervalos entre giros da mesa
+        self.fila_analise = None; self.fila_notificacoes = None # criadas pelo pipeline do monitor a cada sessão
+        self.livro = LivroJogadas(hoje) # placar, totais e sequências do dia, atualizados a cada jogada resolvida
+        self.reset_daily_messages_tracker(); self.reset_strategy_state()
+
+    def reset_daily_messages_tracker(self): self.daily_messages_sent = {"tarde": False, "noite": False}
+
+    def reset_strategy_state(self): self.active_strategy_state = novo_estado_estrategia()
+
+    def carregar(self, numeros_recentes):
+        # numeros_recentes do mais recente para o mais antigo
+        self.buffer_giros.carregar(numeros_recentes); self.motor_features_numeros.carregar(self.buffer_giros.recentes())
+
+    def adicionar(self, numero):
+        self.buffer_giros.adicionar(numero); self.motor_features_numeros.atualizar(numero); self.modelo_online.atualizar(numero)
+
+    def recentes(self, limite=NUMEROS_PARA_ANALISE):
+        return self.buffer_giros.recentes(limite)
+
+def criar_mesas(texto=None, url_padrao=URL_HISTORICO_PADRAO, hoje=None):
+    configuracao = ler_mesas(texto if texto is not None else os.environ.get('MESAS'), url_padrao)
+    varias = len(configuracao) > 1
+    return [Mesa(mesa_id, url, baralho, hoje, rotulo=f"🎰 *Mesa: {mesa_id}*\n" if varias else '') for mesa_id, url, baralho in configuracao]
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+# metricas.py - Contadores e histogramas de latência em memória, expostos num endpoint HTTP local (formato Prometheus)
+# Só biblioteca padrão; observar uma latência custa um bisect e um lock.
+import os
+import time
+import asyncio
+import logging
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+
+LIMITES_LATENCIA = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0) # segundos
+HOST_PADRAO = '127.0.0.1'
+PORTA_PADRAO = 9108
+
+def memoria_residente_mb():
+    # RSS atual do processo; fora do Linux, só o pico (ru_maxrss).
+    try:
+        with open('/proc/self/statm') as f: return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except OSError:
+        import resource; return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+class Contador:
+    tipo = 'counter'
+    def __init__(self, trava): self.valor = 0; self._trava = trava
+
+    def incrementar(self, quantidade=1):
+        with self._trava: self.valor += quantidade
+
+    def amostras(self, nome, rotulos): return [(nome, rotulos, self.valor)]
+
+class Histograma:
+    tipo = 'histogram'
+    def __init__(self, trava, limites=LIMITES_LATENCIA):
+        self.limites = limites; self.contagens = [0] * (len(limites) + 1); self.soma = 0.0; self.total = 0
+        self._trava = trava
+
+    def observar(self, valor):
+        i = bisect_left(self.limites, valor)
+        with self._trava: self.contagens[i] += 1; self.soma += valor; self.total += 1
+
+    def quantil(self, q):
+        # Estimativa pelo limite superior do bucket (suficiente para logs e comparações rápidas).
+        if not self.total: return 0.0
+        alvo = q * self.total; acumulado = 0
+        for limite, contagem in zip(self.limites + (float('inf'),), self.contagens):
+            acumulado += contagem
+            if acumulado >= alvo: return limite
+        return float('inf')
+
+    def amostras(self, nome, rotulos):
+        linhas = []; acumulado = 0
+        for limite, contagem in zip(self.limites + (float('inf'),), self.contagens):
+            acumulado += contagem; le = '+Inf' if limite == float('inf') else repr(limite)
+            linhas.append((f'{nome}_bucket', rotulos + (('le', le),), acumulado))
+        return linhas + [(f'{nome}_sum', rotulos, self.soma), (f'{nome}_count', rotulos, self.total)]
+
+class Metricas:
+    def __init__(self):
+        self._trava = threading.Lock() # observações também chegam das threads de inferência
+        self._metricas = {}; self._ajudas = {}
+
+    def _obter(self, classe, nome, ajuda, rotulos):
+        chave = (nome, tuple(sorted((k, str(v)) for k, v in rotulos.items())))
+        metrica = self._metricas.get(chave)
+        if metrica is None:
+            with self._trava:
+                metrica = self._metricas.get(chave)
+                if metrica is None: metrica = self._metricas[chave] = classe(self._trava); self._ajudas.setdefault(nome, ajuda)
+        return metrica
+
+    def contador(self, nome, ajuda='', **rotulos): return self._obter(Contador, nome, ajuda, rotulos)
+
+    def histograma(self, nome, ajuda='', **rotulos): return self._obter(Histograma, nome, ajuda, rotulos)
+
+    def incrementar(self, nome, quantidade=1, **rotulos): self.contador(nome, **rotulos).incrementar(quantidade)
+
+    def observar(self, nome, valor, **rotulos): self.histograma(nome, **rotulos).observar(valor)
+
+    @contextmanager
+    def cronometrar(self, nome, **rotulos):
+        histograma = self.histograma(nome, **rotulos); inicio = time.perf_counter()
+        try: yield
+        finally: histograma.observar(time.perf_counter() - inicio)
+
+    def texto(self):
+        linhas = []; tipos_emitidos = set()
+        with self._trava: itens = sorted(self._metricas.items(), key=lambda item: item[0])
+        for (nome, rotulos), metrica in itens:
+            if nome not in tipos_emitidos:
+                tipos_emitidos.add(nome)
+                if self._ajudas.get(nome): linhas.append(f"# HELP {nome} {self._ajudas[nome]}")
+                linhas.append(f"# TYPE {nome} {metrica.tipo}")
+            for nome_amostra, rotulos_amostra, valor in metrica.amostras(nome, rotulos):
+                rotulos_txt = ','.join(f'{k}="{v}"' for k, v in rotulos_amostra)
+                linhas.append(f"{nome_amostra}{{{rotulos_txt}}} {valor}" if rotulos_txt else f"{nome_amostra} {valor}")
+        linhas += ["# TYPE processo_memoria_residente_bytes gauge", f"processo_memoria_residente_bytes {int(memoria_residente_mb() * 2**20)}"]
+        return '\n'.join(linhas) + '\n'
+
+    async def _atender(self, leitor, escritor):
+        try:
+            requisicao = await asyncio.wait_for(leitor.readline(), 5)
+            while (await asyncio.wait_for(leitor.readline(), 5)) not in (b'\r\n', b'\n', b''): pass
+            partes = requisicao.decode('latin-1').split()
+            if len(partes) >= 2 and partes[0] == 'GET' and partes[1].split('?')[0] in ('/metrics', '/'):
+                corpo = self.texto().encode(); status = '200 OK'
+            else: corpo = b'nao encontrado\n'; status = '404 Not Found'
+            escritor.write(f"HTTP/1.1 {status}\r\nContent-Type: text/plain; version=0.0.4; charset=utf-8\r\nContent-Length: {len(corpo)}\r\nConnection: close\r\n\r\n".encode() + corpo)
+            await escritor.drain()
+        except Exception as e: logging.debug(f"Erro ao atender requisição de métricas: {e}")
+        finally: escritor.close()
+
+    async def servir(self, host=HOST_PADRAO, porta=PORTA_PADRAO):
+        servidor = await asyncio.start_server(self._atender, host, porta)
+        logging.info(f"📈 Métricas disponíveis em http://{host}:{porta}/metrics")
+        return servidor
+
+metricas = Metricas() # instância única do processo
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+# migracoes.py - Migrações versionadas do esquema do PostgreSQL (tabela schema_versao)
+# Todas as pendentes rodam numa única transação sob advisory lock: monitor e treinos podem chamar migrar() ao mesmo tempo.
+import logging
+from persistencia import MESA_PADRAO
+from roleta import VERMELHOS
+
+TRAVA_MIGRACOES = 7261018 # chave do pg_advisory_xact_lock
+
+_VERMELHOS_SQL = ', '.join(map(str, VERMELHOS))
+
+MIGRACOES = [
+    (1, "tabela resultados original com a coluna table_id", [
+        "CREATE TABLE IF NOT EXISTS resultados (id SERIAL PRIMARY KEY, numero INTEGER, cor VARCHAR(10), duzia INTEGER, coluna INTEGER, paridade VARCHAR(10), timestamp TIMESTAMPTZ DEFAULT NOW());",
+        # Coluna com default constante: no PostgreSQL 11+ o ALTER não reescreve a tabela.
+        f"ALTER TABLE resultados ADD COLUMN IF NOT EXISTS table_id VARCHAR(40) NOT NULL DEFAULT '{MESA_PADRAO}';",
+        "CREATE INDEX IF NOT EXISTS idx_resultados_mesa_id ON resultados (table_id, id);",
+    ]),
+    (2, "esquema compacto: mesas com chave smallint, numero smallint e colunas derivadas numa view", [
+        "CREATE TABLE mesas (id SMALLSERIAL PRIMARY KEY, nome VARCHAR(40) NOT NULL UNIQUE);",
+        f"INSERT INTO mesas (nome) SELECT table_id FROM resultados UNION SELECT '{MESA_PADRAO}' ORDER BY 1;",
+        # Colunas em ordem de alinhamento (8, 4, 2, 2 bytes): 16 bytes de dados por linha, sem preenchimento.
+        """CREATE TABLE resultados_compacta (
+            timestamp TIMESTAMPTZ NOT NULL DEFAULT NOW(), id INTEGER NOT NULL,
+            mesa_id SMALLINT NOT NULL REFERENCES mesas (id), numero SMALLINT NOT NULL CHECK (numero BETWEEN 0 AND 36));""",
+        """INSERT INTO resultados_compacta (timestamp, id, mesa_id, numero)
+            SELECT COALESCE(r.timestamp, NOW()), r.id, m.id, r.numero FROM resultados r JOIN mesas m ON m.nome = r.table_id
+            WHERE r.numero IS NOT NULL ORDER BY r.id;""",
+        # A sequência do SERIAL passa para a tabela nova antes do DROP, mantendo os ids (checkpoint do feature store).
+        "ALTER SEQUENCE resultados_id_seq OWNED BY resultados_compacta.id;",
+        "ALTER TABLE resultados_compacta ALTER COLUMN id SET DEFAULT nextval('resultados_id_seq');",
+        "DROP TABLE resultados;",
+        "ALTER TABLE resultados_compacta RENAME TO resultados;",
+        "ALTER TABLE resultados ADD CONSTRAINT resultados_pkey PRIMARY KEY (id);",
+        "CREATE INDEX idx_resultados_mesa_id ON resultados (mesa_id, id);",
+        # Giros chegam em ordem de horário: um BRIN ocupa poucas páginas e basta para consultas por período.
+        "CREATE INDEX idx_resultados_timestamp ON resultados USING BRIN (timestamp);",
+        f"""CREATE VIEW resultados_detalhados AS
+            SELECT r.id, m.nome AS table_id, r.numero,
+                CASE WHEN r.numero = 0 THEN 'Verde' WHEN r.numero IN ({_VERMELHOS_SQL}) THEN 'Vermelho' ELSE 'Preto' END AS cor,
+                CASE WHEN r.numero = 0 THEN 0 ELSE (r.numero - 1) / 12 + 1 END AS duzia,
+                CASE WHEN r.numero = 0 THEN 0 ELSE (r.numero - 1) % 3 + 1 END AS coluna,
+                CASE WHEN r.numero = 0 THEN 'N/A' WHEN r.numero % 2 = 0 THEN 'Par' ELSE 'Ímpar' END AS paridade,
+                r.timestamp
+            FROM resultados r JOIN mesas m ON m.id = r.mesa_id;""",
+    ]),
+    (3, "tabela jogadas: uma linha por jogada resolvida, para placar e relatórios por período e estratégia", [
+        # gatilho é texto (dúzia ou a lista do Top 5); confianca guarda o trigger_info (confiança ou atraso).
+        """CREATE TABLE jogadas (
+            momento TIMESTAMPTZ NOT NULL, id SERIAL PRIMARY KEY, confianca REAL,
+            mesa_id SMALLINT NOT NULL REFERENCES mesas (id), gale SMALLINT NOT NULL, numero SMALLINT, vitoria BOOLEAN NOT NULL,
+            estrategia VARCHAR(40) NOT NULL, gatilho VARCHAR(40));""",
+        # Placar de um período sai só do índice (index-only scan), sem visitar a tabela.
+        "CREATE INDEX idx_jogadas_mesa_momento ON jogadas (mesa_id, momento) INCLUDE (estrategia, vitoria, gale);",
+    ]),
+]
+VERSAO_ESQUEMA = MIGRACOES[-1][0]
+
+def migrar(conn):
+    # Aplica as migrações pendentes e retorna a versão final do esquema.
+    with conn.cursor() as cur:
+        cur.execute("SELECT pg_advisory_xact_lock(%s);", (TRAVA_MIGRACOES,))
+        cur.execute("CREATE TABLE IF NOT EXISTS schema_versao (versao INTEGER PRIMARY KEY, descricao TEXT NOT NULL, aplicada_em TIMESTAMPTZ NOT NULL DEFAULT NOW());")
+        cur.execute("SELECT COALESCE(MAX(versao), 0) FROM schema_versao;"); atual = cur.fetchone()[0]
+        for versao, descricao, comandos in MIGRACOES:
+            if versao <= atual: continue
+            logging.info(f"Aplicando migração {versao} do banco: {descricao}.")
+            for comando in comandos: cur.execute(comando)
+            cur.execute("INSERT INTO schema_versao (versao, descricao) VALUES (%s, %s);", (versao, descricao)); atual = versao
+    conn.commit()
+    return atual
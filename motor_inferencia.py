@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+# motor_inferencia.py - Avaliação de todas as estratégias de um giro numa única chamada, fora do event loop
+# Um predict_proba por modelo (o argmax da Dúzia sai dele), seleção parcial do Top 5, cache LRU pela janela de lags
+# e timeout: se a inferência não terminar a tempo, o giro é avaliado só pelo modelo online e pelo atraso de dúzias.
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+import numpy as np
+from roleta import DUZIA
+from metricas import metricas
+from estrategias import PARAMETROS_PADRAO, SEQUENCE_LENGTH_IA_DUZIAS, analisar_atraso_duzias, selecionar_estrategia, top5_de_probabilidades
+
+TIMEOUT_INFERENCIA = 2.0 # segundos
+TAMANHO_CACHE = 512 # resultados guardados (por modelo + janela de lags)
+COLUNAS_DUZIAS = [f'duzia_lag_{i+1}' for i in range(SEQUENCE_LENGTH_IA_DUZIAS)]
+
+class CacheLRU:
+    def __init__(self, capacidade=TAMANHO_CACHE):
+        self.capacidade = capacidade; self._itens = OrderedDict()
+        self._trava = threading.Lock() # usado pelas threads do executor
+
+    def obter(self, chave):
+        with self._trava:
+            valor = self._itens.get(chave)
+            if valor is not None: self._itens.move_to_end(chave)
+            return valor
+
+    def guardar(self, chave, valor):
+        with self._trava:
+            self._itens[chave] = valor; self._itens.move_to_end(chave)
+            if len(self._itens) > self.capacidade: self._itens.popitem(last=False)
+
+    def limpar(self):
+        with self._trava: self._itens.clear()
+
+class MotorInferencia:
+    def __init__(self, executor, timeout=TIMEOUT_INFERENCIA, tamanho_cache=TAMANHO_CACHE):
+        self.executor = executor; self.timeout = timeout
+        # A chave usa id(modelo), não o objeto: o cache não mantém vivo um modelo trocado a quente. Quem troca o modelo
+        # chama cache.limpar() (RegistroModelos ao_trocar), então um id reaproveitado nunca encontra resultados antigos.
+        self.cache = CacheLRU(tamanho_cache)
+
+    def _em_cache(self, chave, calcular, modelo):
+        resultado = self.cache.obter(chave)
+        if resultado is not None: metricas.incrementar('inferencia_cache_acertos_total', modelo=modelo); return resultado
+        with metricas.cronometrar('inferencia_segundos', modelo=modelo): resultado = calcular()
+        self.cache.guardar(chave, resultado); return resultado
+
+    def prever_duzias(self, numeros_recentes, modelo):
+        if modelo is None or len(numeros_recentes) < SEQUENCE_LENGTH_IA_DUZIAS: return None, 0
+        try:
+            lags = tuple(DUZIA[numeros_recentes[:SEQUENCE_LENGTH_IA_DUZIAS]].tolist())
+            def calcular():
+                import pandas as pd # sob demanda, na thread do executor: fora da partida do monitor
+                probabilidades = modelo.predict_proba(pd.DataFrame([lags], columns=COLUNAS_DUZIAS))[0]
+                indice = int(np.argmax(probabilidades)) # o mesmo que predict(), sem percorrer as árvores de novo
+                return int(modelo.classes_[indice]), probabilidades[indice]
+            return self._em_cache(('duzias', id(modelo), lags), calcular, 'duzias')
+        except Exception as e: logging.error(f"Erro na análise com IA de Dúzias: {e}"); return None, 0
+
+    def prever_top5(self, linha_features, modelo):
+        if modelo is None or linha_features is None: return None, 0
+        try:
+            def calcular():
+                top_5, confianca = top5_de_probabilidades(modelo.predict_proba(linha_features)[0], modelo.classes_)
+                return tuple(top_5), confianca
+            top_5, confianca = self._em_cache(('top5', id(modelo), linha_features.tobytes()), calcular, 'top5')
+            return list(top_5), confianca # a seleção de estratégia acrescenta o zero à lista: nunca devolver a do cache
+        except Exception as e: logging.error(f"Erro na análise com IA v3: {e}"); return None, 0
+
+    def aquecer(self, modelo_duzias=None, modelo_numeros=None, n_features=0):
+        # Uma predição descartável por modelo, na thread de carga: imports e primeira passada pelas árvores antes do primeiro giro.
+        if modelo_duzias is not None: self.prever_duzias(np.zeros(SEQUENCE_LENGTH_IA_DUZIAS, dtype=np.intp), modelo_duzias)
+        if modelo_numeros is not None: self.prever_top5(np.zeros((1, n_features)), modelo_numeros)
+
+    def avaliar(self, numeros_recentes, linha_features, modelo_duzias, modelo_numeros, parametros=PARAMETROS_PADRAO, previsao_online=None):
+        # Executa no worker: todas as estratégias do giro, na prioridade de selecionar_estrategia.
+        # previsao_online já vem pronta do event loop (O(1), lida do estado da mesa antes do próximo giro).
+        return selecionar_estrategia(
+            lambda: self.prever_top5(linha_features, modelo_numeros),
+            (lambda: self.prever_duzias(numeros_recentes, modelo_duzias)) if modelo_duzias is not None else None,
+            lambda: analisar_atraso_duzias(numeros_recentes),
+            parametros,
+            (lambda: previsao_online) if previsao_online is not None else None,
+        )
+
+    async def avaliar_giro(self, numeros_recentes, linha_features, modelo_duzias, modelo_numeros, parametros=PARAMETROS_PADRAO, previsao_online=None):
+        # Cópias: a janela do buffer e a linha do motor de features são reutilizadas a cada giro, e um worker que
+        # estourou o timeout continua rodando depois que o próximo giro já chegou.
+        numeros_recentes = np.array(numeros_recentes); linha_features = None if linha_features is None else linha_features.copy()
+        futuro = asyncio.get_running_loop().run_in_executor(self.executor, self.avaliar, numeros_recentes, linha_features, modelo_duzias, modelo_numeros, parametros, previsao_online)
+        try: return await asyncio.wait_for(futuro, self.timeout)
+        except asyncio.TimeoutError:
+            metricas.incrementar('inferencia_timeouts_total')
+            logging.warning(f"Inferência excedeu {self.timeout:.1f}s; giro avaliado apenas pelo modelo online e pelo atraso de dúzias.")
+            return selecionar_estrategia(lambda: (None, 0), None, lambda: analisar_atraso_duzias(numeros_recentes), parametros,
+                                         (lambda: previsao_online) if previsao_online is not None else None)
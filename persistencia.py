@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+# persistencia.py - Pool de conexões PostgreSQL e gravação em lote fora do event loop
+import time
+import asyncio
+import logging
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from itertools import islice
+from urllib.parse import urlparse
+import psycopg2
+from psycopg2 import pool as pg_pool
+from psycopg2.extras import execute_values
+from metricas import metricas
+import relogio
+
+POOL_MIN_CONEXOES = 1
+POOL_MAX_CONEXOES = 4
+TAMANHO_LOTE = 500
+MAX_PENDENTES = 20000
+MAX_TENTATIVAS = 5
+ESPERA_BASE_TENTATIVA = 0.5 # segundos, dobra a cada nova tentativa
+INTERVALO_RETENTATIVA = 30 # segundos entre rodadas de retentativa quando o banco está fora
+MESA_PADRAO = 'roletabrasileira' # nome da mesa original (e dos giros gravados antes de haver mesas)
+FILTRO_MESA = "mesa_id = (SELECT id FROM mesas WHERE nome = %s)" # giros de uma mesa pelo nome (esquema em migracoes.py)
+
+_pool = None
+_database_url = None
+_ids_mesas = {} # nome -> mesas.id
+
+def inicializar_pool(database_url, minconn=POOL_MIN_CONEXOES, maxconn=POOL_MAX_CONEXOES):
+    global _pool, _database_url
+    _database_url = database_url
+    if _pool is None:
+        result = urlparse(database_url)
+        _pool = pg_pool.ThreadedConnectionPool(minconn, maxconn, database=result.path[1:], user=result.username, password=result.password, host=result.hostname, port=result.port)
+        logging.info(f"Pool PostgreSQL criado ({minconn}-{maxconn} conexões).")
+    return _pool
+
+def fechar_pool():
+    global _pool
+    if _pool is not None: _pool.closeall(); _pool = None
+
+@contextmanager
+def conexao():
+    pool = _pool if _pool is not None else inicializar_pool(_database_url)
+    conn = pool.getconn(); quebrada = False
+    try:
+        yield conn
+    except (psycopg2.OperationalError, psycopg2.InterfaceError):
+        quebrada = True; raise
+    except Exception:
+        if not conn.closed: conn.rollback()
+        raise
+    finally: pool.putconn(conn, close=quebrada or bool(conn.closed))
+
+def ids_mesas(conn, nomes):
+    # Registra as mesas ainda não vistas numa transação própria (o cache só guarda ids já commitados).
+    novas = sorted(set(nomes) - set(_ids_mesas))
+    if novas:
+        with conn.cursor() as cur:
+            execute_values(cur, "INSERT INTO mesas (nome) VALUES %s ON CONFLICT (nome) DO UPDATE SET nome = EXCLUDED.nome RETURNING nome, id;", [(nome,) for nome in novas])
+            registradas = dict(cur.fetchall())
+        conn.commit(); _ids_mesas.update(registradas)
+    return _ids_mesas
+
+def inserir_lote(linhas):
+    # linhas: [(numero, timestamp, mesa), ...]; cor, dúzia, coluna e paridade são derivadas (view resultados_detalhados).
+    with conexao() as conn:
+        ids = ids_mesas(conn, (mesa for _, _, mesa in linhas))
+        with conn.cursor() as cur:
+            execute_values(cur, "INSERT INTO resultados(numero, timestamp, mesa_id) VALUES %s;", [(numero, momento, ids[mesa]) for numero, momento, mesa in linhas], page_size=TAMANHO_LOTE)
+        conn.commit()
+
+def buscar_numeros_recentes(limite, mesa=MESA_PADRAO):
+    with conexao() as conn:
+        with conn.cursor() as cur:
+            cur.execute(f"SELECT numero FROM resultados WHERE {FILTRO_MESA} ORDER BY id DESC LIMIT %s;", (mesa, limite))
+            return [item[0] for item in cur.fetchall()]
+
+def inserir_jogadas(linhas):
+    # linhas: [(momento, mesa, estrategia, vitoria, gale, gatilho, confianca, numero), ...]
+    with conexao() as conn:
+        ids = ids_mesas(conn, (linha[1] for linha in linhas))
+        with conn.cursor() as cur:
+            execute_values(cur, "INSERT INTO jogadas (momento, mesa_id, estrategia, vitoria, gale, gatilho, confianca, numero) VALUES %s;",
+                           [(momento, ids[mesa], *resto) for momento, mesa, *resto in linhas], page_size=TAMANHO_LOTE)
+        conn.commit()
+
+def buscar_jogadas(mesa=MESA_PADRAO, desde=None):
+    # (momento, estrategia, vitoria, gale) em ordem de gravação, a partir de `desde` (índice mesa_id, momento).
+    with conexao() as conn:
+        with conn.cursor() as cur:
+            cur.execute(f"SELECT momento, estrategia, vitoria, gale FROM jogadas WHERE {FILTRO_MESA} AND momento >= %s ORDER BY momento, id;", (mesa, desde or datetime.min.replace(tzinfo=timezone.utc)))
+            return cur.fetchall()
+
+def resumo_jogadas(mesa=None, desde=None, ate=None):
+    # Placar por estratégia ({estrategia: {wins_sg, wins_g1, wins_g2, losses}}) de uma mesa (None = todas) num período.
+    filtros, parametros = [], []
+    if mesa: filtros.append(FILTRO_MESA); parametros.append(mesa)
+    if desde: filtros.append("momento >= %s"); parametros.append(desde)
+    if ate: filtros.append("momento < %s"); parametros.append(ate)
+    with conexao() as conn:
+        with conn.cursor() as cur:
+            cur.execute(f"""SELECT estrategia, COUNT(*) FILTER (WHERE vitoria AND gale = 0), COUNT(*) FILTER (WHERE vitoria AND gale = 1),
+                               COUNT(*) FILTER (WHERE vitoria AND gale = 2), COUNT(*) FILTER (WHERE NOT vitoria)
+                           FROM jogadas {'WHERE ' + ' AND '.join(filtros) if filtros else ''} GROUP BY estrategia ORDER BY estrategia;""", parametros)
+            return {estrategia: {"wins_sg": sg, "wins_g1": g1, "wins_g2": g2, "losses": perdas} for estrategia, sg, g1, g2, perdas in cur.fetchall()}
+
+def buscar_momentos_recentes(limite, mesa=MESA_PADRAO):
+    # Horários de detecção dos últimos giros (mais recente primeiro): a cadência real da mesa.
+    with conexao() as conn:
+        with conn.cursor() as cur:
+            cur.execute(f"SELECT timestamp FROM resultados WHERE {FILTRO_MESA} ORDER BY id DESC LIMIT %s;", (mesa, limite))
+            return [item[0] for item in cur.fetchall()]
+
+class GravadorResultados:
+    # Giros (numero, momento, mesa) -> resultados. Subclasses trocam a tabela (GravadorJogadas).
+    tabela = 'resultados'; itens = 'giros'
+    metrica_gravados = 'db_giros_gravados_total'; metrica_descartados = 'db_giros_descartados_total'
+
+    def __init__(self, tamanho_lote=TAMANHO_LOTE, max_pendentes=MAX_PENDENTES):
+        self.tamanho_lote = tamanho_lote
+        self.pendentes = deque(); self.max_pendentes = max_pendentes
+        self.fila = asyncio.Queue()
+        self._tarefa = None
+
+    def iniciar(self):
+        if self._tarefa is None: self._tarefa = asyncio.create_task(self._executar())
+        return self._tarefa
+
+    def enfileirar(self, numero, momento=None, mesa=MESA_PADRAO):
+        # O horário é capturado na detecção, não no commit, para que lotes atrasados mantenham a cadência real.
+        self.fila.put_nowait((numero, momento or relogio.agora(timezone.utc), mesa))
+
+    def _inserir(self, lote): inserir_lote(lote)
+
+    def _descrever(self, item): return f"giro {item[0]}"
+
+    def _registrar_gravacao(self, lote):
+        logging.info(f"{len(lote)} giro(s) salvo(s) no PostgreSQL." if len(lote) > 1 else f"Número {lote[0][0]} salvo no PostgreSQL.")
+
+    def _acumular(self, item):
+        if len(self.pendentes) >= self.max_pendentes:
+            descartado = self.pendentes.popleft(); metricas.incrementar(self.metrica_descartados)
+            logging.error(f"Buffer de gravação de {self.tabela} cheio ({self.max_pendentes}); descartando {self._descrever(descartado)} mais antigo.")
+        self.pendentes.append(item)
+
+    async def _executar(self):
+        encerrar = False
+        while not encerrar:
+            try:
+                item = await (asyncio.wait_for(self.fila.get(), INTERVALO_RETENTATIVA) if self.pendentes else self.fila.get())
+                if item is None: encerrar = True
+                else: self._acumular(item)
+            except asyncio.TimeoutError: pass
+            while not self.fila.empty():
+                item = self.fila.get_nowait()
+                if item is None: encerrar = True
+                else: self._acumular(item)
+            await self._descarregar()
+
+    async def _descarregar(self):
+        tentativa = 0
+        while self.pendentes:
+            lote = list(islice(self.pendentes, self.tamanho_lote)); inicio = time.perf_counter()
+            try: await asyncio.to_thread(self._inserir, lote)
+            except Exception as e:
+                tentativa += 1; metricas.incrementar('db_falhas_gravacao_total', tabela=self.tabela)
+                if tentativa >= MAX_TENTATIVAS:
+                    logging.error(f"Falha ao gravar lote em {self.tabela} após {tentativa} tentativas: {e}. {len(self.pendentes)} {self.itens} ficam em buffer.")
+                    return
+                logging.warning(f"Erro ao gravar lote de {len(lote)} {self.itens} (tentativa {tentativa}/{MAX_TENTATIVAS}): {e}")
+                await asyncio.sleep(ESPERA_BASE_TENTATIVA * 2 ** (tentativa - 1)); continue
+            for _ in lote: self.pendentes.popleft()
+            tentativa = 0; metricas.observar('db_gravacao_lote_segundos', time.perf_counter() - inicio, tabela=self.tabela); metricas.incrementar(self.metrica_gravados, len(lote))
+            self._registrar_gravacao(lote)
+
+    async def fechar(self):
+        # Sentinela: o laço grava o que restar e termina sem interromper um lote em andamento.
+        if self._tarefa is None: return
+        self.fila.put_nowait(None); await self._tarefa; self._tarefa = None
+
+class GravadorJogadas(GravadorResultados):
+    # Jogadas resolvidas -> jogadas, com o mesmo laço em lote e as mesmas retentativas do gravador de giros.
+    tabela = 'jogadas'; itens = 'jogadas'
+    metrica_gravados = 'db_jogadas_gravadas_total'; metrica_descartados = 'db_jogadas_descartadas_total'
+
+    def enfileirar(self, momento, mesa, estrategia, vitoria, gale, gatilho=None, confianca=None, numero=None):
+        self.fila.put_nowait((momento, mesa, estrategia, vitoria, gale, gatilho, confianca, numero))
+
+    def _inserir(self, lote): inserir_jogadas(lote)
+
+    def _descrever(self, item): return f"jogada de {item[2]}"
+
+    def _registrar_gravacao(self, lote): logging.info(f"{len(lote)} jogada(s) salva(s) no PostgreSQL.")
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+# registro_modelos.py - Registro dos modelos de IA com recarga a quente dos arquivos .pkl
+import os
+import asyncio
+import logging
+from persistencia import MESA_PADRAO
+
+INTERVALO_VERIFICACAO_MODELOS = 30 # segundos
+
+def arquivo_modelo(arquivo, mesa=MESA_PADRAO):
+    # modelo_duzias.pkl -> modelo_duzias_<mesa>.pkl; a mesa padrão usa o arquivo compartilhado.
+    if mesa == MESA_PADRAO: return arquivo
+    base, extensao = os.path.splitext(arquivo)
+    return f"{base}_{mesa}{extensao}"
+
+class EspecModelo:
+    # validar(artefato) roda na thread de carga e deve levantar exceção se o artefato for incompatível;
+    # ativar(artefato) roda no event loop, no momento da troca, para ajustar o estado que depende do modelo.
+    def __init__(self, arquivo, descricao, validar=None, ativar=None):
+        self.arquivo = arquivo; self.descricao = descricao; self.validar = validar; self.ativar = ativar
+
+class RegistroModelos:
+    def __init__(self, especificacoes, intervalo=INTERVALO_VERIFICACAO_MODELOS, ao_trocar=None):
+        # ao_trocar(), opcional, roda no event loop depois de cada modelo instalado (ex.: descartar caches de inferência).
+        self.especificacoes = especificacoes; self.intervalo = intervalo; self.ao_trocar = ao_trocar
+        self.atual = {} # snapshot imutável: substituído por inteiro a cada troca, nunca alterado
+        self._carimbos = {}; self._observados = {}; self._falhas = {}
+
+    def get(self, nome): return self.atual.get(nome)
+
+    @staticmethod
+    def _carimbo(caminho):
+        info = os.stat(caminho); return (info.st_mtime_ns, info.st_size)
+
+    def _ler(self, nome):
+        # O joblib.load com mmap_mode não ajuda aqui: a árvore do scikit-learn copia os arrays ao desserializar.
+        import joblib # importado na thread de carga, como o scikit-learn que ele traz ao desserializar
+        espec = self.especificacoes[nome]; artefato = joblib.load(espec.arquivo)
+        if espec.validar: espec.validar(artefato)
+        return artefato
+
+    def _instalar(self, nome, artefato, carimbo):
+        espec = self.especificacoes[nome]
+        if espec.ativar: espec.ativar(artefato)
+        novo = dict(self.atual); novo[nome] = artefato
+        self.atual = novo; self._carimbos[nome] = carimbo
+        if self.ao_trocar: self.ao_trocar()
+
+    def _ler_todos(self, aquecer=None):
+        # aquecer(nome, artefato), opcional, roda logo após a leitura, na mesma thread.
+        lidos = {}
+        for nome, espec in self.especificacoes.items():
+            try:
+                carimbo = self._carimbo(espec.arquivo); artefato = self._ler(nome)
+                if aquecer: aquecer(nome, artefato)
+                lidos[nome] = (artefato, carimbo)
+            except FileNotFoundError: logging.warning(f"Arquivo '{espec.arquivo}' não encontrado.")
+            except Exception as e: logging.error(f"Erro ao carregar o modelo de {espec.descricao}: {e}")
+        return lidos
+
+    def _instalar_todos(self, lidos):
+        for nome, (artefato, carimbo) in lidos.items():
+            self._instalar(nome, artefato, carimbo); logging.info(f"🧠 Modelo de IA ({self.especificacoes[nome].descricao}) carregado!")
+
+    def carregar_todos(self):
+        self._instalar_todos(self._ler_todos())
+
+    async def carregar_em_segundo_plano(self, aquecer=None):
+        # Leitura (e aquecimento) numa thread; a instalação volta ao event loop, como na recarga a quente.
+        # Até lá atual fica sem os modelos, e a seleção de estratégia segue sem eles.
+        self._instalar_todos(await asyncio.to_thread(self._ler_todos, aquecer))
+
+    async def verificar_atualizacoes(self):
+        for nome, espec in self.especificacoes.items():
+            try: carimbo = self._carimbo(espec.arquivo)
+            except FileNotFoundError: continue
+            if carimbo == self._carimbos.get(nome) or carimbo == self._falhas.get(nome): continue
+            if self._observados.get(nome) != carimbo:
+                # Só carrega depois que o arquivo ficar estável por um intervalo (evita ler um .pkl sendo escrito).
+                self._observados[nome] = carimbo; continue
+            try: artefato = await asyncio.to_thread(self._ler, nome)
+            except Exception as e:
+                self._falhas[nome] = carimbo
+                logging.error(f"Novo arquivo '{espec.arquivo}' rejeitado; mantendo o modelo atual: {e}"); continue
+            self._instalar(nome, artefato, carimbo)
+            logging.info(f"🔄 Modelo de IA ({espec.descricao}) recarregado a quente de '{espec.arquivo}'.")
+
+    async def vigiar(self):
+        while True:
+            await asyncio.sleep(self.intervalo)
+            try: await self.verificar_atualizacoes()
+            except Exception as e: logging.error(f"Erro ao verificar atualização dos modelos: {e}")
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+# relogio.py - Relógio injetável: o monitor lê a hora por aqui para que a simulação (simulacao.py) possa acelerar o tempo
+import time
+from datetime import datetime, timedelta, timezone
+
+class Relogio:
+    def monotonico(self): return time.monotonic()
+
+    def agora(self, fuso=None): return datetime.now(fuso)
+
+class RelogioAcelerado(Relogio):
+    # O tempo simulado corre `fator` vezes mais rápido que o real, a partir de `inicio` (datetime com fuso).
+    def __init__(self, fator, inicio=None):
+        self.fator = fator; self._base_real = time.monotonic()
+        self._base_data = inicio or datetime.now(timezone.utc)
+
+    def decorrido(self): return (time.monotonic() - self._base_real) * self.fator
+
+    def monotonico(self): return self._base_real + self.decorrido()
+
+    def agora(self, fuso=None):
+        momento = self._base_data + timedelta(seconds=self.decorrido())
+        return momento.astimezone(fuso) if fuso is not None else momento.astimezone().replace(tzinfo=None)
+
+atual = Relogio()
+
+def definir(relogio):
+    global atual
+    atual = relogio
+
+def monotonico(): return atual.monotonico()
+
+def agora(fuso=None): return atual.agora(fuso)
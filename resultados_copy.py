@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+# resultados_copy.py - Importação e exportação em massa da tabela resultados via COPY
+# exportar: CSV (id,mesa,numero,timestamp), opcionalmente .gz e filtrado por mesa/período (usa o índice BRIN de timestamp).
+# importar: CSV com ao menos numero,timestamp (o formato do backtest --csv também serve), para backfill de histórico.
+# extrair_giros: COPY binário de (id, numero) direto para arrays numpy, usado nas extrações de treino.
+import io
+import os
+import sys
+import gzip
+import time
+import argparse
+import numpy as np
+import persistencia
+import migracoes
+from persistencia import MESA_PADRAO, FILTRO_MESA
+
+COLUNAS_IMPORTACAO = ('id', 'mesa', 'numero', 'timestamp')
+ASSINATURA_COPY_BINARIO = b'PGCOPY\n\xff\r\n\x00'
+# Cada linha do COPY binário de (id integer, numero smallint): nº de campos, (tamanho, valor) por campo, big-endian.
+REGISTRO_ID_NUMERO = np.dtype([('campos', '>i2'), ('tamanho_id', '>i4'), ('id', '>i4'), ('tamanho_numero', '>i4'), ('numero', '>i2')])
+
+def abrir(caminho, modo):
+    if caminho == '-': return os.fdopen(os.dup((sys.stdout if 'w' in modo else sys.stdin).fileno()), modo)
+    return gzip.open(caminho, modo) if caminho.endswith('.gz') else open(caminho, modo)
+
+def extrair_giros(conn, mesa=MESA_PADRAO, depois_de_id=0):
+    # Retorna (ids, numeros) em ordem de id; sem um objeto Python por linha, como acontece com o cursor.
+    buffer = io.BytesIO()
+    with conn.cursor() as cur:
+        consulta = cur.mogrify(f"COPY (SELECT id, numero FROM resultados WHERE {FILTRO_MESA} AND id > %s ORDER BY id) TO STDOUT WITH (FORMAT binary)", (mesa, depois_de_id))
+        cur.copy_expert(consulta.decode(), buffer)
+    dados = buffer.getbuffer()
+    if bytes(dados[:11]) != ASSINATURA_COPY_BINARIO: raise ValueError("Saída do COPY binário inesperada.")
+    inicio = 19 + int.from_bytes(dados[15:19], 'big') # assinatura + flags + tamanho da extensão do cabeçalho
+    registros = np.frombuffer(dados[inicio:len(dados) - 2], dtype=REGISTRO_ID_NUMERO) # os 2 últimos bytes são o trailer (-1)
+    return registros['id'].astype(np.int64), registros['numero'].astype(np.int64)
+
+def exportar(conn, destino, mesa=None, desde=None, ate=None):
+    filtros, parametros = [], []
+    if mesa: filtros.append(f"r.{FILTRO_MESA}"); parametros.append(mesa)
+    if desde: filtros.append("r.timestamp >= %s"); parametros.append(desde)
+    if ate: filtros.append("r.timestamp < %s"); parametros.append(ate)
+    onde = f"WHERE {' AND '.join(filtros)}" if filtros else ""
+    with conn.cursor() as cur:
+        # Horário em ISO 8601 com fuso explícito, legível por datetime.fromisoformat (backtest --csv).
+        consulta = cur.mogrify(f"""COPY (SELECT r.id, m.nome AS mesa, r.numero,
+                to_char(r.timestamp AT TIME ZONE 'UTC', 'YYYY-MM-DD"T"HH24:MI:SS.US"+00:00"') AS timestamp
+            FROM resultados r JOIN mesas m ON m.id = r.mesa_id {onde} ORDER BY r.id) TO STDOUT WITH (FORMAT csv, HEADER)""", parametros)
+        with abrir(destino, 'wb') as f: cur.copy_expert(consulta.decode(), f)
+        return cur.rowcount
+
+def importar(conn, origem, mesa=MESA_PADRAO):
+    # Os giros importados recebem ids novos, em ordem de horário. Como tudo no projeto ordena por id, uma mesa só
+    # aceita giros mais novos que os que ela já tem (backfill antes da coleta ao vivo, ou numa mesa nova).
+    with abrir(origem, 'rb') as f, conn.cursor() as cur:
+        colunas = [c.strip().strip('"') for c in f.readline().decode('utf-8-sig').split(',')]
+        desconhecidas = [c for c in colunas if c not in COLUNAS_IMPORTACAO]
+        if desconhecidas or not {'numero', 'timestamp'} <= set(colunas): raise ValueError(f"Cabeçalho inválido {colunas}: use as colunas {COLUNAS_IMPORTACAO} (numero e timestamp obrigatórias).")
+        cur.execute("CREATE TEMP TABLE giros_importacao (id BIGINT, mesa VARCHAR(40), numero SMALLINT, timestamp TIMESTAMPTZ) ON COMMIT DROP;")
+        cur.copy_expert(f"COPY giros_importacao ({', '.join(colunas)}) FROM STDIN WITH (FORMAT csv)", f)
+        cur.execute("UPDATE giros_importacao SET mesa = %s WHERE mesa IS NULL OR mesa = '';", (mesa,))
+        cur.execute("INSERT INTO mesas (nome) SELECT DISTINCT mesa FROM giros_importacao ON CONFLICT (nome) DO NOTHING;")
+        cur.execute("""SELECT m.nome FROM (SELECT mesa, MIN(timestamp) AS inicio FROM giros_importacao GROUP BY mesa) g JOIN mesas m ON m.nome = g.mesa
+                       WHERE g.inicio <= (SELECT MAX(r.timestamp) FROM resultados r WHERE r.mesa_id = m.id);""")
+        conflitantes = [linha[0] for linha in cur.fetchall()]
+        if conflitantes: raise ValueError(f"Mesas {conflitantes} já têm giros no período importado (ou depois dele); importação cancelada.")
+        cur.execute("""INSERT INTO resultados (timestamp, mesa_id, numero) SELECT g.timestamp, m.id, g.numero
+                       FROM giros_importacao g JOIN mesas m ON m.nome = g.mesa ORDER BY g.timestamp, g.id NULLS LAST;""")
+        importados = cur.rowcount
+        cur.execute("ANALYZE resultados;")
+    conn.commit()
+    return importados
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Importação/exportação em massa da tabela resultados (COPY).")
+    sub = parser.add_subparsers(dest='comando', required=True)
+    p_exportar = sub.add_parser('exportar', help="Exporta giros para CSV ('-' = saída padrão; .gz comprime)")
+    p_exportar.add_argument('destino'); p_exportar.add_argument('--mesa', help="Nome da mesa (padrão: todas)")
+    p_exportar.add_argument('--desde', help="Horário inicial (ISO 8601, inclusivo)"); p_exportar.add_argument('--ate', help="Horário final (ISO 8601, exclusivo)")
+    p_importar = sub.add_parser('importar', help="Importa giros de um CSV ('-' = entrada padrão; .gz descomprime)")
+    p_importar.add_argument('origem'); p_importar.add_argument('--mesa', default=MESA_PADRAO, help="Mesa dos giros sem a coluna mesa")
+    args = parser.parse_args()
+
+    persistencia.inicializar_pool(os.environ.get('DATABASE_URL'))
+    inicio = time.perf_counter()
+    with persistencia.conexao() as conn:
+        migracoes.migrar(conn)
+        if args.comando == 'exportar': total = exportar(conn, args.destino, args.mesa, args.desde, args.ate); acao = 'exportados'
+        else: total = importar(conn, args.origem, args.mesa); acao = 'importados'
+    persistencia.fechar_pool()
+    print(f"{total} giros {acao} em {time.perf_counter() - inicio:.1f}s.", file=sys.stderr)
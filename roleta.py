@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+# roleta.py - Propriedades da roleta europeia em tabelas de consulta (compartilhadas por monitor e treinos)
+import numpy as np
+
+NUMEROS = np.arange(37)
+VERMELHOS = (1, 3, 5, 7, 9, 12, 14, 16, 18, 19, 21, 23, 25, 27, 30, 32, 34, 36)
+ORDEM_RODA = (0, 32, 15, 19, 4, 21, 2, 25, 17, 34, 6, 27, 13, 36, 11, 30, 8, 23, 10, 5, 24, 16, 33, 1, 20, 14, 31, 9, 22, 18, 29, 7, 28, 12, 35, 3, 26)
+SETORES = {
+    1: (22, 18, 29, 7, 28, 12, 35, 3, 26, 0, 32, 15, 19, 4, 21, 2, 25), # Vizinhos do Zero
+    2: (27, 13, 36, 11, 30, 8, 23, 10, 5, 24, 16, 33), # Terço do Cilindro
+    3: (1, 20, 14, 31, 9, 17, 34, 6), # Órfãos
+}
+RAIO_VIZINHOS = 2
+
+# --- TABELAS (índice = número sorteado) ---
+COR_VERMELHO = np.isin(NUMEROS, VERMELHOS).astype(np.int64)
+COR_PRETO = ((NUMEROS != 0) & (COR_VERMELHO == 0)).astype(np.int64)
+DUZIA = np.where(NUMEROS == 0, 0, (NUMEROS - 1) // 12 + 1).astype(np.int64)
+COLUNA = np.where(NUMEROS == 0, 0, (NUMEROS - 1) % 3 + 1).astype(np.int64)
+PARIDADE_PAR = ((NUMEROS != 0) & (NUMEROS % 2 == 0)).astype(np.int64)
+POSICAO_RODA = np.argsort(ORDEM_RODA).astype(np.int64)
+SETOR = np.zeros(37, dtype=np.int64)
+for _setor, _numeros in SETORES.items(): SETOR[list(_numeros)] = _setor
+VIZINHOS = np.array(ORDEM_RODA)[(POSICAO_RODA[:, None] + np.arange(-RAIO_VIZINHOS, RAIO_VIZINHOS + 1)) % 37]
+
+COR = np.array(['Verde' if n == 0 else 'Vermelho' if COR_VERMELHO[n] else 'Preto' for n in NUMEROS], dtype=object)
+PARIDADE = np.array(['N/A' if n == 0 else 'Par' if PARIDADE_PAR[n] else 'Ímpar' for n in NUMEROS], dtype=object)
+
+TABELAS = {'cor_vermelho': COR_VERMELHO, 'cor_preto': COR_PRETO, 'duzia': DUZIA, 'coluna': COLUNA, 'paridade_par': PARIDADE_PAR,
+           'posicao_roda': POSICAO_RODA, 'setor': SETOR}
+
+for _tabela in (*TABELAS.values(), VIZINHOS, COR, PARIDADE): _tabela.flags.writeable = False
+
+_PROPRIEDADES = tuple((str(COR[n]), int(DUZIA[n]), int(COLUNA[n]), str(PARIDADE[n])) for n in NUMEROS)
+
+# --- ACESSO ESCALAR ---
+def get_properties(numero):
+    return _PROPRIEDADES[numero]
+
+# --- ACESSO VETORIZADO ---
+def atributos(numeros, nomes=None):
+    indices = np.asarray(numeros, dtype=np.intp)
+    return {nome: TABELAS[nome][indices] for nome in (nomes or TABELAS)}
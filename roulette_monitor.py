@@ -2,22 +2,35 @@
 # VERSÃO COM IA APRIMORADA (FEATURES AGREGADAS)
 
 # --- IMPORTAÇÕES ---
-import os
 import time
+INICIO_PROCESSO = time.perf_counter() # antes das demais importações: entra no tempo até o primeiro poll
+import os
 import logging
 import asyncio
 import random
-from datetime import datetime, timedelta, time as dt_time
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
 import pytz
-import requests
+import numpy as np
 import telegram
 from telegram.constants import ParseMode
-import psycopg2
-from urllib.parse import urlparse
-import pandas as pd
-import joblib
-import numpy as np
-from scipy.stats import entropy
+from coletor_api import URL_HISTORICO_PADRAO, criar_cliente
+from gravacao_feed import GravadorFeed
+import persistencia
+import relogio
+import migracoes
+from persistencia import GravadorResultados, GravadorJogadas
+from livro_jogadas import HORA_TARDE, HORA_NOITE
+from registro_modelos import RegistroModelos, EspecModelo, arquivo_modelo
+from mesas import criar_mesas
+from entrega_telegram import EntregaTelegram
+from metricas import metricas, memoria_residente_mb
+from agendador_polls import MAX_AMOSTRAS
+from motor_inferencia import MotorInferencia
+from features_numeros import entropia_contagens, AVISO_SEM_NOMES
+from estrategia_online import ModeloOnline, ARQUIVO_ESTADO_ONLINE, GIROS_AQUECIMENTO_ONLINE, SALVAR_A_CADA_GIROS, ORDEM_CONTEXTO
+from estrategias import MAX_MARTINGALES, NUMEROS_PARA_ANALISE, SEQUENCE_LENGTH_IA_DUZIAS, SEQUENCE_LENGTH_IA_NUMEROS, avaliar_giro
 
 # --- CONFIGURAÇÕES ESSENCIAIS ---
 TOKEN_BOT = os.environ.get('TOKEN_BOT')
@@ -31,382 +44,434 @@ if not all([TOKEN_BOT, CHAT_IDS_STR, URL_APOSTA, DATABASE_URL]):
 
 CHAT_IDS = [chat_id.strip() for chat_id in CHAT_IDS_STR.split(',')]
 INTERVALO_VERIFICACAO_API = 5
-MAX_MARTINGALES = 2
+URL_API_HISTORICO = os.environ.get('URL_API_HISTORICO', URL_HISTORICO_PADRAO)
+# Mesas monitoradas: "id=url#baralho,id2=url2#baralho2". Sem MESAS, apenas a mesa original (URL_API_HISTORICO, baralho '0').
+MESAS = os.environ.get('MESAS')
+# Endpoint local de métricas (formato Prometheus); METRICAS_PORTA=0 desativa.
+METRICAS_HOST = os.environ.get('METRICAS_HOST', '127.0.0.1')
+METRICAS_PORTA = int(os.environ.get('METRICAS_PORTA', '9108'))
+# Grava os payloads da API (com o horário de chegada) nesse .jsonl.gz, para replay com simulacao.py.
+GRAVAR_FEED = os.environ.get('GRAVAR_FEED')
+# Início rápido: banco e buffers antes do primeiro poll, modelos de IA carregados em segundo plano (até lá, o atraso de
+# dúzias e o modelo online servem sozinhos). INICIO_RAPIDO=0 volta a carregar tudo antes de começar.
+INICIO_RAPIDO = os.environ.get('INICIO_RAPIDO', '1') != '0'
 
 # --- CONFIGURAÇÕES DE ESTRATÉGIA ---
-GATILHO_ATRASO_DUZIA = 6
-NUMEROS_PARA_ANALISE = 50
-GATILHO_CONFIANCA_IA_DUZIAS = 0.50
-GATILHO_CONFIANCA_IA_TOP5 = 0.40
-SEQUENCE_LENGTH_IA_DUZIAS = 10
-SEQUENCE_LENGTH_IA_NUMEROS = 15
+# Gatilhos e limite de martingale ficam em estrategias.py, compartilhados com o backtest.
 
 # --- CONFIGURAÇÕES DE HUMANIZAÇÃO E HORA (BLOCO RE-ADICIONADO) ---
 FUSO_HORARIO_BRASIL = pytz.timezone('America/Sao_Paulo')
 WORK_MIN_MINUTES = 3 * 60; WORK_MAX_MINUTES = 5 * 60
 BREAK_MIN_MINUTES = 25; BREAK_MAX_MINUTES = 45
-HORA_TARDE = 12; HORA_NOITE = 18
 
-# --- MODELOS DE IA ---
-MODELO_IA_DUZIAS = None
-MODELO_IA_NUMEROS = None
-MODELO_IA_NUMEROS_FEATURES = None
+# --- CONFIGURAÇÕES DO PIPELINE (ingestão -> análise -> notificação, por mesa) ---
+TAMANHO_FILA_ANALISE = 64 # cheia: o giro mais antigo ainda não analisado é descartado da análise (já foi persistido)
+TAMANHO_FILA_NOTIFICACOES = 256 # cheia: a nova notificação é descartada
+IDADE_MAXIMA_SINAL = 15 # segundos; giro analisado depois disso (ou com outro giro já na fila) não abre jogada nova
 
-# --- FUNÇÕES DE BANCO DE DADOS E PROPRIEDADES ---
-def get_db_connection():
+# --- FUNÇÕES DE BANCO DE DADOS ---
+def inicializar_db_postgres():
     try:
-        result = urlparse(DATABASE_URL); conn = psycopg2.connect(database=result.path[1:], user=result.username, password=result.password, host=result.hostname, port=result.port)
-        return conn
-    except Exception as e: logging.error(f"Erro ao conectar ao PostgreSQL: {e}"); return None
+        persistencia.inicializar_pool(DATABASE_URL)
+        with persistencia.conexao() as conn:
+            versao = migracoes.migrar(conn)
+        logging.info(f"Banco de dados e tabela 'resultados' verificados (esquema v{versao}).")
+    except Exception as e: logging.error(f"Erro ao inicializar a tabela: {e}")
 
-def inicializar_db_postgres():
-    conn = get_db_connection()
-    if conn is not None:
+gravador_resultados = GravadorResultados()
+gravador_jogadas = GravadorJogadas()
+
+def salvar_numero_postgres(mesa, numero):
+    with metricas.cronometrar('db_enfileirar_segundos'): gravador_resultados.enfileirar(numero, mesa=mesa.id)
+
+# --- MESAS ---
+# Cada mesa tem seu próprio buffer, motor de features, jogada ativa e placar; o estado antes global vive em Mesa.
+mesas = criar_mesas(MESAS, URL_API_HISTORICO, relogio.agora(FUSO_HORARIO_BRASIL).date())
+
+# O banco é apenas o log durável: a análise lê do buffer em memória de cada mesa, aquecido uma vez na inicialização.
+def aquecer_buffer_giros():
+    for mesa in mesas:
         try:
-            with conn.cursor() as cur: cur.execute('CREATE TABLE IF NOT EXISTS resultados (id SERIAL PRIMARY KEY, numero INTEGER, cor VARCHAR(10), duzia INTEGER, coluna INTEGER, paridade VARCHAR(10), timestamp TIMESTAMPTZ DEFAULT NOW());'); conn.commit()
-            logging.info("Banco de dados e tabela 'resultados' verificados.")
-        except Exception as e: logging.error(f"Erro ao inicializar a tabela: {e}")
-        finally: conn.close()
-
-def get_properties(numero):
-    if numero == 0: return 'Verde', 0, 0, 'N/A'
-    cor = 'Vermelho' if numero in [1, 3, 5, 7, 9, 12, 14, 16, 18, 19, 21, 23, 25, 27, 30, 32, 34, 36] else 'Preto'
-    duzia = 1 if 1 <= numero <= 12 else 2 if 13 <= numero <= 24 else 3
-    coluna = 3 if numero % 3 == 0 else numero % 3
-    paridade = 'Par' if numero % 2 == 0 else 'Ímpar'
-    return cor, duzia, coluna, paridade
-
-def salvar_numero_postgres(numero):
-    cor, duzia, coluna, paridade = get_properties(numero)
-    sql = "INSERT INTO resultados(numero, cor, duzia, coluna, paridade) VALUES(%s, %s, %s, %s, %s);"
-    conn = get_db_connection()
-    if conn is not None:
+            mesa.carregar(persistencia.buscar_numeros_recentes(mesa.buffer_giros.capacidade, mesa.id))
+            logging.info(f"Buffer de giros da mesa '{mesa.id}' aquecido com {len(mesa.buffer_giros)} números do PostgreSQL.")
+        except Exception as e: logging.error(f"Erro ao aquecer o buffer de giros da mesa '{mesa.id}': {e}")
         try:
-            with conn.cursor() as cur: cur.execute(sql, (numero, cor, duzia, coluna, paridade)); conn.commit()
-            logging.info(f"Número {numero} salvo no PostgreSQL.")
-        except Exception as e: logging.error(f"Erro ao salvar número no DB: {e}")
-        finally: conn.close()
-
-def buscar_numeros_recentes_para_analise(limite=NUMEROS_PARA_ANALISE):
-    conn = get_db_connection()
-    if conn is None: return []
+            mesa.agendador.carregar_historico(persistencia.buscar_momentos_recentes(MAX_AMOSTRAS + 1, mesa.id))
+            logging.info(f"Agendador da mesa '{mesa.id}' com {len(mesa.agendador.intervalos)} intervalos entre giros do histórico.")
+        except Exception as e: logging.error(f"Erro ao carregar a cadência de giros da mesa '{mesa.id}': {e}")
+        aquecer_modelo_online(mesa)
+        aquecer_livro_jogadas(mesa)
+
+# Placar do dia retomado da tabela jogadas: um reinício não zera o placar nem as sequências.
+def aquecer_livro_jogadas(mesa):
+    agora = relogio.agora(FUSO_HORARIO_BRASIL)
     try:
-        with conn.cursor() as cur:
-            cur.execute("SELECT numero FROM resultados ORDER BY id DESC LIMIT %s;", (limite,))
-            return [item[0] for item in cur.fetchall()]
-    except Exception as e: logging.error(f"Erro ao buscar números recentes: {e}"); return []
-    finally: conn.close()
-    
-# --- FUNÇÕES DE MACHINE LEARNING ---
-def carregar_modelos_ia():
-    global MODELO_IA_DUZIAS, MODELO_IA_NUMEROS, MODELO_IA_NUMEROS_FEATURES
+        jogadas = persistencia.buscar_jogadas(mesa.id, agora.replace(hour=0, minute=0, second=0, microsecond=0))
+        for momento, estrategia, vitoria, gale in jogadas: mesa.livro.registrar(estrategia, 'win' if vitoria else 'loss', gale, momento.astimezone(FUSO_HORARIO_BRASIL))
+        if jogadas: logging.info(f"Placar do dia da mesa '{mesa.id}' retomado com {len(jogadas)} jogadas do PostgreSQL.")
+    except Exception as e: logging.error(f"Erro ao retomar o placar do dia da mesa '{mesa.id}': {e}")
+
+def registrar_jogada(mesa, resultado, numero):
+    # Placar, totais e sequências em memória (O(1)); a linha da tabela jogadas vai pelo gravador em lote.
+    estado = mesa.active_strategy_state; momento = relogio.agora(FUSO_HORARIO_BRASIL); gale = estado["martingale_level"] if resultado == 'win' else 0
+    mesa.livro.registrar(estado["strategy_name"], resultado, gale, momento)
+    gatilho = estado.get('trigger_number'); confianca = estado.get('trigger_info')
+    gravador_jogadas.enfileirar(momento, mesa.id, estado["strategy_name"], resultado == 'win', estado["martingale_level"], None if gatilho is None else str(gatilho)[:40],
+                                float(confianca) if isinstance(confianca, (int, float)) else None, numero)
+
+# Modelo online: o snapshot .npz permite retomar o estado sem reler o histórico; sem snapshot, aquece pelo banco.
+def aquecer_modelo_online(mesa):
+    modelo = ModeloOnline.carregar(arquivo_modelo(ARQUIVO_ESTADO_ONLINE, mesa.id))
+    if modelo is not None:
+        modelo.definir_contexto(mesa.recentes(ORDEM_CONTEXTO)); mesa.modelo_online = modelo
+        logging.info(f"Modelo online da mesa '{mesa.id}' retomado do snapshot ({modelo.giros} giros).")
+        return
     try:
-        MODELO_IA_DUZIAS = joblib.load('modelo_duzias.pkl')
-        logging.info("🧠 Modelo de IA (Dúzias) carregado!")
-    except FileNotFoundError:
-        logging.warning("Arquivo 'modelo_duzias.pkl' não encontrado.")
-    except Exception as e:
-        logging.error(f"Erro ao carregar o modelo de Dúzias: {e}")
+        mesa.modelo_online.treinar(reversed(persistencia.buscar_numeros_recentes(GIROS_AQUECIMENTO_ONLINE, mesa.id)))
+        logging.info(f"Modelo online da mesa '{mesa.id}' aquecido com {mesa.modelo_online.giros} giros do PostgreSQL.")
+    except Exception as e: logging.error(f"Erro ao aquecer o modelo online da mesa '{mesa.id}': {e}")
 
-    try:
-        data = joblib.load('modelo_numeros.pkl')
-        MODELO_IA_NUMEROS = data['model']
-        MODELO_IA_NUMEROS_FEATURES = data['features']
-        logging.info("🧠 Modelo de IA (Números v3) e features carregados!")
-    except FileNotFoundError:
-        logging.warning("Arquivo 'modelo_numeros.pkl' não encontrado.")
-    except Exception as e:
-        logging.error(f"Erro ao carregar o modelo de Números: {e}")
-
-def analisar_ia_duzias(numeros_recentes):
-    if MODELO_IA_DUZIAS is None or len(numeros_recentes) < SEQUENCE_LENGTH_IA_DUZIAS: return None, 0
-    try:
-        dados_sequencia = numeros_recentes[:SEQUENCE_LENGTH_IA_DUZIAS]
-        features_dict = {}
-        for i, numero in enumerate(dados_sequencia):
-            _, duzia, _, _ = get_properties(numero)
-            features_dict[f'duzia_lag_{i+1}'] = duzia
-        df_features = pd.DataFrame([features_dict])
-        predicao = MODELO_IA_DUZIAS.predict(df_features)[0]
-        probabilidades = MODELO_IA_DUZIAS.predict_proba(df_features)[0]
-        indice_predicao = list(MODELO_IA_DUZIAS.classes_).index(predicao)
-        confianca = probabilidades[indice_predicao]
-        return int(predicao), confianca
-    except Exception as e: logging.error(f"Erro na análise com IA de Dúzias: {e}"); return None, 0
-
-def analisar_ia_top5(numeros_recentes):
-    if MODELO_IA_NUMEROS is None or len(numeros_recentes) < NUMEROS_PARA_ANALISE: return None, 0
-    try:
-        df = pd.DataFrame(numeros_recentes, columns=['numero'])
-        df['duzia'] = df['numero'].apply(lambda x: get_properties(x)[1])
-        df['cor_preto'] = df['numero'].apply(lambda x: 1 if get_properties(x)[0] == 'Preto' else 0)
-        df['paridade_par'] = df['numero'].apply(lambda x: 1 if get_properties(x)[3] == 'Par' else 0)
-        
-        features_dict = {}
-        for i in range(1, SEQUENCE_LENGTH_IA_NUMEROS + 1):
-            features_dict[f'numero_lag_{i}'] = df['numero'].iloc[i-1]
-            features_dict[f'duzia_lag_{i}'] = df['duzia'].iloc[i-1]
-        
-        window = df['numero'].head(NUMEROS_PARA_ANALISE)
-        features_dict['feature_entropy'] = entropy(window.value_counts(normalize=True))
-        features_dict['feature_unique_count'] = len(window.unique())
-        
-        df_features = pd.DataFrame([features_dict])
-        df_features = df_features[MODELO_IA_NUMEROS_FEATURES]
-
-        probabilidades = MODELO_IA_NUMEROS.predict_proba(df_features)[0]
-        classes = MODELO_IA_NUMEROS.classes_
-        prob_map = {classes[i]: probabilidades[i] for i in range(len(classes))}
-        top_5_numeros = sorted(prob_map, key=prob_map.get, reverse=True)[:5]
-        confianca_somada = sum(prob_map[num] for num in top_5_numeros)
-        return top_5_numeros, confianca_somada
-    except Exception as e:
-        logging.error(f"Erro na análise com IA v3: {e}")
-        return None, 0
-
-# --- LÓGICA DAS ESTRATÉGIAS ---
-DUZIAS = { 1: list(range(1, 13)), 2: list(range(13, 25)), 3: list(range(25, 37)) }
+def salvar_modelo_online(mesa):
+    try: mesa.modelo_online.salvar(arquivo_modelo(ARQUIVO_ESTADO_ONLINE, mesa.id))
+    except Exception as e: logging.error(f"Erro ao salvar o snapshot do modelo online da mesa '{mesa.id}': {e}")
 
-# --- LÓGICA DO BOT ---
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-ultimo_numero_processado_api, numero_anterior_estrategia, daily_play_history, daily_messages_sent, active_strategy_state = None, None, [], {}, {}
+# Inferência (features + predict_proba) fora do event loop; o scikit-learn libera o GIL na predição das árvores.
+executor_inferencia = ThreadPoolExecutor(max_workers=min(4, len(mesas)), thread_name_prefix='inferencia')
+motor_inferencia = MotorInferencia(executor_inferencia)
+
+def buscar_numeros_recentes_para_analise(mesa, limite=NUMEROS_PARA_ANALISE):
+    with metricas.cronometrar('janela_analise_segundos'): return mesa.recentes(limite)
 
-def reset_daily_messages_tracker(): global daily_messages_sent; daily_messages_sent = {"tarde": False, "noite": False}
+# --- FUNÇÕES DE MACHINE LEARNING ---
+def validar_modelo_duzias(modelo):
+    esperadas = [f'duzia_lag_{i+1}' for i in range(SEQUENCE_LENGTH_IA_DUZIAS)]
+    if list(getattr(modelo, 'feature_names_in_', esperadas)) != esperadas: raise ValueError(f"Features do modelo de Dúzias incompatíveis: {list(modelo.feature_names_in_)}")
+
+def validar_modelo_numeros(data):
+    mesas[0].motor_features_numeros.validar_features(data['features'])
+    if list(getattr(data['model'], 'feature_names_in_', data['features'])) != list(data['features']): raise ValueError("Lista de features não corresponde ao modelo de Números.")
+
+def criar_registros_modelos():
+    # Mesas sem arquivos próprios (modelo_*_<mesa>.pkl) compartilham o mesmo registro, e portanto os mesmos modelos em memória.
+    registros = {}
+    for mesa in mesas:
+        arquivos = tuple(arquivo_modelo(base, mesa.id) if os.path.exists(arquivo_modelo(base, mesa.id)) else base for base in ('modelo_duzias.pkl', 'modelo_numeros.pkl'))
+        if arquivos not in registros:
+            grupo = []
+            def ativar_numeros(data, grupo=grupo):
+                for m in grupo: m.motor_features_numeros.definir_features(data['features'])
+            sufixo = "" if arquivos == ('modelo_duzias.pkl', 'modelo_numeros.pkl') else f" - mesa {mesa.id}"
+            registros[arquivos] = (RegistroModelos({
+                'duzias': EspecModelo(arquivos[0], f"Dúzias{sufixo}", validar=validar_modelo_duzias),
+                'numeros': EspecModelo(arquivos[1], f"Números v3{sufixo}", validar=validar_modelo_numeros, ativar=ativar_numeros),
+            }, ao_trocar=motor_inferencia.cache.limpar), grupo)
+        registro, grupo = registros[arquivos]
+        grupo.append(mesa); mesa.registro = registro
+    return [registro for registro, _ in registros.values()]
+
+registros_modelos = criar_registros_modelos()
+
+def carregar_modelos_ia():
+    for registro in registros_modelos: registro.carregar_todos()
 
-def initialize_score():
-    score = {"last_check_date": datetime.now(FUSO_HORARIO_BRASIL).date()}
-    all_strategies = ["Estratégia Atraso de Dúzias", "Estratégia IA Dúzias", "Estratégia IA Top 5 Números"]
-    for name in all_strategies: score[name] = {"wins_sg": 0, "wins_g1": 0, "wins_g2": 0, "losses": 0}
-    return score
-daily_score = initialize_score()
+def aquecer_modelo(nome, artefato):
+    # Na thread de carga: a primeira predição (imports de pandas/scipy, primeira passada pelas árvores) fica fora do giro.
+    if nome == 'duzias': motor_inferencia.aquecer(modelo_duzias=artefato)
+    else: entropia_contagens(np.ones(37)); motor_inferencia.aquecer(modelo_numeros=artefato['model'], n_features=len(artefato['features']))
 
-def reset_strategy_state():
-    global active_strategy_state
-    active_strategy_state = { "active": False, "strategy_name": "", "martingale_level": 0, "winning_numbers": [], "trigger_number": None, "play_message_ids": {}, "trigger_info": "" }
-reset_daily_messages_tracker(); reset_strategy_state()
+async def carregar_modelos_em_segundo_plano(registro):
+    # A vigia da recarga a quente só começa com os modelos já instalados (senão leria os mesmos arquivos de novo).
+    await registro.carregar_em_segundo_plano(aquecer_modelo)
+    logging.info(f"🧠 Modelos de IA prontos {time.perf_counter() - INICIO_PROCESSO:.1f}s após o início (memória residente {memoria_residente_mb():.0f} MB).")
+    await registro.vigiar()
 
-def buscar_ultimo_numero_api():
-    global ultimo_numero_processado_api, numero_anterior_estrategia
+# --- LÓGICA DO BOT ---
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+# Instalado uma vez, antes de qualquer thread de inferência: a linha do Top 5 vai em NumPy (ver features_numeros).
+warnings.filterwarnings('ignore', message=AVISO_SEM_NOMES, category=UserWarning)
+primeiro_poll_em = None # segundos do início do processo até o primeiro poll concluído
+
+def registrar_primeiro_poll():
+    global primeiro_poll_em
+    if primeiro_poll_em is not None: return
+    primeiro_poll_em = time.perf_counter() - INICIO_PROCESSO; metricas.observar('inicio_ate_primeiro_poll_segundos', primeiro_poll_em)
+    logging.info(f"⏱️ Primeiro poll da API {primeiro_poll_em:.2f}s após o início do processo (memória residente {memoria_residente_mb():.0f} MB).")
+
+async def buscar_ultimo_numero_api(mesa):
+    metricas.incrementar('polls_total', mesa=mesa.id)
     try:
-        cache_buster = int(time.time() * 1000); url = f"https://api.jogosvirtual.com/jsons/historico_roletabrasileira.json?_={cache_buster}"
-        response = requests.get(url, timeout=10); response.raise_for_status(); dados = response.json()
-        lista_de_numeros = dados.get('baralhos', {}).get('0', [])
-        if not lista_de_numeros: return None, None
-        valor_bruto = lista_de_numeros[-1]
-        if valor_bruto is None: return None, None
-        try: novo_numero = int(valor_bruto)
-        except (ValueError, TypeError): return None, None
-        if novo_numero != ultimo_numero_processado_api:
-            logging.info(f"✅ Novo giro detectado via API: {novo_numero} (Anterior: {ultimo_numero_processado_api})")
-            numero_anterior_estrategia = ultimo_numero_processado_api; ultimo_numero_processado_api = novo_numero
-            return novo_numero, numero_anterior_estrategia
-        return None, None
-    except Exception as e: logging.error(f"Erro em buscar_ultimo_numero_api: {e}"); return None, None
-
-async def processar_numero(bot, numero, numero_anterior):
+        with metricas.cronometrar('api_poll_segundos', mesa=mesa.id): novos_numeros = await mesa.coletor.buscar_novos()
+    except Exception as e: metricas.incrementar('polls_erro_total', mesa=mesa.id); logging.error(f"Erro em buscar_ultimo_numero_api ({mesa.id}): {e}"); return []
+    if mesa.coletor.ultima_leitura in ('nao_modificado', 'corpo_repetido'): metricas.incrementar('polls_sem_mudanca_total', mesa=mesa.id)
+    elif mesa.coletor.ultima_leitura == 'desalinhado': metricas.incrementar('leituras_sem_sobreposicao_total', mesa=mesa.id) # possíveis giros perdidos
+    if novos_numeros: metricas.incrementar('giros_detectados_total', len(novos_numeros), mesa=mesa.id)
+    giros = []
+    for novo_numero in novos_numeros:
+        logging.info(f"✅ Novo giro detectado via API [{mesa.id}]: {novo_numero} (Anterior: {mesa.ultimo_numero_processado_api})")
+        mesa.numero_anterior_estrategia = mesa.ultimo_numero_processado_api; mesa.ultimo_numero_processado_api = novo_numero
+        giros.append((novo_numero, mesa.numero_anterior_estrategia))
+    return giros
+
+async def processar_numero(bot, mesa, numero, numero_anterior, novos_sinais=True, detectado_em=None):
+    # Roda na etapa de análise (o giro já foi persistido na ingestão); mensagens só são enfileiradas para a notificação.
     if numero is None: return
-    salvar_numero_postgres(numero)
-    await check_and_reset_daily_score(bot)
-    if active_strategy_state["active"]: await handle_active_strategy(bot, numero)
-    else: await check_for_new_triggers(bot, numero, numero_anterior)
-
-def analisar_atraso_duzias(numeros_recentes):
-    if len(numeros_recentes) < GATILHO_ATRASO_DUZIA: return None, 0
-    atrasos = {1: -1, 2: -1, 3: -1}
-    for i, numero in enumerate(numeros_recentes):
-        _, duzia, _, _ = get_properties(numero)
-        if duzia in atrasos and atrasos[duzia] == -1: atrasos[duzia] = i
-        if all(v != -1 for v in atrasos.values()): break
-    for duzia in atrasos:
-        if atrasos[duzia] == -1: atrasos[duzia] = len(numeros_recentes)
-    duzia_atrasada = max(atrasos, key=atrasos.get)
-    return duzia_atrasada, atrasos[duzia_atrasada]
-
-def format_score_message(title="📊 *Placar do Dia* 📊"):
-    messages = [title]; overall_wins, overall_losses = 0, 0
-    for name, score in daily_score.items():
-        if name == "last_check_date" or not isinstance(score, dict): continue
-        strategy_wins = score.get('wins_sg', 0) + score.get('wins_g1', 0) + score.get('wins_g2', 0); strategy_losses = score.get('losses', 0)
-        overall_wins += strategy_wins; overall_losses += strategy_losses; total_plays = strategy_wins + strategy_losses
-        accuracy = (strategy_wins / total_plays * 100) if total_plays > 0 else 0
-        wins_str = f"SG: {score.get('wins_sg', 0)} | G1: {score.get('wins_g1', 0)} | G2: {score.get('wins_g2', 0)}"
-        messages.append(f"*{name}* (Assertividade: {accuracy:.1f}%)\n`   `✅ `{wins_str}`\n`   `❌ `{strategy_losses}`")
-    total_overall_plays = overall_wins + overall_losses
-    overall_accuracy = (overall_wins / total_overall_plays * 100) if total_overall_plays > 0 else 0
-    messages.insert(1, f"📈 *Assertividade Geral: {overall_accuracy:.1f}%*")
-    return "\n\n".join(messages)
+    mesa.adicionar(numero)
+    if mesa.modelo_online.giros % SALVAR_A_CADA_GIROS == 0: salvar_modelo_online(mesa)
+    check_and_reset_daily_score(bot, mesa)
+    if mesa.active_strategy_state["active"]: handle_active_strategy(bot, mesa, numero)
+    elif novos_sinais: await check_for_new_triggers(bot, mesa, numero, numero_anterior, detectado_em)
+
+def format_score_message(mesa, title="📊 *Placar do Dia* 📊"):
+    # Em cache no livro de jogadas: sinal, gales e resultado de uma jogada não remontam o placar.
+    return mesa.livro.texto_placar(mesa.rotulo + title)
+
+# Envios vão para todos os chats em paralelo, com limite de taxa e retentativa em flood control (entrega_telegram.py).
+entrega_telegram = None
+
+def obter_entrega(bot):
+    global entrega_telegram
+    if entrega_telegram is None or entrega_telegram.bot is not bot: entrega_telegram = EntregaTelegram(bot, CHAT_IDS)
+    return entrega_telegram
 
 async def send_message_to_all(bot, text, **kwargs):
-    for chat_id in CHAT_IDS:
-        try: await bot.send_message(chat_id=chat_id, text=text, **kwargs)
-        except Exception as e: logging.error(f"Erro ao enviar mensagem para {chat_id}: {e}")
-
-async def send_and_track_play_message(bot, text, **kwargs):
-    sent_messages = {}
-    for chat_id in CHAT_IDS:
-        try: message = await bot.send_message(chat_id=chat_id, text=text, **kwargs); sent_messages[chat_id] = message
-        except Exception as e: logging.error(f"Erro ao enviar mensagem para {chat_id}: {e}")
-    for chat_id, message in sent_messages.items(): active_strategy_state["play_message_ids"][chat_id] = message.message_id
-
-async def edit_play_messages(bot, new_text, **kwargs):
-    for chat_id, message_id in active_strategy_state["play_message_ids"].items():
-        try: await bot.edit_message_text(chat_id=chat_id, message_id=message_id, text=new_text, **kwargs)
-        except Exception as e: logging.warning(f"Não foi possível editar msg {message_id} do chat {chat_id}: {e}")
-
-async def check_and_reset_daily_score(bot):
-    global daily_score, daily_play_history
-    today_br = datetime.now(FUSO_HORARIO_BRASIL).date()
-    if daily_score.get("last_check_date") != today_br:
-        logging.info("Novo dia detectado! Enviando relatório e resetando placar.")
-        yesterday_str = daily_score.get("last_check_date", "dia anterior").strftime('%d/%m/%Y'); final_scores = format_score_message(title=f"📈 *Relatório Final do Dia {yesterday_str}* 📈")
-        streaks = calculate_streaks_for_period(dt_time.min, dt_time.max); streak_report = f"\n\n*Resumo do Dia:*\nSequência Máx. de Vitórias: *{streaks['max_wins']}* ✅\nSequência Máx. de Derrotas: *{streaks['max_losses']}* ❌"
-        await send_message_to_all(bot, final_scores + streak_report, parse_mode=ParseMode.MARKDOWN)
-        daily_score = initialize_score(); daily_play_history.clear(); reset_daily_messages_tracker()
-        await send_message_to_all(bot, "☀️ Bom dia! Um novo dia de análises está começando.")
-
-def calculate_streaks_for_period(start_time, end_time):
-    plays_in_period = [p['result'] for p in daily_play_history if start_time <= p['time'].time() < end_time]
-    if not plays_in_period: return {"max_wins": 0, "max_losses": 0}
-    max_wins, current_wins, max_losses, current_losses = 0, 0, 0, 0
-    for result in plays_in_period:
-        if result == 'win': current_wins += 1; current_losses = 0
-        else: current_losses += 1; current_wins = 0
-        if current_wins > max_wins: max_wins = current_wins
-        if current_losses > max_losses: max_losses = current_losses
-    return {"max_wins": max_wins, "max_losses": max_losses}
-
-async def check_and_send_period_messages(bot):
-    global daily_messages_sent
-    now_br = datetime.now(FUSO_HORARIO_BRASIL)
-    if now_br.hour >= HORA_TARDE and not daily_messages_sent.get("tarde"):
-        logging.info("Enviando mensagem do período da tarde.")
-        partial_score = format_score_message(title="📊 *Placar Parcial (Manhã)* 📊")
-        streaks = calculate_streaks_for_period(dt_time.min, dt_time(hour=11, minute=59, second=59))
+    with metricas.cronometrar('telegram_envio_todos_segundos', tipo='aviso'): await obter_entrega(bot).enviar_todos(text, **kwargs)
+
+async def send_and_track_play_message(bot, play_message_ids, text, mesa_id=None, estrategia=None, detectado_em=None, **kwargs):
+    with metricas.cronometrar('telegram_envio_todos_segundos', tipo='sinal'): sent_messages = await obter_entrega(bot).enviar_todos(text, **kwargs)
+    for chat_id, message in sent_messages.items(): play_message_ids[chat_id] = message.message_id
+    if mesa_id is not None:
+        metricas.incrementar('sinais_enviados_total', mesa=mesa_id, estrategia=estrategia)
+        # Ponta a ponta: da detecção do giro na API até o sinal entregue em todos os chats.
+        if detectado_em is not None: metricas.observar('latencia_giro_ate_sinal_segundos', relogio.monotonico() - detectado_em, mesa=mesa_id)
+
+async def edit_play_messages(bot, play_message_ids, new_text, **kwargs):
+    # Não espera a edição sair: gale/vitória/loss da mesma mensagem ainda na fila são substituídos pelo texto mais novo.
+    obter_entrega(bot).editar(play_message_ids, new_text, **kwargs)
+
+def notificar(mesa, funcao, *args, **kwargs):
+    # Entrega para a etapa de notificação da mesa, que executa na ordem de chegada (o envio de uma jogada sempre
+    # termina antes das edições dela). Nunca bloqueia a análise.
+    try: mesa.fila_notificacoes.put_nowait((funcao, args, kwargs))
+    except asyncio.QueueFull: metricas.incrementar('notificacoes_descartadas_total', mesa=mesa.id); logging.error(f"Fila de notificações da mesa '{mesa.id}' cheia; mensagem descartada ({funcao.__name__}).")
+
+def check_and_reset_daily_score(bot, mesa):
+    today_br = relogio.agora(FUSO_HORARIO_BRASIL).date()
+    if mesa.livro.data != today_br:
+        logging.info(f"Novo dia detectado na mesa '{mesa.id}'! Enviando relatório e resetando placar.")
+        yesterday_str = mesa.livro.data.strftime('%d/%m/%Y') if mesa.livro.data else "dia anterior"; final_scores = format_score_message(mesa, title=f"📈 *Relatório Final do Dia {yesterday_str}* 📈")
+        streaks = mesa.livro.sequencias_periodo('dia'); streak_report = f"\n\n*Resumo do Dia:*\nSequência Máx. de Vitórias: *{streaks['max_wins']}* ✅\nSequência Máx. de Derrotas: *{streaks['max_losses']}* ❌"
+        notificar(mesa, send_message_to_all, bot, final_scores + streak_report, parse_mode=ParseMode.MARKDOWN)
+        mesa.livro.novo_dia(today_br); mesa.reset_daily_messages_tracker()
+        notificar(mesa, send_message_to_all, bot, f"{mesa.rotulo}☀️ Bom dia! Um novo dia de análises está começando.", parse_mode=ParseMode.MARKDOWN if mesa.rotulo else None)
+
+def check_and_send_period_messages(bot, mesa):
+    now_br = relogio.agora(FUSO_HORARIO_BRASIL)
+    if now_br.hour >= HORA_TARDE and not mesa.daily_messages_sent.get("tarde"):
+        logging.info(f"Enviando mensagem do período da tarde ({mesa.id}).")
+        partial_score = format_score_message(mesa, title="📊 *Placar Parcial (Manhã)* 📊")
+        streaks = mesa.livro.sequencias_periodo('manha')
         streak_report = f"\n\nSequência Máx. de Vitórias: *{streaks['max_wins']}* ✅\nSequência Máx. de Derrotas: *{streaks['max_losses']}* ❌"
         message = f"☀️ Período da tarde iniciando!\n\nNossa parcial da **MANHÃ** foi:\n{partial_score}{streak_report}"
-        await send_message_to_all(bot, message, parse_mode=ParseMode.MARKDOWN)
-        daily_messages_sent["tarde"] = True
-    if now_br.hour >= HORA_NOITE and not daily_messages_sent.get("noite"):
-        logging.info("Enviando mensagem do período da noite.")
-        partial_score = format_score_message(title="📊 *Placar Parcial (Tarde)* 📊")
-        streaks = calculate_streaks_for_period(dt_time(hour=12), dt_time(hour=17, minute=59, second=59))
+        notificar(mesa, send_message_to_all, bot, message, parse_mode=ParseMode.MARKDOWN)
+        mesa.daily_messages_sent["tarde"] = True
+    if now_br.hour >= HORA_NOITE and not mesa.daily_messages_sent.get("noite"):
+        logging.info(f"Enviando mensagem do período da noite ({mesa.id}).")
+        partial_score = format_score_message(mesa, title="📊 *Placar Parcial (Tarde)* 📊")
+        streaks = mesa.livro.sequencias_periodo('tarde')
         streak_report = f"\n\nSequência Máx. de Vitórias (Tarde): *{streaks['max_wins']}* ✅\nSequência Máx. de Derrotas (Tarde): *{streaks['max_losses']}* ❌"
         message = f"🌙 Período da noite iniciando!\n\nNossa parcial da **TARDE** foi:\n{partial_score}{streak_report}"
-        await send_message_to_all(bot, message, parse_mode=ParseMode.MARKDOWN)
-        daily_messages_sent["noite"] = True
+        notificar(mesa, send_message_to_all, bot, message, parse_mode=ParseMode.MARKDOWN)
+        mesa.daily_messages_sent["noite"] = True
 
-def build_base_signal_message():
+def build_base_signal_message(mesa):
+    active_strategy_state = mesa.active_strategy_state
     name = active_strategy_state['strategy_name']; winning_numbers = active_strategy_state['winning_numbers']; trigger_info = active_strategy_state.get('trigger_info', '')
     if name == "Estratégia Atraso de Dúzias":
-        return (f"🎯 *Gatilho Estatístico Encontrado!* 🎯\n\n🎲 *Estratégia: {name}*\n"
+        return (f"{mesa.rotulo}🎯 *Gatilho Estatístico Encontrado!* 🎯\n\n🎲 *Estratégia: {name}*\n"
                 f"📈 *Análise: Dúzia {active_strategy_state['trigger_number']} está atrasada há {trigger_info} rodadas!*\n\n"
                 f"💰 *Apostar na Dúzia {active_strategy_state['trigger_number']} e no Zero:*\n`{', '.join(map(str, sorted(winning_numbers)))}`")
     if name == "Estratégia IA Dúzias":
-        return (f"🤖 *Sinal de IA (Dúzias)!* 🤖\n\n🎲 *Estratégia: {name}*\n"
+        return (f"{mesa.rotulo}🤖 *Sinal de IA (Dúzias)!* 🤖\n\n🎲 *Estratégia: {name}*\n"
                 f"🧠 *Análise do Modelo: Dúzia {active_strategy_state['trigger_number']} com {trigger_info:.1%} de confiança!*\n\n"
                 f"💰 *Apostar na Dúzia {active_strategy_state['trigger_number']} e no Zero:*\n`{', '.join(map(str, sorted(winning_numbers)))}`")
     if name == "Estratégia IA Top 5 Números":
-        return (f"🤖 *Sinal de IA (Top 5)!* 🤖\n\n🎲 *Estratégia: {name}*\n"
+        return (f"{mesa.rotulo}🤖 *Sinal de IA (Top 5)!* 🤖\n\n🎲 *Estratégia: {name}*\n"
                 f"🧠 *Análise do Modelo: Confiança de {trigger_info:.1%} nos seguintes números!*\n\n"
                 f"💰 *Apostar em (Top 5 + Zero):*\n`{', '.join(map(str, sorted(winning_numbers)))}`")
+    if name == "Estratégia Online de Dúzias":
+        return (f"{mesa.rotulo}📡 *Sinal Online (Dúzias)!* 📡\n\n🎲 *Estratégia: {name}*\n"
+                f"📊 *Análise Recente: Dúzia {active_strategy_state['trigger_number']} saiu em {trigger_info:.1%} das vezes após as últimas dúzias!*\n\n"
+                f"💰 *Apostar na Dúzia {active_strategy_state['trigger_number']} e no Zero:*\n`{', '.join(map(str, sorted(winning_numbers)))}`")
     return ""
 
-async def handle_win(bot, final_number):
-    daily_play_history.append({'time': datetime.now(FUSO_HORARIO_BRASIL), 'result': 'win'})
+def handle_win(bot, mesa, final_number):
+    active_strategy_state = mesa.active_strategy_state
+    registrar_jogada(mesa, 'win', final_number)
     strategy_name = active_strategy_state["strategy_name"]; win_level = active_strategy_state["martingale_level"]
-    if win_level == 0: daily_score[strategy_name]["wins_sg"] += 1; win_type_message = "Vitória sem Gale!"
-    else: daily_score[strategy_name][f"wins_g{win_level}"] += 1; win_type_message = f"Vitória no {win_level}º Martingale"
+    win_type_message = "Vitória sem Gale!" if win_level == 0 else f"Vitória no {win_level}º Martingale"
     trigger_display = active_strategy_state.get('trigger_number', 'N/A')
-    mensagem_final = (f"✅ *VITÓRIA!*\n\n*{win_type_message}*\n_Estratégia: {strategy_name}_\n_Gatilho: {trigger_display}_\nSaiu: *{final_number}*\n\n{format_score_message()}")
-    await edit_play_messages(bot, mensagem_final, parse_mode=ParseMode.MARKDOWN); reset_strategy_state()
+    mensagem_final = (f"{mesa.rotulo}✅ *VITÓRIA!*\n\n*{win_type_message}*\n_Estratégia: {strategy_name}_\n_Gatilho: {trigger_display}_\nSaiu: *{final_number}*\n\n{format_score_message(mesa)}")
+    notificar(mesa, edit_play_messages, bot, active_strategy_state["play_message_ids"], mensagem_final, parse_mode=ParseMode.MARKDOWN); mesa.reset_strategy_state()
 
-async def handle_loss(bot, final_number):
-    daily_play_history.append({'time': datetime.now(FUSO_HORARIO_BRASIL), 'result': 'loss'})
-    strategy_name = active_strategy_state["strategy_name"]; daily_score[strategy_name]["losses"] += 1
+def handle_loss(bot, mesa, final_number):
+    active_strategy_state = mesa.active_strategy_state
+    registrar_jogada(mesa, 'loss', final_number)
+    strategy_name = active_strategy_state["strategy_name"]
     trigger_display = active_strategy_state.get('trigger_number', 'N/A')
-    mensagem_final = (f"❌ *LOSS!*\n\n_Estratégia: {strategy_name}_\n_Gatilho: {trigger_display}_\nSaiu: *{final_number}*\n\n{format_score_message()}")
-    await edit_play_messages(bot, mensagem_final, parse_mode=ParseMode.MARKDOWN); reset_strategy_state()
+    mensagem_final = (f"{mesa.rotulo}❌ *LOSS!*\n\n_Estratégia: {strategy_name}_\n_Gatilho: {trigger_display}_\nSaiu: *{final_number}*\n\n{format_score_message(mesa)}")
+    notificar(mesa, edit_play_messages, bot, active_strategy_state["play_message_ids"], mensagem_final, parse_mode=ParseMode.MARKDOWN); mesa.reset_strategy_state()
 
-async def handle_martingale(bot, current_number):
-    level = active_strategy_state["martingale_level"]; base_message = build_base_signal_message()
+def handle_martingale(bot, mesa, current_number):
+    level = mesa.active_strategy_state["martingale_level"]; base_message = build_base_signal_message(mesa)
     mensagem_editada = (f"{base_message}\n\n------------------------------------\n⏳ *Análise: Entrar no {level}º Martingale...*\nO número *{current_number}* não pagou.")
-    await edit_play_messages(bot, mensagem_editada, parse_mode=ParseMode.MARKDOWN)
+    notificar(mesa, edit_play_messages, bot, mesa.active_strategy_state["play_message_ids"], mensagem_editada, parse_mode=ParseMode.MARKDOWN)
 
-async def handle_active_strategy(bot, numero):
-    if numero in active_strategy_state["winning_numbers"]: await handle_win(bot, numero)
-    else:
-        active_strategy_state["martingale_level"] += 1
-        if active_strategy_state["martingale_level"] <= MAX_MARTINGALES: await handle_martingale(bot, numero)
-        else: await handle_loss(bot, numero)
+def handle_active_strategy(bot, mesa, numero):
+    resultado = avaliar_giro(mesa.active_strategy_state, numero, MAX_MARTINGALES)
+    if resultado == 'win': handle_win(bot, mesa, numero)
+    elif resultado == 'gale': handle_martingale(bot, mesa, numero)
+    else: handle_loss(bot, mesa, numero)
 
-async def check_for_new_triggers(bot, numero, numero_anterior):
+async def check_for_new_triggers(bot, mesa, numero, numero_anterior, detectado_em=None):
     max_len = max(NUMEROS_PARA_ANALISE, SEQUENCE_LENGTH_IA_DUZIAS, SEQUENCE_LENGTH_IA_NUMEROS)
-    numeros_recentes = buscar_numeros_recentes_para_analise(max_len)
-    
-    top_5, conf_top5 = analisar_ia_top5(numeros_recentes)
-    if top_5 is not None and conf_top5 >= GATILHO_CONFIANCA_IA_TOP5:
-        logging.info(f"Gatilho IA Top 5! Confiança: {conf_top5:.1%}. Números: {top_5}")
-        winning_numbers = top_5
-        if 0 not in winning_numbers: winning_numbers.append(0)
-        active_strategy_state.update({"active": True, "strategy_name": "Estratégia IA Top 5 Números", "winning_numbers": winning_numbers, "trigger_number": ", ".join(map(str,sorted(top_5))), "trigger_info": conf_top5 })
-    
-    elif MODELO_IA_DUZIAS:
-        duzia_ia, conf_duzia = analisar_ia_duzias(numeros_recentes)
-        if duzia_ia is not None and conf_duzia >= GATILHO_CONFIANCA_IA_DUZIAS:
-            logging.info(f"Gatilho IA Dúzias! Dúzia {duzia_ia} com {conf_duzia:.1%} de confiança.")
-            winning_numbers = DUZIAS[duzia_ia].copy()
-            if 0 not in winning_numbers: winning_numbers.append(0)
-            active_strategy_state.update({"active": True, "strategy_name": "Estratégia IA Dúzias", "winning_numbers": winning_numbers, "trigger_number": duzia_ia, "trigger_info": conf_duzia })
-
-    else:
-        duzia_atrasada, atraso = analisar_atraso_duzias(numeros_recentes)
-        if atraso >= GATILHO_ATRASO_DUZIA:
-            logging.info(f"Gatilho Atraso de Dúzia! Dúzia {duzia_atrasada} a {atraso} rodadas.")
-            winning_numbers = DUZIAS[duzia_atrasada].copy(); winning_numbers.append(0)
-            active_strategy_state.update({"active": True, "strategy_name": "Estratégia Atraso de Dúzias", "winning_numbers": winning_numbers, "trigger_number": duzia_atrasada, "trigger_info": atraso })
+    numeros_recentes = buscar_numeros_recentes_para_analise(mesa, max_len)
+
+    # Snapshot dos modelos: uma troca a quente só vale a partir do próximo giro.
+    # A linha de features é montada aqui, junto com o snapshot, para que modelo e ordem das colunas sejam os mesmos.
+    modelos = mesa.registro.atual; modelo_duzias = modelos.get('duzias'); dados_numeros = modelos.get('numeros')
+    linha_features = mesa.motor_features_numeros.linha() if dados_numeros else None # sem o modelo v3, nem a entropia é calculada
+    jogada = await motor_inferencia.avaliar_giro(numeros_recentes, linha_features, modelo_duzias, dados_numeros['model'] if dados_numeros else None,
+                                                 previsao_online=mesa.modelo_online.prever())
+    if jogada: mesa.active_strategy_state.update({"active": True, **jogada})
+
+    if mesa.active_strategy_state["active"]:
+        mensagem = f"{build_base_signal_message(mesa)}\n\n[🔗 Fazer Aposta]({URL_APOSTA})\n---\n{format_score_message(mesa)}"
+        notificar(mesa, send_and_track_play_message, bot, mesa.active_strategy_state["play_message_ids"], mensagem, mesa_id=mesa.id, estrategia=mesa.active_strategy_state["strategy_name"], detectado_em=detectado_em, parse_mode=ParseMode.MARKDOWN)
+
+# --- PIPELINE POR MESA ---
+# Ingestão (poll em cadência fixa + persistência) -> fila_analise -> análise (estado, inferência no executor)
+# -> fila_notificacoes -> notificação (Telegram). Uma etapa lenta não atrasa a detecção do próximo giro.
+def enfileirar_analise(mesa, item):
+    if mesa.fila_analise.full():
+        descartado = mesa.fila_analise.get_nowait(); metricas.incrementar('giros_descartados_analise_total', mesa=mesa.id)
+        logging.error(f"Fila de análise da mesa '{mesa.id}' cheia; giro {descartado[0]} descartado da análise (já persistido).")
+    mesa.fila_analise.put_nowait(item)
+
+async def ingerir_mesa(bot, mesa, session_end_time):
+    loop = asyncio.get_running_loop()
+    # Com várias mesas, o primeiro poll de cada uma é espalhado no intervalo para não sincronizar as requisições.
+    if len(mesas) > 1: await asyncio.sleep(random.uniform(0, INTERVALO_VERIFICACAO_API))
+    proximo_poll = loop.time()
+    while relogio.agora(FUSO_HORARIO_BRASIL) < session_end_time:
+        try:
+            giros = await buscar_ultimo_numero_api(mesa); detectado_em = relogio.monotonico()
+            if primeiro_poll_em is None: registrar_primeiro_poll()
+            if mesa.primeira_consulta and len(giros) > 1:
+                # Giros que saíram durante a pausa: apenas persistidos e registrados, sem disparar sinais atrasados.
+                for numero, numero_anterior in giros[:-1]:
+                    salvar_numero_postgres(mesa, numero); enfileirar_analise(mesa, (numero, numero_anterior, detectado_em, False))
+                logging.info(f"{len(giros) - 1} giros ocorridos durante a pausa recuperados e salvos ({mesa.id}).")
+                giros = giros[-1:]
+            if giros: mesa.primeira_consulta = False
+            for numero, numero_anterior in giros:
+                salvar_numero_postgres(mesa, numero); enfileirar_analise(mesa, (numero, numero_anterior, detectado_em, True))
+            mesa.agendador.registrar_poll(len(giros), detectado_em)
+        except Exception as e: logging.error(f"Erro na ingestão da mesa '{mesa.id}': {e}")
+        # Cadência adaptativa: a espera conta do início do poll anterior; se um poll estourar a espera, realinha.
+        proximo_poll += mesa.agendador.proxima_espera(relogio.monotonico())
+        if proximo_poll < loop.time(): proximo_poll = loop.time()
+        await asyncio.sleep(proximo_poll - loop.time())
+    await mesa.fila_analise.put(None)
+
+async def analisar_mesa(bot, mesa):
+    while True:
+        try: item = await asyncio.wait_for(mesa.fila_analise.get(), INTERVALO_VERIFICACAO_API)
+        except asyncio.TimeoutError: item = ()
+        if item is None: break
+        try:
+            check_and_send_period_messages(bot, mesa)
+            if not item: continue
+            numero, numero_anterior, detectado_em, analisar = item
+            if not analisar: mesa.adicionar(numero); continue
+            # Sobrecarga: giro velho ou já seguido de outro na fila ainda resolve a jogada ativa, mas não abre uma nova.
+            atrasado = relogio.monotonico() - detectado_em > IDADE_MAXIMA_SINAL or not mesa.fila_analise.empty()
+            if atrasado: metricas.incrementar('giros_atrasados_total', mesa=mesa.id); logging.warning(f"Análise da mesa '{mesa.id}' atrasada; giro {numero} processado sem buscar novos gatilhos.")
+            with metricas.cronometrar('analise_giro_segundos', mesa=mesa.id): await processar_numero(bot, mesa, numero, numero_anterior, novos_sinais=not atrasado, detectado_em=detectado_em)
+        except Exception as e: logging.error(f"Erro na análise da mesa '{mesa.id}': {e}")
+    await mesa.fila_notificacoes.put(None)
+
+async def notificar_mesa(mesa):
+    while True:
+        tarefa = await mesa.fila_notificacoes.get()
+        if tarefa is None: break
+        funcao, args, kwargs = tarefa
+        try: await funcao(*args, **kwargs)
+        except Exception as e: logging.error(f"Erro ao notificar ({mesa.id}): {e}")
 
-    if active_strategy_state["active"]:
-        mensagem = f"{build_base_signal_message()}\n\n[🔗 Fazer Aposta]({URL_APOSTA})\n---\n{format_score_message()}"
-        await send_and_track_play_message(bot, mensagem, parse_mode=ParseMode.MARKDOWN)
+async def monitorar_mesa(bot, mesa, session_end_time):
+    mesa.fila_analise = asyncio.Queue(TAMANHO_FILA_ANALISE); mesa.fila_notificacoes = asyncio.Queue(TAMANHO_FILA_NOTIFICACOES)
+    await asyncio.gather(ingerir_mesa(bot, mesa, session_end_time), analisar_mesa(bot, mesa), notificar_mesa(mesa))
 
 async def work_session(bot):
     work_duration_minutes = random.randint(WORK_MIN_MINUTES, WORK_MAX_MINUTES)
-    session_end_time = datetime.now(FUSO_HORARIO_BRASIL) + timedelta(minutes=work_duration_minutes)
+    session_end_time = relogio.agora(FUSO_HORARIO_BRASIL) + timedelta(minutes=work_duration_minutes)
     logging.info(f"Iniciando nova sessão Venon Boot Roleta que durará {work_duration_minutes // 60}h e {work_duration_minutes % 60}min.")
     await send_message_to_all(bot, f"Monitoramento de ciclos Venon Boot Roleta previsto para durar *{work_duration_minutes // 60}h e {work_duration_minutes % 60}min*.", parse_mode=ParseMode.MARKDOWN)
-    while datetime.now(FUSO_HORARIO_BRASIL) < session_end_time:
-        await check_and_send_period_messages(bot)
-        numero, numero_anterior = buscar_ultimo_numero_api()
-        if numero is not None: await processar_numero(bot, numero, numero_anterior)
-        await asyncio.sleep(INTERVALO_VERIFICACAO_API)
+    for mesa in mesas: mesa.primeira_consulta = True
+    await asyncio.gather(*(monitorar_mesa(bot, mesa, session_end_time) for mesa in mesas))
     logging.info("Sessão de trabalho Venon Boot Roleta concluída.")
 
 async def supervisor():
     bot = telegram.Bot(token=TOKEN_BOT)
     try: await send_message_to_all(bot, f"🤖 Monitoramento Roleta Online Venon Boot Roleta!\nIniciando gerenciamento de ciclos.")
     except Exception as e: logging.critical(f"Não foi possível conectar ao Telegram na inicialização: {e}")
-    while True:
+    # Um único cliente HTTP (keep-alive) para todas as mesas; o pool do banco e o gravador também são únicos.
+    cliente_http = criar_cliente(max_conexoes=max(4, len(mesas)))
+    for mesa in mesas: await mesa.coletor.abrir(cliente_http)
+    gravador_feed = None
+    if GRAVAR_FEED:
         try:
-            await work_session(bot)
-            break_duration_minutes = random.randint(BREAK_MIN_MINUTES, BREAK_MAX_MINUTES)
-            logging.info(f"Iniciando pausa de {break_duration_minutes} minutos.")
-            await send_message_to_all(bot, f"⏸️ Pausa programada para manutenção.\nDuração: *{break_duration_minutes} minutos*.", parse_mode=ParseMode.MARKDOWN)
-            await asyncio.sleep(break_duration_minutes * 60)
-            logging.info("Pausa finalizada. Iniciando nova sessão.")
-            await send_message_to_all(bot, f"✅ Sistema Venon Boot Roleta operante novamente!")
-        except Exception as e:
-            import traceback; tb_str = traceback.format_exc()
-            logging.critical(f"O processo supervisor falhou! Erro: {e}\nTraceback:\n{tb_str}"); await asyncio.sleep(60)
+            gravador_feed = GravadorFeed(GRAVAR_FEED)
+            for mesa in mesas: mesa.coletor.gravador = gravador_feed
+            logging.info(f"Gravando os payloads da API em {GRAVAR_FEED}.")
+        except OSError as e: logging.error(f"Não foi possível abrir a gravação do feed {GRAVAR_FEED}: {e}")
+    gravador_resultados.iniciar(); gravador_jogadas.iniciar()
+    servidor_metricas = None
+    if METRICAS_PORTA:
+        try: servidor_metricas = await metricas.servir(METRICAS_HOST, METRICAS_PORTA)
+        except OSError as e: logging.error(f"Não foi possível abrir o endpoint de métricas em {METRICAS_HOST}:{METRICAS_PORTA}: {e}")
+    vigias_modelos = [asyncio.create_task(carregar_modelos_em_segundo_plano(registro) if INICIO_RAPIDO else registro.vigiar()) for registro in registros_modelos]
+    try:
+        while True:
+            try:
+                await work_session(bot)
+                break_duration_minutes = random.randint(BREAK_MIN_MINUTES, BREAK_MAX_MINUTES)
+                logging.info(f"Iniciando pausa de {break_duration_minutes} minutos.")
+                await send_message_to_all(bot, f"⏸️ Pausa programada para manutenção.\nDuração: *{break_duration_minutes} minutos*.", parse_mode=ParseMode.MARKDOWN)
+                await asyncio.sleep(break_duration_minutes * 60)
+                logging.info("Pausa finalizada. Iniciando nova sessão.")
+                await send_message_to_all(bot, f"✅ Sistema Venon Boot Roleta operante novamente!")
+            except Exception as e:
+                import traceback; tb_str = traceback.format_exc()
+                logging.critical(f"O processo supervisor falhou! Erro: {e}\nTraceback:\n{tb_str}"); await asyncio.sleep(60)
+    finally:
+        for vigia in vigias_modelos: vigia.cancel()
+        for mesa in mesas: await mesa.coletor.fechar(); salvar_modelo_online(mesa)
+        executor_inferencia.shutdown(wait=False)
+        if servidor_metricas is not None: servidor_metricas.close()
+        if entrega_telegram is not None: await entrega_telegram.fechar()
+        await cliente_http.aclose(); await gravador_resultados.fechar(); await gravador_jogadas.fechar()
+        if gravador_feed is not None: gravador_feed.fechar()
+        persistencia.fechar_pool()
 
 if __name__ == '__main__':
     logging.info("Verificando e inicializando o banco de dados PostgreSQL...")
     inicializar_db_postgres()
-    logging.info("Carregando modelos de Inteligência Artificial...")
-    carregar_modelos_ia()
+    aquecer_buffer_giros()
+    if INICIO_RAPIDO: logging.info("Início rápido: modelos de Inteligência Artificial carregam em segundo plano; atraso de dúzias e modelo online servem até lá.")
+    else:
+        logging.info("Carregando modelos de Inteligência Artificial...")
+        carregar_modelos_ia()
     try: asyncio.run(supervisor())
     except KeyboardInterrupt: logging.info("Bot encerrado manualmente.")
     except Exception as e: logging.critical(f"Erro fatal no supervisor: {e}")
-
-
-
-
@@ -0,0 +1,311 @@
+# -*- coding: utf-8 -*-
+# simulacao.py - Replay de uma gravação do feed (gravacao_feed.py) contra o monitor completo, de 1x a 1000x
+# O supervisor roda sem alterações: a API vira um servidor HTTP local que entrega, a cada instante simulado, o último
+# payload gravado até ali; o Telegram é um bot falso com latência simulada e o PostgreSQL é um SQLite em memória
+# (ou um PostgreSQL local com --database-url). Relógio (relogio.py) e event loop andam `fator` vezes mais rápido.
+# Trabalho de CPU (inferência, gravação) não acelera: os prazos em tempo real do monitor são multiplicados pelo fator.
+# Uso: python simulacao.py replay gravacao.jsonl.gz --fator 200 [--repeticoes 3] [--saida relatorio.json]
+#      python simulacao.py gerar sintetico.jsonl.gz --dias 2 [--mesas 2]
+import os
+import json
+import gzip
+import time
+import random
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import argparse
+import selectors
+import tempfile
+import threading
+import importlib
+from bisect import bisect_right
+from functools import partial
+from urllib.parse import urlsplit
+from datetime import datetime, timedelta, timezone
+import relogio
+from relogio import RelogioAcelerado
+from gravacao_feed import ler_gravacao
+from persistencia import MESA_PADRAO
+from metricas import memoria_residente_mb
+from coletor_api import URL_HISTORICO_PADRAO
+
+INTERVALO_GIRO_SINTETICO = 45 # segundos, média entre giros da gravação sintética
+TAMANHO_HISTORICO_API = 100 # giros por payload da API
+CORPO_VAZIO = b'{"baralhos": {}}'
+LATENCIA_TELEGRAM = (0.08, 0.35) # segundos simulados por chamada ao bot falso
+INTERVALO_AMOSTRA_MEMORIA = 10 # minutos simulados entre leituras do RSS
+MARGEM_FINAL = 120 # segundos simulados depois do último payload, para a análise e as notificações terminarem
+
+# --- GRAVAÇÃO SINTÉTICA ---
+def gerar_gravacao(caminho, dias=1, n_mesas=1, intervalo=INTERVALO_GIRO_SINTETICO, semente=0, inicio=None):
+    # Giros uniformes com intervalo ~N(intervalo, 10%); mesas defasadas entre si. Retorna o número de payloads.
+    aleatorio = random.Random(semente); inicio = inicio or datetime(2024, 1, 1, 12, tzinfo=timezone.utc)
+    mesas = []
+    for i in range(n_mesas):
+        mesa_id = MESA_PADRAO if n_mesas == 1 else f"mesa{i + 1}"
+        historico = [aleatorio.randint(0, 36) for _ in range(TAMANHO_HISTORICO_API)]
+        mesas.append([inicio.timestamp() + aleatorio.uniform(0, intervalo), URL_HISTORICO_PADRAO.replace(MESA_PADRAO, mesa_id), historico])
+    fim = inicio.timestamp() + dias * 86400; registros = 0
+    with gzip.open(caminho, 'wt', encoding='utf-8') as f:
+        while True:
+            mesa = min(mesas, key=lambda m: m[0])
+            if mesa[0] >= fim: break
+            momento, url, historico = mesa
+            historico.append(aleatorio.randint(0, 36)); del historico[0]
+            f.write(json.dumps({'t': round(momento, 3), 'url': url, 'corpo': json.dumps({'baralhos': {'0': historico}})}, separators=(',', ':')) + '\n')
+            mesa[0] += max(5.0, aleatorio.gauss(intervalo, intervalo * 0.1)); registros += 1
+    return registros
+
+# --- LINHA DO TEMPO ---
+def caminho_local(url):
+    partes = urlsplit(url)
+    return f"/{partes.netloc}{partes.path}"
+
+def carregar_linha_do_tempo(caminho, repeticoes=1):
+    # {caminho local: ([momentos], [corpos], [etags])}. Nas repetições a gravação recomeça logo após o fim; na emenda a
+    # leitura sai desalinhada e o monitor ingere o payload inteiro, como na volta de uma queda da API.
+    registros = [(r['t'], r['url'], r['corpo'].encode('utf-8')) for r in ler_gravacao(caminho)]
+    if not registros: raise ValueError(f"Gravação {caminho} vazia.")
+    registros.sort(key=lambda r: r[0])
+    inicio = registros[0][0]; duracao = registros[-1][0] - inicio + INTERVALO_GIRO_SINTETICO
+    linha, urls = {}, []
+    for repeticao in range(repeticoes):
+        for momento, url, corpo in registros:
+            if url not in urls: urls.append(url)
+            momentos, corpos, etags = linha.setdefault(caminho_local(url), ([], [], []))
+            momentos.append(momento + repeticao * duracao); corpos.append(corpo)
+            etags.append(f'"{hashlib.blake2b(corpo, digest_size=8).hexdigest()}"')
+    return linha, urls, datetime.fromtimestamp(inicio, timezone.utc), datetime.fromtimestamp(inicio + repeticoes * duracao, timezone.utc), len(registros) * repeticoes
+
+# --- EVENT LOOP ACELERADO ---
+class SeletorAcelerado(selectors.DefaultSelector):
+    # As esperas do loop são calculadas em segundos simulados; no select elas viram segundos reais.
+    def __init__(self, fator): super().__init__(); self.fator = fator
+
+    def select(self, timeout=None):
+        return super().select(timeout if timeout is None or timeout <= 0 else timeout / self.fator)
+
+class LoopAcelerado(asyncio.SelectorEventLoop):
+    def __init__(self, fator): super().__init__(SeletorAcelerado(fator))
+
+    def time(self): return relogio.monotonico()
+
+# --- API LOCAL ---
+class ServidorReplay:
+    def __init__(self, linha_do_tempo):
+        self.linha = linha_do_tempo
+        self.requisicoes = 0; self.nao_modificadas = 0
+        self.entregas = {} # caminho -> ([momento monotônico da 1ª entrega de cada payload], [atraso desde a chegada na gravação])
+        self._entregues = {}
+
+    def _atual(self, caminho):
+        momentos, corpos, etags = self.linha.get(caminho, ((), (), ()))
+        i = bisect_right(momentos, relogio.agora(timezone.utc).timestamp()) - 1
+        return (None, CORPO_VAZIO, '"vazio"') if i < 0 else (i, corpos[i], etags[i])
+
+    def _registrar_entrega(self, caminho, i):
+        if i is None or self._entregues.get(caminho, -1) >= i: return
+        self._entregues[caminho] = i; momentos_entrega, atrasos = self.entregas.setdefault(caminho, ([], []))
+        momentos_entrega.append(relogio.monotonico()); atrasos.append(relogio.agora(timezone.utc).timestamp() - self.linha[caminho][0][i])
+
+    def atraso_deteccao(self, caminho, detectado_em):
+        # Atraso entre o payload chegar (na gravação) e ser entregue ao monitor, para o giro detectado em `detectado_em`.
+        momentos_entrega, atrasos = self.entregas.get(caminho, ((), ()))
+        i = bisect_right(momentos_entrega, detectado_em + 1e-6) - 1
+        return atrasos[i] if i >= 0 else None
+
+    async def _atender(self, leitor, escritor):
+        try:
+            while True: # keep-alive: o coletor reaproveita a conexão
+                requisicao = await leitor.readline()
+                if not requisicao: break
+                cabecalhos = {}
+                while (linha := await leitor.readline()) not in (b'\r\n', b'\n', b''):
+                    nome, _, valor = linha.decode('latin-1').partition(':'); cabecalhos[nome.strip().lower()] = valor.strip()
+                caminho = requisicao.decode('latin-1').split()[1].split('?')[0]; self.requisicoes += 1
+                i, corpo, etag = self._atual(caminho)
+                if cabecalhos.get('if-none-match') == etag:
+                    self.nao_modificadas += 1
+                    escritor.write(f"HTTP/1.1 304 Not Modified\r\nETag: {etag}\r\nContent-Length: 0\r\n\r\n".encode())
+                else:
+                    self._registrar_entrega(caminho, i)
+                    escritor.write(f"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nETag: {etag}\r\nContent-Length: {len(corpo)}\r\n\r\n".encode() + corpo)
+                await escritor.drain()
+        except (ConnectionError, IndexError) as e: logging.debug(f"Conexão do replay encerrada: {e}")
+        finally: escritor.close()
+
+    async def iniciar(self, host='127.0.0.1'):
+        self._servidor = await asyncio.start_server(self._atender, host, 0)
+        return f"http://{host}:{self._servidor.sockets[0].getsockname()[1]}"
+
+# --- TELEGRAM FALSO ---
+class MensagemFalsa:
+    def __init__(self, message_id): self.message_id = message_id
+
+class BotFalso:
+    def __init__(self, latencia=LATENCIA_TELEGRAM, semente=0):
+        self.latencia = latencia; self.aleatorio = random.Random(semente)
+        self.enviadas = 0; self.editadas = 0; self._proximo_id = 0
+
+    async def send_message(self, chat_id, text, **kwargs):
+        await asyncio.sleep(self.aleatorio.uniform(*self.latencia))
+        self.enviadas += 1; self._proximo_id += 1
+        return MensagemFalsa(self._proximo_id)
+
+    async def edit_message_text(self, text=None, chat_id=None, message_id=None, **kwargs):
+        await asyncio.sleep(self.aleatorio.uniform(*self.latencia)); self.editadas += 1
+        return MensagemFalsa(message_id)
+
+# --- BANCO EM MEMÓRIA ---
+class BancoSQLite:
+    # Substitui as funções de persistencia.py usadas pelo monitor, com a mesma ordenação por id.
+    def __init__(self, caminho=':memory:'):
+        self.conn = sqlite3.connect(caminho, check_same_thread=False); self._trava = threading.Lock() # o gravador grava de uma thread
+        self.conn.execute("CREATE TABLE resultados (id INTEGER PRIMARY KEY, mesa TEXT NOT NULL, numero INTEGER NOT NULL, timestamp TEXT NOT NULL);")
+        self.conn.execute("CREATE INDEX idx_resultados_mesa_id ON resultados (mesa, id);")
+        self.conn.execute("CREATE TABLE jogadas (id INTEGER PRIMARY KEY, momento TEXT NOT NULL, mesa TEXT NOT NULL, estrategia TEXT NOT NULL, vitoria INTEGER NOT NULL, gale INTEGER NOT NULL, gatilho TEXT, confianca REAL, numero INTEGER);")
+
+    def inserir_lote(self, linhas):
+        with self._trava, self.conn: self.conn.executemany("INSERT INTO resultados (numero, timestamp, mesa) VALUES (?, ?, ?);", [(numero, momento.isoformat(), mesa) for numero, momento, mesa in linhas])
+
+    def _ultimos(self, coluna, limite, mesa):
+        with self._trava: return [linha[0] for linha in self.conn.execute(f"SELECT {coluna} FROM resultados WHERE mesa = ? ORDER BY id DESC LIMIT ?;", (mesa, limite))]
+
+    def buscar_numeros_recentes(self, limite, mesa=MESA_PADRAO): return self._ultimos('numero', limite, mesa)
+
+    def buscar_momentos_recentes(self, limite, mesa=MESA_PADRAO): return [datetime.fromisoformat(m) for m in self._ultimos('timestamp', limite, mesa)]
+
+    def inserir_jogadas(self, linhas):
+        with self._trava, self.conn: self.conn.executemany("INSERT INTO jogadas (momento, mesa, estrategia, vitoria, gale, gatilho, confianca, numero) VALUES (?, ?, ?, ?, ?, ?, ?, ?);", [(momento.isoformat(), *resto) for momento, *resto in linhas])
+
+    def buscar_jogadas(self, mesa=MESA_PADRAO, desde=None):
+        with self._trava: linhas = self.conn.execute("SELECT momento, estrategia, vitoria, gale FROM jogadas WHERE mesa = ? ORDER BY id;", (mesa,)).fetchall()
+        jogadas = [(datetime.fromisoformat(momento), estrategia, bool(vitoria), gale) for momento, estrategia, vitoria, gale in linhas]
+        return [jogada for jogada in jogadas if desde is None or jogada[0] >= desde]
+
+    def total(self, tabela='resultados'):
+        with self._trava: return self.conn.execute(f"SELECT COUNT(*) FROM {tabela};").fetchone()[0]
+
+    def instalar(self, persistencia):
+        persistencia.inserir_lote = self.inserir_lote
+        persistencia.buscar_numeros_recentes = self.buscar_numeros_recentes; persistencia.buscar_momentos_recentes = self.buscar_momentos_recentes
+        persistencia.inserir_jogadas = self.inserir_jogadas; persistencia.buscar_jogadas = self.buscar_jogadas
+
+# --- MEDIÇÕES ---
+def quantis(valores, escala=1.0):
+    if not valores: return None
+    ordenados = sorted(valores)
+    def q(p): return round(ordenados[min(int(p * len(ordenados)), len(ordenados) - 1)] * escala, 4)
+    return {'n': len(ordenados), 'p50': q(0.5), 'p90': q(0.9), 'p99': q(0.99), 'max': round(ordenados[-1] * escala, 4)}
+
+def crescimento_por_dia(amostras):
+    # Inclinação (mínimos quadrados) do RSS x horas simuladas, sem o primeiro décimo (aquecimento), em MB por dia.
+    amostras = amostras[len(amostras) // 10:]
+    if len(amostras) < 3: return None
+    media_x = sum(x for x, _ in amostras) / len(amostras); media_y = sum(y for _, y in amostras) / len(amostras)
+    variancia = sum((x - media_x) ** 2 for x, _ in amostras)
+    return round(sum((x - media_x) * (y - media_y) for x, y in amostras) / variancia * 24, 2) if variancia else None
+
+# --- EXECUÇÃO ---
+def preparar_monitor(args, base_url, urls):
+    # Ambiente do monitor antes do import: mesas apontando para o servidor local, sem endpoint de métricas nem gravação,
+    # e sem o início rápido: os modelos são carregados antes do replay, para os sinais não dependerem do tempo de carga.
+    mesas = args.mesas or ','.join(f"{MESA_PADRAO if len(urls) == 1 else os.path.basename(urlsplit(url).path).rsplit('.', 1)[0].replace('historico_', '')}={url}#0" for url in urls)
+    mesas = ','.join(f"{mesa_id}={base_url}{caminho_local(url)}#{baralho}" for mesa_id, url, baralho in (
+        (item.partition('=')[0], item.partition('=')[2].partition('#')[0], item.partition('#')[2] or '0') for item in mesas.split(',') if item.strip()))
+    os.environ.update({'TOKEN_BOT': 'simulacao', 'CHAT_ID': ','.join(str(i + 1) for i in range(args.chats)), 'URL_APOSTA': 'https://exemplo.invalid/aposta',
+                       'DATABASE_URL': args.database_url or 'postgres://simulacao@localhost/simulacao', 'MESAS': mesas, 'METRICAS_PORTA': '0', 'INICIO_RAPIDO': '0'})
+    os.environ.pop('GRAVAR_FEED', None)
+    random.seed(args.semente)
+    monitor = importlib.import_module('roulette_monitor')
+    bot = BotFalso(semente=args.semente)
+    monitor.telegram = type('TelegramFalso', (), {'Bot': staticmethod(lambda token: bot)})
+    # Prazos em tempo real, medidos no relógio simulado: multiplicados pelo fator para valerem o mesmo em segundos reais.
+    monitor.IDADE_MAXIMA_SINAL *= args.fator; monitor.motor_inferencia.timeout *= args.fator
+    monitor.criar_cliente = partial(monitor.criar_cliente, 10 * args.fator)
+    # Snapshots do modelo online vão para um diretório temporário, nunca sobre os da produção.
+    monitor.ARQUIVO_ESTADO_ONLINE = os.path.join(tempfile.mkdtemp(prefix='simulacao_'), monitor.ARQUIVO_ESTADO_ONLINE)
+    for i, mesa in enumerate(monitor.mesas): mesa.agendador.aleatorio = random.Random(args.semente + i)
+    banco = None
+    if args.database_url: monitor.inicializar_db_postgres()
+    else: banco = BancoSQLite(); banco.instalar(monitor.persistencia)
+    return monitor, bot, banco
+
+async def simular(monitor, servidor, fim, fator):
+    from metricas import metricas
+    sinais = [] # (mesa, momento do envio, detecção -> sinal), todos em segundos simulados
+    observar = metricas.observar
+    def observar_com_registro(nome, valor, **rotulos):
+        if nome == 'latencia_giro_ate_sinal_segundos': sinais.append((rotulos.get('mesa'), relogio.monotonico(), valor))
+        observar(nome, valor, **rotulos)
+    metricas.observar = observar_com_registro
+    caminhos = {mesa.id: urlsplit(mesa.coletor.url).path for mesa in monitor.mesas}
+    inicio_real = time.perf_counter(); inicio_virtual = relogio.monotonico(); memoria = [(0.0, memoria_residente_mb())]
+    tarefa = asyncio.create_task(monitor.supervisor())
+    while relogio.agora(timezone.utc) < fim and not tarefa.done():
+        await asyncio.sleep(min(INTERVALO_AMOSTRA_MEMORIA * 60, max((fim - relogio.agora(timezone.utc)).total_seconds(), 0.001)))
+        memoria.append(((relogio.monotonico() - inicio_virtual) / 3600, memoria_residente_mb()))
+    tarefa.cancel(); await asyncio.gather(tarefa, return_exceptions=True)
+    segundos_reais = time.perf_counter() - inicio_real; segundos_virtuais = relogio.monotonico() - inicio_virtual
+    def soma(nome): return sum(metricas.contador(nome, mesa=mesa.id).valor for mesa in monitor.mesas)
+    deteccoes, ponta_a_ponta = [], []
+    for mesa_id, enviado_em, latencia in sinais:
+        atraso = servidor.atraso_deteccao(caminhos[mesa_id], enviado_em - latencia)
+        if atraso is not None: deteccoes.append(atraso); ponta_a_ponta.append(atraso + latencia)
+    giros = soma('giros_detectados_total')
+    return {
+        'horas_simuladas': round(segundos_virtuais / 3600, 2), 'segundos_reais': round(segundos_reais, 1), 'fator_efetivo': round(segundos_virtuais / segundos_reais, 1),
+        'requisicoes_api': servidor.requisicoes, 'respostas_304': servidor.nao_modificadas,
+        'giros_detectados': giros, 'giros_por_segundo_real': round(giros / segundos_reais, 2),
+        'giros_atrasados': soma('giros_atrasados_total'), 'giros_descartados_analise': soma('giros_descartados_analise_total'),
+        'leituras_sem_sobreposicao': soma('leituras_sem_sobreposicao_total'), 'notificacoes_descartadas': soma('notificacoes_descartadas_total'),
+        'inferencia_timeouts': metricas.contador('inferencia_timeouts_total').valor, 'sinais': len(sinais),
+        # Latências em segundos simulados; as "_real" dividem pelo fator (o que o monitor gastaria de fato nessa velocidade).
+        'latencia_chegada_ate_deteccao': quantis(deteccoes), 'latencia_deteccao_ate_sinal': quantis([l for _, _, l in sinais]),
+        'latencia_ponta_a_ponta': quantis(ponta_a_ponta), 'latencia_ponta_a_ponta_real': quantis(ponta_a_ponta, 1 / fator),
+        'memoria_mb': {'inicio': round(memoria[0][1], 1), 'fim': round(memoria[-1][1], 1), 'maxima': round(max(m for _, m in memoria), 1),
+                       'crescimento_por_dia': crescimento_por_dia(memoria), 'amostras': {f'{h:.2f}h': round(m, 1) for h, m in memoria}},
+    }
+
+def replay(args):
+    linha, urls, inicio, fim, payloads = carregar_linha_do_tempo(args.gravacao, args.repeticoes)
+    logging.info(f"Replay de {payloads} payloads ({len(urls)} URLs, {(fim - inicio).total_seconds() / 3600:.1f}h simuladas) a {args.fator:g}x.")
+    relogio.definir(RelogioAcelerado(args.fator, inicio))
+    loop = LoopAcelerado(args.fator); asyncio.set_event_loop(loop)
+    servidor = ServidorReplay(linha); base_url = loop.run_until_complete(servidor.iniciar())
+    monitor, bot, banco = preparar_monitor(args, base_url, urls)
+    monitor.aquecer_buffer_giros(); monitor.carregar_modelos_ia()
+    # O tempo simulado recomeça do início da gravação só agora, com o monitor importado e os modelos carregados.
+    relogio.definir(RelogioAcelerado(args.fator, inicio))
+    try: relatorio = loop.run_until_complete(simular(monitor, servidor, fim + timedelta(seconds=MARGEM_FINAL), args.fator))
+    finally: loop.close()
+    relatorio = {'gravacao': args.gravacao, 'fator': args.fator, 'repeticoes': args.repeticoes, 'payloads': payloads,
+                 'banco': 'postgresql' if args.database_url else 'sqlite', **relatorio,
+                 'mensagens_telegram': bot.enviadas, 'edicoes_telegram': bot.editadas, 'giros_gravados': banco.total() if banco else None,
+                 'jogadas_gravadas': banco.total('jogadas') if banco else None}
+    texto = json.dumps(relatorio, ensure_ascii=False, indent=2)
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f: f.write(texto + '\n')
+    print(texto)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Replay acelerado do feed gravado contra o monitor (teste de carga determinístico).")
+    sub = parser.add_subparsers(dest='comando', required=True)
+    p_replay = sub.add_parser('replay', help="Executa o monitor contra uma gravação (GRAVAR_FEED=arquivo no monitor grava uma)")
+    p_replay.add_argument('gravacao'); p_replay.add_argument('--fator', type=float, default=100, help="Velocidade do tempo simulado (1 a 1000)")
+    p_replay.add_argument('--repeticoes', type=int, default=1, help="Repete a gravação em sequência (execuções de vários dias)")
+    p_replay.add_argument('--mesas', help="MESAS no formato do monitor, com as URLs gravadas (padrão: uma mesa por URL, baralho 0)")
+    p_replay.add_argument('--chats', type=int, default=1, help="Quantidade de chats do Telegram falso")
+    p_replay.add_argument('--database-url', help="PostgreSQL local no lugar do SQLite em memória")
+    p_replay.add_argument('--semente', type=int, default=0); p_replay.add_argument('--saida', help="Arquivo JSON do relatório")
+    p_gerar = sub.add_parser('gerar', help="Gera uma gravação sintética")
+    p_gerar.add_argument('destino'); p_gerar.add_argument('--dias', type=float, default=1); p_gerar.add_argument('--mesas', type=int, default=1)
+    p_gerar.add_argument('--intervalo', type=float, default=INTERVALO_GIRO_SINTETICO); p_gerar.add_argument('--semente', type=int, default=0)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+    if args.comando == 'gerar': print(f"{gerar_gravacao(args.destino, args.dias, args.mesas, args.intervalo, args.semente)} payloads gravados em {args.destino}.")
+    else:
+        if not 1 <= args.fator <= 1000: parser.error("--fator deve estar entre 1 e 1000.")
+        replay(args)
@@ -0,0 +1,205 @@
+# train_models.py - Treinamento noturno único: carrega e gera features uma vez, busca os hiperparâmetros de todos os
+# modelos por successive halving em janelas temporais (walk-forward), em paralelo, e salva como artefato a floresta
+# vencedora do último fold (sem reajuste final) + relatório de métricas.
+import os
+import json
+import math
+import time
+import argparse
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+from itertools import product
+import numpy as np
+import joblib
+from sklearn.model_selection import TimeSeriesSplit
+import train_model_duzias
+import train_model_numeros
+from feature_store import FeatureStore
+from persistencia import MESA_PADRAO
+from registro_modelos import arquivo_modelo
+
+ARQUIVO_METRICAS = 'metricas_treino.json'
+N_SPLITS = 4
+FOLDS_VALIDACAO = 1 # últimos folds do walk-forward usados na busca (mais folds: validação mais estável, custo proporcional)
+GAP_VALIDACAO = train_model_numeros.ANALYSIS_WINDOW # evita que as janelas de lag cruzem treino e validação
+
+# Novos modelos entram aqui: como montar o dataset a partir do feature store, como criar o estimador,
+# qual grade de hiperparâmetros testar e qual métrica escolhe o vencedor.
+MODELOS = {
+    'duzias': {
+        'arquivo': 'modelo_duzias.pkl', 'minimo': 100, 'metrica': 'acuracia',
+        'preparar': lambda colunas: train_model_duzias.preparar_dataset(colunas['duzia']),
+        'criar': train_model_duzias.criar_modelo,
+        'artefato': lambda modelo, features: modelo,
+        'grade': {'min_samples_leaf': [5, 10], 'max_depth': [None, 12]},
+    },
+    'numeros': {
+        'arquivo': 'modelo_numeros.pkl', 'minimo': 200, 'metrica': 'acuracia_top5',
+        'preparar': lambda colunas: train_model_numeros.preparar_dataset(colunas['numero'], colunas['feature_entropy'], colunas['feature_unique_count']),
+        'criar': train_model_numeros.criar_modelo,
+        'artefato': lambda modelo, features: {'model': modelo, 'features': features},
+        'grade': {'min_samples_leaf': [3, 8], 'max_depth': [15, 20]},
+    },
+}
+
+# --- WORKERS (processos) ---
+_DADOS = {}
+
+def _inicializar_worker(caminhos):
+    # Cada processo mapeia os mesmos arquivos .npy em memória em vez de receber cópias dos dados.
+    for nome, (caminho_x, caminho_y) in caminhos.items():
+        _DADOS[nome] = (np.load(caminho_x, mmap_mode='r'), np.load(caminho_y, mmap_mode='r'))
+
+def caminho_lote(diretorio, nome, indice, fold, lote):
+    return os.path.join(diretorio, f'{nome}_{indice}_{fold}_{lote}.joblib')
+
+def _ajustar_lote(nome, indice, parametros, fold, lote, n_arvores, treino, teste, diretorio, n_jobs):
+    # Um lote de árvores de uma combinação num fold. As árvores de uma floresta são independentes: lotes com sementes
+    # diferentes somam-se na mesma floresta, e a probabilidade dela é a média das dos lotes ponderada pelas árvores.
+    X, y = _DADOS[nome]; inicio = time.perf_counter(); semente = MODELOS[nome]['criar']().random_state
+    modelo = MODELOS[nome]['criar'](**{**parametros, 'n_estimators': n_arvores, 'n_jobs': n_jobs, 'random_state': None if semente is None else semente + lote})
+    modelo.fit(X[treino[0]:treino[1]], y[treino[0]:treino[1]])
+    probabilidades = modelo.predict_proba(X[teste[0]:teste[1]])
+    joblib.dump(modelo, caminho_lote(diretorio, nome, indice, fold, lote))
+    return nome, indice, fold, n_arvores, probabilidades, modelo.classes_, time.perf_counter() - inicio
+
+# --- ORQUESTRAÇÃO ---
+def gerar_grade(grade):
+    nomes = list(grade)
+    return [dict(zip(nomes, valores)) for valores in product(*(grade[nome] for nome in nomes))]
+
+def gerar_folds(n_linhas, n_splits):
+    divisor = TimeSeriesSplit(n_splits=n_splits, gap=GAP_VALIDACAO)
+    return [((int(treino[0]), int(treino[-1]) + 1), (int(teste[0]), int(teste[-1]) + 1)) for treino, teste in divisor.split(np.empty(n_linhas))]
+
+def cronograma_arvores(n_arvores, n_combinacoes):
+    # Árvores acumuladas por rodada: dobram a cada rodada (e as combinações caem pela metade) até n_arvores,
+    # quando resta só a vencedora. Uma combinação só: uma rodada, com todas as árvores.
+    rodadas = math.ceil(math.log2(n_combinacoes)) if n_combinacoes > 1 else 0
+    return sorted({max(1, round(n_arvores / 2 ** (rodadas - r))) for r in range(rodadas + 1)})
+
+def avaliar_probabilidades(probabilidades, classes, y_teste):
+    acertos = classes[np.argmax(probabilidades, axis=1)] == y_teste
+    k = min(5, len(classes))
+    top_k = classes[np.argpartition(probabilidades, -k, axis=1)[:, -k:]]
+    return {'acuracia': float(acertos.mean()), 'acuracia_top5': float((top_k == y_teste[:, None]).any(axis=1).mean())}
+
+def juntar_lotes(caminhos, features):
+    # A floresta final é a soma dos lotes da vencedora no último fold: nenhum ajuste repetido para o artefato.
+    modelo = joblib.load(caminhos[0])
+    for caminho in caminhos[1:]: modelo.estimators_ += joblib.load(caminho).estimators_
+    modelo.n_estimators = len(modelo.estimators_); modelo.n_jobs = None
+    modelo.feature_names_in_ = np.asarray(features, dtype=object) # treinado em NumPy; o monitor valida os nomes
+    return modelo
+
+def buscar_em_paralelo(datasets, grades, folds, workers):
+    # Successive halving: todas as combinações começam com poucas árvores nos folds de validação; a cada rodada a
+    # metade pior (média da métrica nos folds) sai e as restantes ganham um lote de árvores, sem reajustar as já feitas.
+    cronogramas = {nome: cronograma_arvores(MODELOS[nome]['criar'](**grades[nome][0]).n_estimators, len(grades[nome])) for nome in datasets}
+    vivas = {nome: list(range(len(grades[nome]))) for nome in datasets}
+    somas, arvores, segundos, classes, metricas = {}, {}, {}, {}, {nome: {} for nome in datasets}
+    resultados = {}
+    with tempfile.TemporaryDirectory() as diretorio:
+        caminhos = {}
+        for nome, (df, features) in datasets.items():
+            caminho_x, caminho_y = os.path.join(diretorio, f'{nome}_X.npy'), os.path.join(diretorio, f'{nome}_y.npy')
+            np.save(caminho_x, df[features].to_numpy(dtype=np.float32)); np.save(caminho_y, df['target'].to_numpy())
+            caminhos[nome] = (caminho_x, caminho_y)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_inicializar_worker, initargs=(caminhos,)) as pool:
+            for rodada in range(max(len(c) for c in cronogramas.values())):
+                tarefas = []
+                for nome in datasets:
+                    if rodada >= len(cronogramas[nome]): continue
+                    lote = cronogramas[nome][rodada] - (cronogramas[nome][rodada - 1] if rodada else 0)
+                    for indice in vivas[nome]:
+                        for fold, (treino, teste) in folds[nome]: tarefas.append((nome, indice, grades[nome][indice], fold, rodada, lote, treino, teste, diretorio))
+                n_jobs = max(1, workers // len(tarefas)) # rodadas finais têm poucas tarefas: cada uma usa mais núcleos
+                for futuro in as_completed([pool.submit(_ajustar_lote, *tarefa, n_jobs) for tarefa in tarefas]):
+                    nome, indice, fold, n_arvores, probabilidades, classes[nome], duracao = futuro.result(); chave = (nome, indice, fold)
+                    somas[chave] = somas.get(chave, 0) + probabilidades * n_arvores; arvores[chave] = arvores.get(chave, 0) + n_arvores
+                    segundos[chave] = segundos.get(chave, 0) + duracao
+                for nome in datasets:
+                    if rodada >= len(cronogramas[nome]): continue
+                    df = datasets[nome][0]; y = df['target'].to_numpy()
+                    for indice in vivas[nome]:
+                        for fold, (treino, teste) in folds[nome]:
+                            chave = (nome, indice, fold)
+                            metricas[nome].setdefault(indice, {})[fold] = {**avaliar_probabilidades(somas[chave] / arvores[chave], classes[nome], y[teste[0]:teste[1]]),
+                                'arvores': arvores[chave], 'n_treino': treino[1] - treino[0], 'n_teste': teste[1] - teste[0], 'segundos': segundos[chave]}
+                        print(f"  [{nome}] rodada {rodada} {grades[nome][indice]} ({cronogramas[nome][rodada]} árvores): {MODELOS[nome]['metrica']} {media(metricas[nome][indice], MODELOS[nome]['metrica']):.2%}")
+                    if rodada < len(cronogramas[nome]) - 1:
+                        ordenadas = sorted(vivas[nome], key=lambda i: media(metricas[nome][i], MODELOS[nome]['metrica']), reverse=True)
+                        for indice in ordenadas[math.ceil(len(ordenadas) / 2):]:
+                            for fold, _ in folds[nome]: somas.pop((nome, indice, fold), None)
+                        vivas[nome] = ordenadas[:math.ceil(len(ordenadas) / 2)]
+        for nome, (df, features) in datasets.items():
+            vencedora = vivas[nome][0]; ultimo_fold = folds[nome][-1][0]
+            modelo = juntar_lotes([caminho_lote(diretorio, nome, vencedora, ultimo_fold, r) for r in range(len(cronogramas[nome]))], features)
+            resultados[nome] = (modelo, resumir(metricas[nome], grades[nome], MODELOS[nome]['metrica']))
+    return resultados
+
+def media(folds, metrica):
+    return float(np.mean([medidas[metrica] for medidas in folds.values()]))
+
+def resumir(metricas_modelo, grade, metrica):
+    # Mais árvores = chegou mais longe na halving; a primeira é a vencedora (o artefato salvo).
+    resumo = []
+    for indice, folds in metricas_modelo.items():
+        valores = [folds[f][metrica] for f in sorted(folds)]
+        resumo.append({'parametros': grade[indice], 'arvores': folds[max(folds)]['arvores'], 'media': float(np.mean(valores)), 'desvio': float(np.std(valores)),
+                       'folds': [folds[f] for f in sorted(folds)]})
+    return sorted(resumo, key=lambda r: (r['arvores'], r['media']), reverse=True)
+
+def train_all(n_splits=N_SPLITS, folds_validacao=FOLDS_VALIDACAO, workers=None, busca=True, mesa=MESA_PADRAO):
+    inicio_total = time.perf_counter()
+    print(f"Iniciando treinamento unificado dos modelos (mesa '{mesa}')...")
+    conn = train_model_numeros.get_db_connection()
+    if not conn: print("Falha ao conectar ao DB. Abortando."); return
+    try:
+        store = FeatureStore(janela=train_model_numeros.ANALYSIS_WINDOW, mesa=mesa); novos = store.sincronizar(conn)
+        print(f"{novos} giros novos extraídos. Total de {len(store)} giros no feature store.")
+    finally:
+        conn.close()
+
+    colunas = store.abrir(); datasets = {}
+    for nome, config in MODELOS.items():
+        if len(store) < config['minimo']: print(f"[{nome}] Dados insuficientes (< {config['minimo']}). Ignorando."); continue
+        df, features = config['preparar'](colunas)
+        if df.empty: print(f"[{nome}] Nenhum dado restante após preparação. Ignorando."); continue
+        datasets[nome] = (df, features)
+    if not datasets: print("Nenhum modelo com dados suficientes. Abortando."); return
+
+    # Os últimos folds do walk-forward validam; o último (o mais recente como teste) também dá o artefato.
+    grades = {nome: gerar_grade(MODELOS[nome]['grade']) if busca else [{}] for nome in datasets}
+    folds = {nome: list(enumerate(gerar_folds(len(df), n_splits)))[-folds_validacao:] for nome, (df, _) in datasets.items()}
+    workers = workers or os.cpu_count()
+    print(f"Busca (successive halving) em {workers} processos: {', '.join(f'{nome}: {len(grades[nome])} combinações x {len(folds[nome])} folds' for nome in datasets)}...")
+    resultados = buscar_em_paralelo(datasets, grades, folds, workers)
+
+    relatorio = {'gerado_em': datetime.now(timezone.utc).isoformat(), 'mesa': mesa, 'giros': len(store), 'ultimo_id': store.ultimo_id,
+                 'n_splits': n_splits, 'folds_validacao': folds_validacao, 'modelos': {}}
+    for nome, (df, features) in datasets.items():
+        config = MODELOS[nome]; modelo, resumo = resultados[nome]; melhor = resumo[0]; arquivo = arquivo_modelo(config['arquivo'], mesa)
+        print(f"[{nome}] Melhores parâmetros {melhor['parametros']}: {config['metrica']} média {melhor['media']:.2%} (±{melhor['desvio']:.2%})")
+        joblib.dump(config['artefato'](modelo, features), arquivo)
+        linhas_treino = melhor['folds'][-1]['n_treino']
+        print(f"[{nome}] Modelo final ({modelo.n_estimators} árvores, {linhas_treino} linhas de treino) salvo como '{arquivo}'")
+        relatorio['modelos'][nome] = {
+            'arquivo': arquivo, 'features': features, 'linhas': len(df), 'linhas_treino': linhas_treino, 'metrica': config['metrica'],
+            'melhores_parametros': melhor['parametros'], 'validacao': resumo,
+        }
+    relatorio['segundos_total'] = time.perf_counter() - inicio_total
+    arquivo_metricas = arquivo_modelo(ARQUIVO_METRICAS, mesa)
+    with open(arquivo_metricas, 'w') as f: json.dump(relatorio, f, indent=2, ensure_ascii=False)
+    print(f"Relatório de métricas salvo em '{arquivo_metricas}' ({relatorio['segundos_total']:.0f}s no total).")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--splits', type=int, default=N_SPLITS)
+    parser.add_argument('--folds', type=int, default=FOLDS_VALIDACAO, help="Últimos folds do walk-forward usados na validação")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--sem-busca', action='store_true', help="Valida apenas os parâmetros padrão de cada modelo")
+    parser.add_argument('--mesa', default=MESA_PADRAO, help="table_id da mesa; fora da mesa padrão, salva modelo_*_<mesa>.pkl")
+    args = parser.parse_args()
+    train_all(n_splits=args.splits, folds_validacao=args.folds, workers=args.workers, busca=not args.sem_busca, mesa=args.mesa)